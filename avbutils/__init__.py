@@ -8,4 +8,24 @@ from .timeline import *
 from .compositions import *
 from .markers import *
 from .sourcerefs import *
-from .mobstack import *
\ No newline at end of file
+from .mobstack import *
+from .events import *
+from .catalog import *
+from .usage import *
+from .pulls import *
+from .markerindex import *
+from .changelist import *
+from .binpool import *
+from .timecodes import *
+from .edgecode import *
+from .continuity import *
+from .sourcemap import *
+from .gaps import *
+from .sync import *
+from .effects import *
+from .multicam import *
+from .namesearch import *
+
+from . import aio
+from . import instrumentation
+instrumentation.enable_from_environment()
\ No newline at end of file
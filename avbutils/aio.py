@@ -0,0 +1,261 @@
+"""asyncio front end: awaitable bin loading and queries, run in a thread or process pool off the event loop"""
+
+import asyncio, bisect, concurrent.futures, dataclasses, datetime, functools, pathlib, threading, collections.abc, typing
+import avb
+from timecode import Timecode
+from . import binpool, events, markerindex, markers, mobstack, timeline
+
+_worker_bin_pool:binpool.BinPool|None = None
+_worker_bin_pool_lock = threading.Lock()
+
+def get_worker_bin_pool() -> binpool.BinPool:
+	"""
+	The `BinPool` queries in this module open bins from.
+
+	There's one per process: threads in a thread pool share it, and each worker of a process pool gets its own.
+	"""
+
+	global _worker_bin_pool
+
+	with _worker_bin_pool_lock:
+		if _worker_bin_pool is None:
+			_worker_bin_pool = binpool.BinPool()
+		return _worker_bin_pool
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class TimelineInfo:
+	"""The basics of a timeline, detached from the bin so it can be handed between processes"""
+
+	name:str
+	"""Name of the timeline"""
+
+	mob_id:str
+	"""Mob ID of the timeline"""
+
+	length:int
+	"""Duration (in edit units)"""
+
+	edit_rate:float
+	"""Edit rate of the timeline"""
+
+	start_tc:Timecode
+	"""Starting record timecode"""
+
+	track_labels:tuple[str, ...]
+	"""Labels of the timeline's tracks (eg `V1`, `A1`)"""
+
+	date_created:datetime.datetime
+	"""Date the timeline was created"""
+
+	date_modified:datetime.datetime
+	"""Date the timeline was last modified"""
+
+	bin_path:str|None = None
+	"""The bin containing the timeline"""
+
+	@classmethod
+	def from_composition(cls, composition:avb.trackgroups.Composition, bin_path:str|None=None) -> "TimelineInfo":
+		return cls(
+			name          = composition.name,
+			mob_id        = str(composition.mob_id),
+			length        = composition.length,
+			edit_rate     = float(composition.edit_rate),
+			start_tc      = timeline.get_start_timecode_for_composition(composition),
+			track_labels  = tuple(timeline.format_track_label(track) for track in composition.tracks),
+			date_created  = composition.creation_time,
+			date_modified = composition.last_modified,
+			bin_path      = bin_path,
+		)
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class MatchbackInfo:
+	"""What's cut in at a frame of a timeline track, and where it came from"""
+
+	timeline_name:str
+	"""Name of the timeline"""
+
+	track_label:str
+	"""Track matched back from (eg `V1`)"""
+
+	record_offset:int
+	"""Offset (in edit units) into the timeline"""
+
+	clip_name:str
+	"""Name of the clip cut in there"""
+
+	clip_mob_id:str
+	"""Mob ID of the clip cut in there"""
+
+	source_offset:int
+	"""Offset (in edit units) into the clip"""
+
+	source_tc:Timecode|None
+	"""The clip's timecode at that frame, if it has a timecode track"""
+
+	source_name:str|None
+	"""Name of the source (tape, source file, ...) behind the clip, if it could be resolved"""
+
+# Module-level so they can be pickled to a process pool
+
+def list_timelines_in_bin(bin_path:str|pathlib.Path) -> list[TimelineInfo]:
+	"""Get the basics of all timelines in a bin"""
+
+	with get_worker_bin_pool().open(bin_path) as bin_handle:
+		return [TimelineInfo.from_composition(composition, str(bin_path)) for composition in timeline.get_timelines_from_bin(bin_handle.content)]
+
+def get_markers_in_bin(bin_path:str|pathlib.Path, timeline_mob_id:str|None=None) -> list[markerindex.IndexedMarker]:
+	"""Get the markers from all timelines in a bin, or from just the timeline with the given mob ID"""
+
+	with get_worker_bin_pool().open(bin_path) as bin_handle:
+		return [
+			dataclasses.replace(markerindex.IndexedMarker.from_marker_info(composition, marker_info), bin_path=str(bin_path))
+			for composition in timeline.get_timelines_from_bin(bin_handle.content)
+			if timeline_mob_id is None or str(composition.mob_id) == timeline_mob_id
+			for marker_info in markers.get_markers_from_timeline(composition)
+		]
+
+def matchback_in_bin(bin_path:str|pathlib.Path, timeline_mob_id:str, track_label:str, record_offset:int) -> MatchbackInfo|None:
+	"""Match back from a frame of a timeline track to the clip cut in there, or `None` if there's nothing cut in"""
+
+	with get_worker_bin_pool().open(bin_path) as bin_handle:
+
+		composition = next((c for c in timeline.get_timelines_from_bin(bin_handle.content) if str(c.mob_id) == timeline_mob_id), None)
+		if composition is None:
+			raise ValueError(f"{bin_path}: No timeline with mob ID {timeline_mob_id}")
+
+		track = next((t for t in composition.tracks if timeline.format_track_label(t) == track_label), None)
+		if track is None:
+			raise ValueError(f"{composition.name}: Track not found: {track_label}")
+
+		track_events = events.flatten_track(track)
+		idx = bisect.bisect_right([event.record_offset for event in track_events], record_offset) - 1
+
+		if idx < 0 or record_offset >= track_events[idx].record_end:
+			return None
+
+		event = track_events[idx]
+		clip = event.source_clip.mob
+
+		# Source runs faster or slower than record under a motion effect
+		source_scale = (event.source_end - event.source_offset) / event.length
+		source_offset = event.source_offset + int((record_offset - event.record_offset) * source_scale)
+
+		try:
+			source_tc = timeline.get_timecode_range_for_composition(clip).start + source_offset
+		except ValueError:
+			source_tc = None
+
+		try:
+			source_name = mobstack.MobStack.from_composition(clip, event.source_clip.track, source_offset).source_name
+		except (ValueError, IndexError, AttributeError, StopIteration):
+			source_name = None
+
+		return MatchbackInfo(
+			timeline_name = composition.name,
+			track_label   = track_label,
+			record_offset = record_offset,
+			clip_name     = clip.name,
+			clip_mob_id   = str(clip.mob_id),
+			source_offset = source_offset,
+			source_tc     = source_tc,
+			source_name   = source_name,
+		)
+
+_T = typing.TypeVar("_T")
+
+class AsyncBinRunner:
+	"""
+	Runs bin loading and queries in a worker pool, so they can be awaited without blocking the event loop.
+
+	Uses a thread pool unless given another `executor`, such as a `ProcessPoolExecutor` to get around the GIL for
+	heavy queries.  At most `max_concurrent` calls are handed to the pool at once; the rest wait their turn.
+
+	Cancelling a call (directly, or with `asyncio.timeout()`) that hasn't reached the pool yet drops it; one that's
+	already running finishes in the background, still counting towards `max_concurrent`, and its result is discarded.
+
+	```
+	async with AsyncBinRunner(max_concurrent=32) as runner:
+		timelines = await runner.list_timelines("Reels.avb")
+	```
+	"""
+
+	def __init__(self, executor:concurrent.futures.Executor|None=None, max_workers:int|None=None, max_concurrent:int=16):
+
+		if max_concurrent < 1:
+			raise ValueError("max_concurrent must be at least 1")
+
+		self._owns_executor = executor is None
+		self._executor = executor or concurrent.futures.ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="avbutils")
+		self._semaphore = asyncio.Semaphore(max_concurrent)
+
+	@property
+	def executor(self) -> concurrent.futures.Executor:
+		"""The pool work is run in"""
+		return self._executor
+
+	@property
+	def uses_processes(self) -> bool:
+		"""Work runs in other processes, so only picklable results (not bins or pyavb objects) can come back"""
+		return isinstance(self._executor, concurrent.futures.ProcessPoolExecutor)
+
+	async def run(self, func:collections.abc.Callable[..., _T], *args, **kwargs) -> _T:
+		"""Run any function in the pool.  With a process pool, it must be a picklable module-level function."""
+
+		loop = asyncio.get_running_loop()
+		await self._semaphore.acquire()
+
+		try:
+			future = self._executor.submit(functools.partial(func, *args, **kwargs))
+		except BaseException:
+			self._semaphore.release()
+			raise
+
+		# Hold the slot until the work itself is done, even if the caller gives up waiting on it first
+		future.add_done_callback(lambda _: self._release_slot(loop))
+
+		return await asyncio.wrap_future(future, loop=loop)
+
+	def _release_slot(self, loop:asyncio.AbstractEventLoop):
+		"""Free a `max_concurrent` slot from whichever thread the work finished on"""
+
+		try:
+			loop.call_soon_threadsafe(self._semaphore.release)
+		except RuntimeError:
+			# The loop's closed, so nothing's left waiting on the slot
+			pass
+
+	async def open_bin(self, bin_path:str|pathlib.Path) -> avb.file.AVBFile:
+		"""
+		Open a bin.  Close it when done, or use it as a context manager.
+
+		Opened bins can't be passed between processes, so this needs a thread pool.
+		"""
+
+		if self.uses_processes:
+			raise TypeError("Opened bins can't be passed back from a process pool")
+
+		return await self.run(avb.open, bin_path)
+
+	async def list_timelines(self, bin_path:str|pathlib.Path) -> list[TimelineInfo]:
+		"""Get the basics of all timelines in a bin"""
+		return await self.run(list_timelines_in_bin, bin_path)
+
+	async def get_markers(self, bin_path:str|pathlib.Path, timeline_mob_id:str|None=None) -> list[markerindex.IndexedMarker]:
+		"""Get the markers from all timelines in a bin, or from just the timeline with the given mob ID"""
+		return await self.run(get_markers_in_bin, bin_path, timeline_mob_id)
+
+	async def matchback(self, bin_path:str|pathlib.Path, timeline_mob_id:str, track_label:str, record_offset:int) -> MatchbackInfo|None:
+		"""Match back from a frame of a timeline track to the clip cut in there"""
+		return await self.run(matchback_in_bin, bin_path, timeline_mob_id, track_label, record_offset)
+
+	def close(self):
+		"""Shut down the pool if this runner made it, dropping any work that hasn't started"""
+
+		if self._owns_executor:
+			self._executor.shutdown(wait=False, cancel_futures=True)
+
+	async def __aenter__(self) -> "AsyncBinRunner":
+		return self
+
+	async def __aexit__(self, exc_type, exc_value, traceback):
+		self.close()
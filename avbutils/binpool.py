@@ -0,0 +1,203 @@
+"""A pool of recently-opened bins, so the same bin isn't parsed over and over"""
+
+import os, pathlib, threading, contextlib, collections, dataclasses, collections.abc
+import avb
+from . import instrumentation
+
+def estimate_bin_memory(bin_path:pathlib.Path, stat:os.stat_result) -> int:
+	"""Rough guess at the memory (in bytes) an opened bin will use once its objects have been read"""
+
+	# pyavb reads objects lazily, but once a bin has been walked, it takes a few times its size on disk
+	return stat.st_size * BinPool.MEMORY_FACTOR
+
+@dataclasses.dataclass(eq=False)
+class _PooledBin:
+	"""An opened bin in the pool"""
+
+	bin_handle:avb.file.AVBFile
+	"""The opened bin"""
+
+	stat_key:tuple[int, int]
+	"""mtime and size of the bin file when it was opened"""
+
+	memory:int
+	"""Estimated memory use (in bytes)"""
+
+	users:int = 0
+	"""Number of `BinPool.open()` blocks currently using the bin"""
+
+	evicted:bool = False
+	"""Removed from the pool; close when the last user is done"""
+
+	lock:threading.RLock = dataclasses.field(default_factory=threading.RLock)
+	"""pyavb reads objects from the file on demand, so only one thread may use a handle at a time"""
+
+class BinPool:
+	"""
+	Keeps recently-opened bins around, keyed by path, evicting the least recently used beyond `max_bins` or an
+	approximate `max_memory` budget.
+
+	A bin that has changed on disk since it was opened is opened again.  Safe to use across threads: a given bin
+	is used by one thread at a time, while other bins can be used concurrently.  So two threads can't deadlock
+	waiting on each other's bins, a thread can't open one bin while it's still using another from the pool.
+
+	```
+	pool = BinPool()
+	with pool.open("Master Clips.avb") as bin_handle:
+		...
+	```
+	"""
+
+	MEMORY_FACTOR = 4
+	"""Multiple of a bin's file size used by `estimate_bin_memory()`"""
+
+	def __init__(
+			self,
+			max_bins:int|None=32,
+			max_memory:int|None=2 * 1024**3,
+			estimate_memory:collections.abc.Callable[[pathlib.Path, os.stat_result], int]=estimate_bin_memory
+		):
+
+		self._max_bins = max_bins
+		self._max_memory = max_memory
+		self._estimate_memory = estimate_memory
+
+		self._lock = threading.Lock()
+		self._entries:collections.OrderedDict[str, _PooledBin] = collections.OrderedDict()
+		self._memory = 0
+		self._thread_state = threading.local()
+
+	def __len__(self) -> int:
+		return len(self._entries)
+
+	def __contains__(self, bin_path:str|pathlib.Path) -> bool:
+		return self._bin_key(bin_path) in self._entries
+
+	@property
+	def memory(self) -> int:
+		"""Estimated memory use (in bytes) of the bins in the pool"""
+		return self._memory
+
+	@staticmethod
+	def _bin_key(bin_path:str|pathlib.Path) -> str:
+		return str(pathlib.Path(bin_path).resolve())
+
+	@contextlib.contextmanager
+	def open(self, bin_path:str|pathlib.Path) -> collections.abc.Generator[avb.file.AVBFile, None, None]:
+		"""
+		Open a bin, or reuse it if it's already open and unchanged on disk.
+
+		Raises `RuntimeError` if this thread is still using a different bin from the pool.
+		"""
+
+		bin_key = self._bin_key(bin_path)
+
+		# Bins in use by this thread, innermost last
+		held = getattr(self._thread_state, "bin_keys", None)
+		if held is None:
+			held = self._thread_state.bin_keys = []
+
+		if any(held_key != bin_key for held_key in held):
+			raise RuntimeError(f"Can't open {bin_key} from the pool while using {held[-1]} in the same thread")
+
+		stat = os.stat(bin_key)
+		stat_key = (stat.st_mtime_ns, stat.st_size)
+
+		with self._lock:
+			entry = self._checkout(bin_key, stat_key)
+
+		instrumentation.record_cache_lookup("binpool", entry is not None)
+
+		if entry is None:
+
+			# Parse outside the pool lock so other bins aren't held up
+			opened = _PooledBin(bin_handle=avb.open(bin_key), stat_key=stat_key, memory=self._estimate_memory(pathlib.Path(bin_key), stat))
+
+			with self._lock:
+
+				# Another thread may have beaten us to it
+				entry = self._checkout(bin_key, stat_key)
+
+				if entry is None:
+					entry = opened
+					entry.users += 1
+					self._entries[bin_key] = entry
+					self._memory += entry.memory
+					self._evict()
+
+			if entry is not opened:
+				opened.bin_handle.close()
+
+		try:
+			with entry.lock:
+				held.append(bin_key)
+				try:
+					yield entry.bin_handle
+				finally:
+					held.pop()
+
+		finally:
+			with self._lock:
+				entry.users -= 1
+				if entry.evicted and not entry.users:
+					entry.bin_handle.close()
+
+	def _checkout(self, bin_key:str, stat_key:tuple[int, int]) -> _PooledBin|None:
+		"""Get a current pooled bin and mark it in use, discarding it if it's out of date.  Call with the lock held."""
+
+		entry = self._entries.get(bin_key)
+
+		if entry is None:
+			return None
+
+		if entry.stat_key != stat_key:
+			self._discard(bin_key)
+			return None
+
+		self._entries.move_to_end(bin_key)
+		entry.users += 1
+		return entry
+
+	def _discard(self, bin_key:str):
+		"""Remove a bin from the pool, closing it once nobody is using it.  Call with the lock held."""
+
+		entry = self._entries.pop(bin_key)
+		self._memory -= entry.memory
+		entry.evicted = True
+
+		if not entry.users:
+			entry.bin_handle.close()
+
+	def _evict(self):
+		"""Evict least recently used bins until the pool is within its limits, always keeping the newest.  Call with the lock held."""
+
+		while len(self._entries) > 1 and (
+			(self._max_bins is not None and len(self._entries) > self._max_bins) or
+			(self._max_memory is not None and self._memory > self._max_memory)
+		):
+			self._discard(next(iter(self._entries)))
+
+	def invalidate(self, bin_path:str|pathlib.Path):
+		"""Drop a bin from the pool, so it's opened fresh next time"""
+
+		with self._lock:
+			bin_key = self._bin_key(bin_path)
+			if bin_key in self._entries:
+				self._discard(bin_key)
+
+	def clear(self):
+		"""Drop all bins from the pool"""
+
+		with self._lock:
+			for bin_key in list(self._entries):
+				self._discard(bin_key)
+
+	def close(self):
+		"""Close the pool"""
+		self.clear()
+
+	def __enter__(self) -> "BinPool":
+		return self
+
+	def __exit__(self, exc_type, exc_value, traceback):
+		self.close()
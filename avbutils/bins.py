@@ -177,7 +177,7 @@ class BinSiftMethod(enum.IntEnum):
 		# NOTE: Does this make sense to do?
 		return [cls.from_sift_item(item) for item in bin.sifted_settings]
 	
-@dataclasses.dataclass(frozen=True)
+@dataclasses.dataclass(frozen=True, slots=True)
 class BinSiftOption:
 	"""A single sift option"""
 
@@ -0,0 +1,190 @@
+"""A persistent SQLite catalog of info gathered from a project's bins, for fast project-wide queries"""
+
+import sqlite3, pathlib, dataclasses, concurrent.futures, collections.abc, os, typing
+from . import instrumentation
+
+@dataclasses.dataclass
+class CatalogUpdate:
+	"""The results of updating an index in a `ProjectCatalog`"""
+
+	updated:list[pathlib.Path] = dataclasses.field(default_factory=list)
+	"""Bins that were (re-)indexed"""
+
+	removed:list[pathlib.Path] = dataclasses.field(default_factory=list)
+	"""Bins that no longer exist and were dropped from the index"""
+
+	failed:dict[pathlib.Path, Exception] = dataclasses.field(default_factory=dict)
+	"""Bins that could not be indexed, and why"""
+
+class ProjectCatalog:
+	"""
+	SQLite-backed catalog of a project's bins.
+
+	Each index (usage, markers, etc) keeps its own tables with a `bin_path` column, and the catalog keeps track of
+	which version of each bin an index was built from, so only bins that have changed need to be parsed again.
+	"""
+
+	_SCHEMA = """
+		CREATE TABLE IF NOT EXISTS indexed_bins (
+			index_name TEXT    NOT NULL,
+			bin_path   TEXT    NOT NULL,
+			mtime_ns   INTEGER NOT NULL,
+			size       INTEGER NOT NULL,
+			PRIMARY KEY (index_name, bin_path)
+		);
+	"""
+
+	def __init__(self, db_path:str|pathlib.Path=":memory:"):
+
+		self._db_path = str(db_path)
+		self._db = sqlite3.connect(self._db_path)
+		self._db.executescript(self._SCHEMA)
+
+	@property
+	def db_path(self) -> str:
+		"""Path to the catalog database"""
+		return self._db_path
+
+	@property
+	def connection(self) -> sqlite3.Connection:
+		"""The underlying SQLite connection"""
+		return self._db
+
+	def ensure_schema(self, schema:str):
+		"""Create any tables/indexes an index needs (statements should use `IF NOT EXISTS`)"""
+
+		self._db.executescript(schema)
+
+	@staticmethod
+	def _bin_key(bin_path:str|pathlib.Path) -> str:
+		"""Normalized bin path for use as a key"""
+		return str(pathlib.Path(bin_path).resolve())
+
+	def indexed_bins(self, index_name:str) -> list[pathlib.Path]:
+		"""Bins currently in a given index"""
+
+		return [pathlib.Path(row[0]) for row in self._db.execute("SELECT bin_path FROM indexed_bins WHERE index_name = ?", (index_name,))]
+
+	def stale_bins(self, index_name:str, bin_paths:collections.abc.Iterable[str|pathlib.Path]) -> list[pathlib.Path]:
+		"""Of the given bins, return those which are new or have changed since they were last indexed.  Missing bins are skipped."""
+
+		known = {
+			bin_path: (mtime_ns, size)
+			for bin_path, mtime_ns, size in self._db.execute("SELECT bin_path, mtime_ns, size FROM indexed_bins WHERE index_name = ?", (index_name,))
+		}
+
+		stale = []
+		for bin_path in bin_paths:
+			try:
+				stat = os.stat(bin_path)
+			except FileNotFoundError:
+				continue
+			if known.get(self._bin_key(bin_path)) != (stat.st_mtime_ns, stat.st_size):
+				stale.append(pathlib.Path(bin_path))
+
+		return stale
+
+	def mark_bin_indexed(self, index_name:str, bin_path:str|pathlib.Path, stat:os.stat_result|None=None):
+		"""Record the version of a bin an index was built from"""
+
+		stat = stat or os.stat(bin_path)
+		self._db.execute(
+			"INSERT OR REPLACE INTO indexed_bins (index_name, bin_path, mtime_ns, size) VALUES (?, ?, ?, ?)",
+			(index_name, self._bin_key(bin_path), stat.st_mtime_ns, stat.st_size)
+		)
+
+	def forget_bin(self, index_name:str, bin_path:str|pathlib.Path, tables:collections.abc.Iterable[str]):
+		"""Remove a bin's rows from an index"""
+
+		bin_key = self._bin_key(bin_path)
+		for table in tables:
+			self._db.execute(f"DELETE FROM {table} WHERE bin_path = ?", (bin_key,))
+		self._db.execute("DELETE FROM indexed_bins WHERE index_name = ? AND bin_path = ?", (index_name, bin_key))
+
+	def update_index(
+			self,
+			index_name:str,
+			bin_paths:collections.abc.Iterable[str|pathlib.Path],
+			extract:collections.abc.Callable[[pathlib.Path], typing.Any],
+			store:collections.abc.Callable[["ProjectCatalog", str, typing.Any], None],
+			tables:collections.abc.Iterable[str],
+			max_workers:int|None=None,
+			prune:bool=True
+		) -> CatalogUpdate:
+		"""
+		Bring an index up to date with the given bins.
+
+		Only new or changed bins are parsed, concurrently in subprocesses via `extract(bin_path)`, which must be a
+		picklable module-level function.  Each result is handed to `store(catalog, bin_key, result)` to write its rows,
+		replacing the bin's previous rows in `tables`.  Bins no longer in `bin_paths` are dropped from the index, unless
+		`prune` is off (for indexes that keep history of files that come and go, like Attic backups).
+		"""
+
+		tables    = list(tables)
+		results   = CatalogUpdate()
+
+		# Stat before parsing, so a bin that changes mid-parse is picked up again next time.  A bin that's gone since
+		# it was listed (renamed, deleted) is treated as removed.
+		stats = {}
+		for bin_path in map(pathlib.Path, bin_paths):
+			try:
+				stats[bin_path] = os.stat(bin_path)
+			except FileNotFoundError:
+				continue
+
+		bin_paths = list(stats)
+
+		current_keys = {self._bin_key(p) for p in bin_paths}
+		for indexed_path in self.indexed_bins(index_name) if prune else []:
+			if str(indexed_path) not in current_keys:
+				with self._db:
+					self.forget_bin(index_name, indexed_path, tables)
+				results.removed.append(indexed_path)
+
+		stale = self.stale_bins(index_name, bin_paths)
+
+		for bin_path in bin_paths:
+			instrumentation.record_cache_lookup(f"catalog.{index_name}", bin_path not in stale)
+
+		if not stale:
+			return results
+
+		with concurrent.futures.ProcessPoolExecutor(max_workers=max_workers) as ex:
+
+			future_paths = {ex.submit(extract, bin_path): bin_path for bin_path in stale}
+
+			for future_result in concurrent.futures.as_completed(future_paths):
+				bin_path = future_paths[future_result]
+
+				try:
+					extracted = future_result.result()
+				except Exception as e:
+					results.failed[bin_path] = e
+					continue
+
+				with self._db:
+					self.forget_bin(index_name, bin_path, tables)
+					store(self, self._bin_key(bin_path), extracted)
+					self.mark_bin_indexed(index_name, bin_path, stats[bin_path])
+
+				results.updated.append(bin_path)
+
+		return results
+
+	def close(self):
+		"""Close the catalog"""
+		self._db.close()
+
+	def __enter__(self) -> "ProjectCatalog":
+		return self
+
+	def __exit__(self, exc_type, exc_value, traceback):
+		self.close()
+
+def get_bins_from_project(project_path:str|pathlib.Path) -> list[pathlib.Path]:
+	"""Find all Avid bins in a project folder, skipping dotfiles and the Attic"""
+
+	return sorted(
+		bin_path for bin_path in pathlib.Path(project_path).rglob("*.avb")
+		if not any(part.startswith(".") or part == "Avid Attic" for part in bin_path.relative_to(project_path).parts)
+	)
@@ -0,0 +1,312 @@
+"""Compare two versions of a timeline and list what changed"""
+
+import dataclasses, enum, difflib, collections.abc
+import avb
+from timecode import Timecode
+from . import events, timeline
+
+class ChangeType(enum.Enum):
+	"""Kinds of changes between two versions of a timeline"""
+
+	INSERT = "Insert"
+	"""An event was added"""
+
+	DELETE = "Delete"
+	"""An event was removed"""
+
+	TRIM   = "Trim"
+	"""An event's source in and/or out changed"""
+
+	MOVE   = "Move"
+	"""An event was moved to a different position on its track"""
+
+	def __str__(self) -> str:
+		return self.value
+
+EventKey = tuple[avb.mobid.MobID, int, int, str, tuple]
+"""What identifies an event for comparison: source mob ID, source in, source out, track label, effects signature"""
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class TimelineChange:
+	"""A change between two versions of a timeline"""
+
+	change_type:ChangeType
+	"""What kind of change this is"""
+
+	track_label:str
+	"""Track the change is on (eg `V1`)"""
+
+	old_event:events.SourceEvent|None
+	"""The event in the old version (`None` for inserts)"""
+
+	new_event:events.SourceEvent|None
+	"""The event in the new version (`None` for deletes)"""
+
+	old_record_tc:Timecode|None
+	"""Record timecode of the event in the old version"""
+
+	new_record_tc:Timecode|None
+	"""Record timecode of the event in the new version"""
+
+	@property
+	def source_clip(self) -> avb.components.SourceClip:
+		"""The source clip of the event that changed"""
+		return (self.new_event or self.old_event).source_clip
+
+	@property
+	def head_trim(self) -> int:
+		"""How far the source in moved (in edit units); positive if it moved later"""
+		if not self.old_event or not self.new_event:
+			return 0
+		return self.new_event.source_offset - self.old_event.source_offset
+
+	@property
+	def tail_trim(self) -> int:
+		"""How far the source out moved (in edit units); positive if it moved later"""
+		if not self.old_event or not self.new_event:
+			return 0
+		return self.new_event.source_end - self.old_event.source_end
+
+def effects_signature(event:events.SourceEvent) -> tuple:
+	"""A comparable summary of the effects an event is nested in"""
+
+	return tuple((type(effect).__name__, getattr(effect, "effect_id", None), effect.length) for effect in event.effects)
+
+def event_key(event:events.SourceEvent, track_label:str) -> EventKey:
+	"""Identify an event by what it shows, rather than where it is, so a ripple doesn't count as a change"""
+
+	return (event.mob_id, event.source_offset, event.source_end, track_label, effects_signature(event))
+
+MAX_EDIT_DISTANCE = 1000
+"""Beyond this many edits, `diff_sequences()` hands off to `difflib`, whose cost doesn't grow with the number of edits"""
+
+def _myers_steps(a:collections.abc.Sequence, b:collections.abc.Sequence, max_edits:int) -> list[tuple[str, int, int]]|None:
+	"""Single-item `(tag, i, j)` edit steps turning `a` into `b`, or `None` if it takes more than `max_edits`"""
+
+	n, m = len(a), len(b)
+	max_d = min(n + m, max_edits)
+
+	# Furthest-reaching x on each diagonal k, stored at `v[k + offset]`
+	offset = max_d + 1
+	v = [0] * (2 * max_d + 3)
+
+	# Only diagonals -d..d are live after d edits, so that's all backtracking needs to keep
+	trace:list[list[int]] = []
+	for d in range(max_d + 1):
+		trace.append(v[offset - d:offset + d + 1])
+		for k in range(-d, d + 1, 2):
+			x = v[k + 1 + offset] if k == -d or (k != d and v[k - 1 + offset] < v[k + 1 + offset]) else v[k - 1 + offset] + 1
+			y = x - k
+			while x < n and y < m and a[x] == b[y]:
+				x += 1
+				y += 1
+			v[k + offset] = x
+			if x >= n and y >= m:
+				break
+		else:
+			continue
+		break
+	else:
+		return None
+
+	# Backtrack to recover the edits, last to first
+	steps:list[tuple[str, int, int]] = []
+	x, y = n, m
+	for d in range(len(trace) - 1, -1, -1):
+		live = trace[d]
+		k = x - y
+		prev_k = k + 1 if k == -d or (k != d and live[k - 1 + d] < live[k + 1 + d]) else k - 1
+		prev_x = live[prev_k + d] if d else 0
+		prev_y = prev_x - prev_k if d else 0
+
+		while x > prev_x and y > prev_y:
+			x -= 1
+			y -= 1
+			steps.append(("equal", x, y))
+
+		if d:
+			if x == prev_x:
+				steps.append(("insert", x, prev_y))
+			else:
+				steps.append(("delete", prev_x, y))
+		x, y = prev_x, prev_y
+
+	steps.reverse()
+	return steps
+
+def _difflib_steps(a:collections.abc.Sequence, b:collections.abc.Sequence) -> list[tuple[str, int, int]]:
+	"""Single-item edit steps from `difflib`, with replacements split into deletes then inserts"""
+
+	steps:list[tuple[str, int, int]] = []
+
+	for tag, i1, i2, j1, j2 in difflib.SequenceMatcher(None, a, b, autojunk=False).get_opcodes():
+		if tag == "equal":
+			steps.extend(("equal", i1 + idx, j1 + idx) for idx in range(i2 - i1))
+			continue
+		steps.extend(("delete", i, j1) for i in range(i1, i2))
+		steps.extend(("insert", i2, j) for j in range(j1, j2))
+
+	return steps
+
+def diff_sequences(old:collections.abc.Sequence, new:collections.abc.Sequence, max_edits:int=MAX_EDIT_DISTANCE) -> list[tuple[str, int, int, int, int]]:
+	"""
+	Diff two sequences of hashable items with Myers' O(ND) algorithm.
+
+	Returns `(tag, old_start, old_end, new_start, new_end)` opcodes in the style of `difflib`, with tags of
+	`equal`, `delete` or `insert`.  Fast when the sequences are mostly the same, as versions of a reel tend to be;
+	past `max_edits` differences (a reel that's been completely recut) it falls back to `difflib`.
+	"""
+
+	# Common head and tail don't need to go through the diff
+	prefix = 0
+	while prefix < len(old) and prefix < len(new) and old[prefix] == new[prefix]:
+		prefix += 1
+
+	suffix = 0
+	while suffix < len(old) - prefix and suffix < len(new) - prefix and old[-1 - suffix] == new[-1 - suffix]:
+		suffix += 1
+
+	a = old[prefix:len(old) - suffix]
+	b = new[prefix:len(new) - suffix]
+
+	steps = _myers_steps(a, b, max_edits)
+	if steps is None:
+		steps = _difflib_steps(a, b)
+
+	# Group the steps into runs
+	opcodes = [("equal", 0, prefix, 0, prefix)] if prefix else []
+	for tag, i, j in steps + ([("equal", len(a) + k, len(b) + k) for k in range(suffix)]):
+		i, j = i + prefix, j + prefix
+		if opcodes and opcodes[-1][0] == tag:
+			_, i1, i2, j1, j2 = opcodes[-1]
+			opcodes[-1] = (tag, i1, i2 + (tag != "insert"), j1, j2 + (tag != "delete"))
+		else:
+			opcodes.append((tag, i, i + (tag != "insert"), j, j + (tag != "delete")))
+
+	return opcodes
+
+def _is_trim(old_event:events.SourceEvent, new_event:events.SourceEvent) -> bool:
+	"""Two events show overlapping parts of the same source with the same effects"""
+
+	return old_event.mob_id == new_event.mob_id \
+		and effects_signature(old_event) == effects_signature(new_event) \
+		and old_event.source_offset < new_event.source_end and new_event.source_offset < old_event.source_end
+
+def diff_tracks(
+		old_events:list[events.SourceEvent],
+		new_events:list[events.SourceEvent],
+		track_label:str,
+		old_start:Timecode|int=0,
+		new_start:Timecode|int=0
+	) -> list[TimelineChange]:
+	"""List the changes between two versions of a flattened track"""
+
+	# Intern the keys as small ints so the diff compares ints rather than tuples
+	interned:dict[EventKey, int] = {}
+	old_keys = [interned.setdefault(event_key(e, track_label), len(interned)) for e in old_events]
+	new_keys = [interned.setdefault(event_key(e, track_label), len(interned)) for e in new_events]
+
+	deleted:list[int] = []
+	inserted:list[int] = []
+	trims:list[tuple[int, int]] = []
+
+	# Changes between two unchanged stretches form a hunk
+	hunks:list[tuple[list[int], list[int], int, int]] = []
+	for tag, i1, i2, j1, j2 in diff_sequences(old_keys, new_keys):
+		if tag == "equal":
+			continue
+		if not hunks or hunks[-1][2:] != (i1, j1):
+			hunks.append(([], [], i1, j1))
+		hunk_deleted, hunk_inserted, _, _ = hunks[-1]
+		hunk_deleted.extend(range(i1, i2))
+		hunk_inserted.extend(range(j1, j2))
+		hunks[-1] = (hunk_deleted, hunk_inserted, i2, j2)
+
+	for hunk_deleted, hunk_inserted, _, _ in hunks:
+
+		# Within a hunk, a deleted and an inserted event showing the same source is a trim
+		for i in hunk_deleted:
+			j = next((j for j in hunk_inserted if _is_trim(old_events[i], new_events[j])), None)
+			if j is None:
+				deleted.append(i)
+			else:
+				hunk_inserted.remove(j)
+				trims.append((i, j))
+
+		inserted.extend(hunk_inserted)
+
+	# An event deleted in one place and inserted unchanged in another has moved
+	deleted_by_key:dict[int, list[int]] = {}
+	for i in deleted:
+		deleted_by_key.setdefault(old_keys[i], []).append(i)
+
+	moves:list[tuple[int, int]] = []
+	unmatched_inserts:list[int] = []
+	for j in inserted:
+		candidates = deleted_by_key.get(new_keys[j])
+		if candidates:
+			moves.append((candidates.pop(0), j))
+		else:
+			unmatched_inserts.append(j)
+
+	# ...and if it changed on the way, it's been moved and trimmed
+	deleted_by_mob:dict[avb.mobid.MobID, list[int]] = {}
+	for candidates in deleted_by_key.values():
+		for i in candidates:
+			deleted_by_mob.setdefault(old_events[i].mob_id, []).append(i)
+
+	remaining_inserts:list[int] = []
+	for j in unmatched_inserts:
+		candidates = deleted_by_mob.get(new_events[j].mob_id, [])
+		i = next((i for i in candidates if _is_trim(old_events[i], new_events[j])), None)
+		if i is None:
+			remaining_inserts.append(j)
+		else:
+			candidates.remove(i)
+			trims.append((i, j))
+
+	remaining_deletes = sorted(i for candidates in deleted_by_mob.values() for i in candidates)
+
+	changes = []
+
+	def _change(change_type:ChangeType, i:int|None, j:int|None) -> TimelineChange:
+		return TimelineChange(
+			change_type   = change_type,
+			track_label   = track_label,
+			old_event     = old_events[i] if i is not None else None,
+			new_event     = new_events[j] if j is not None else None,
+			old_record_tc = old_start + old_events[i].record_offset if i is not None else None,
+			new_record_tc = new_start + new_events[j].record_offset if j is not None else None,
+		)
+
+	changes.extend(_change(ChangeType.TRIM, i, j) for i, j in trims)
+	changes.extend(_change(ChangeType.MOVE, i, j) for i, j in moves)
+	changes.extend(_change(ChangeType.INSERT, None, j) for j in remaining_inserts)
+	changes.extend(_change(ChangeType.DELETE, i, None) for i in remaining_deletes)
+
+	return changes
+
+def diff_timelines(
+		old_timeline:avb.trackgroups.Composition,
+		new_timeline:avb.trackgroups.Composition,
+		track_type:timeline.TrackTypes|None=None
+	) -> list[TimelineChange]:
+	"""
+	List the changes between two versions of a timeline (eg `REEL 3 v14` and `REEL 3 v15`), in record order.
+
+	Tracks are matched up by label.  Each is flattened to its source events, and events are compared by what
+	they show (source, in, out, effects) rather than where they are, so an insert doesn't make everything
+	after it a change.
+	"""
+
+	old_tracks = events.flatten_timeline(old_timeline, track_type=track_type)
+	new_tracks = events.flatten_timeline(new_timeline, track_type=track_type)
+
+	old_start = timeline.get_start_timecode_for_composition(old_timeline)
+	new_start = timeline.get_start_timecode_for_composition(new_timeline)
+
+	changes = []
+	for track_label in sorted(old_tracks.keys() | new_tracks.keys(), key=lambda label: (label[0], int(label[1:]) if label[1:].isdigit() else 0)):
+		changes.extend(diff_tracks(old_tracks.get(track_label, []), new_tracks.get(track_label, []), track_label, old_start, new_start))
+
+	return sorted(changes, key=lambda c: ((c.new_record_tc if c.new_record_tc is not None else c.old_record_tc).frame_number, c.track_label))
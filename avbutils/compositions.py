@@ -4,7 +4,7 @@ from . import timeline
 #ClipColor = collections.namedtuple("ClipColor", "R G B")
 
 # TODO: Replace the namedtuple with this
-@dataclasses.dataclass
+@dataclasses.dataclass(slots=True)
 class ClipColor:
 
 	r:int
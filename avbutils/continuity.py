@@ -0,0 +1,264 @@
+"""Continuity reports: scene timings from the continuity track of each reel"""
+
+import dataclasses, pathlib, csv, concurrent.futures, collections.abc
+import avb, numpy
+from timecode import Timecode
+from . import timeline, compositions, matchback, sorting
+
+CONTINUITY_TIMELINE_SUFFIX = "continuity"
+"""Timelines whose names end with this (case-insensitive) are continuity timelines"""
+
+CONTINUITY_TRACK_NAME = "continuity"
+"""Name (case-insensitive) of the video track holding the continuity clips"""
+
+IGNORE_COLUMN = "Ignore In List"
+"""Custom bin column which, if it has any text, leaves a clip out of the report (head/tail leaders, etc)"""
+
+DESCRIPTION_COLUMN = "Comments"
+"""Custom bin column with the scene description"""
+
+LOCATION_COLUMN = "Location"
+"""Custom bin column with the scene location"""
+
+TIME_OF_DAY_COLUMN = "Time of Day"
+"""Custom bin column with the scene's time of day"""
+
+ContinuityClipCache = dict[avb.mobid.MobID, avb.trackgroups.Composition|None]
+"""Master clips of continuity subclips, keyed by mob ID"""
+
+@dataclasses.dataclass
+class SceneTable:
+	"""Columnar table of continuity scenes: one row per scene, grouped by reel in report order"""
+
+	reel_names:list[str]
+	"""Name of each reel's continuity timeline"""
+
+	rate:int
+	"""Timecode rate of the durations"""
+
+	reel_index:numpy.ndarray
+	"""Index into `reel_names` for each scene"""
+
+	scene_numbers:list[str]
+	"""Scene number of each scene (eg `Sc 032`)"""
+
+	durations:numpy.ndarray
+	"""Duration of each scene, in frames"""
+
+	descriptions:list[str]
+	"""Description of each scene"""
+
+	locations:list[str]
+	"""Location of each scene"""
+
+	times_of_day:list[str]
+	"""Time of day of each scene"""
+
+	def __len__(self) -> int:
+		return len(self.scene_numbers)
+
+	@property
+	def reel_durations(self) -> numpy.ndarray:
+		"""Total duration of each reel, in frames"""
+		return numpy.bincount(self.reel_index, weights=self.durations, minlength=len(self.reel_names)).astype(numpy.int64)
+
+	@property
+	def total_duration(self) -> int:
+		"""Total duration of all reels, in frames"""
+		return int(self.durations.sum())
+
+	def reel_rows(self) -> list[range]:
+		"""The scene rows belonging to each reel"""
+
+		bounds = numpy.searchsorted(self.reel_index, numpy.arange(len(self.reel_names) + 1)).tolist()
+		return [range(start, end) for start, end in zip(bounds[:-1], bounds[1:])]
+
+	@classmethod
+	def concatenate(cls, tables:collections.abc.Sequence["SceneTable"]) -> "SceneTable":
+		"""Join tables one after the other"""
+
+		if not tables:
+			raise ValueError("No scene tables to join")
+
+		rates = {table.rate for table in tables}
+		if len(rates) > 1:
+			raise ValueError(f"Scene tables have mixed rates: {sorted(rates)}")
+
+		reel_offsets = numpy.cumsum([0] + [len(table.reel_names) for table in tables[:-1]])
+
+		return cls(
+			reel_names    = [name for table in tables for name in table.reel_names],
+			rate          = tables[0].rate,
+			reel_index    = numpy.concatenate([table.reel_index + offset for table, offset in zip(tables, reel_offsets)]),
+			scene_numbers = [value for table in tables for value in table.scene_numbers],
+			durations     = numpy.concatenate([table.durations for table in tables]),
+			descriptions  = [value for table in tables for value in table.descriptions],
+			locations     = [value for table in tables for value in table.locations],
+			times_of_day  = [value for table in tables for value in table.times_of_day],
+		)
+
+def is_continuity_timeline(composition:avb.trackgroups.Composition) -> bool:
+	"""Whether a timeline is a continuity timeline, going by its name"""
+	return compositions.composition_is_timeline(composition) and (composition.name or "").lower().endswith(CONTINUITY_TIMELINE_SUFFIX)
+
+def get_continuity_track_from_timeline(composition:avb.trackgroups.Composition) -> avb.trackgroups.Track:
+	"""Get the video track named for continuity"""
+
+	continuity_tracks = [
+		track for track in timeline.get_tracks_from_composition(composition, type=timeline.TrackTypes.PICTURE)
+		if "attributes" in track.property_data and track.attributes.get("_COMMENT", "").lower() == CONTINUITY_TRACK_NAME
+	]
+
+	if len(continuity_tracks) != 1:
+		raise ValueError(f"{composition.name}: Found {len(continuity_tracks)} continuity tracks")
+
+	return continuity_tracks[0]
+
+def _user_columns(composition:avb.trackgroups.Composition) -> dict:
+	return (composition.attributes.get("_USER") if "attributes" in composition.property_data else None) or {}
+
+def get_scene_table_for_timeline(composition:avb.trackgroups.Composition, cache:ContinuityClipCache|None=None) -> SceneTable:
+	"""Get the continuity scenes of a reel from the clips on its continuity track"""
+
+	cache = {} if cache is None else cache
+
+	continuity_sequence = get_continuity_track_from_timeline(composition).component
+	continuity_components = continuity_sequence.components if isinstance(continuity_sequence, avb.components.Sequence) else [continuity_sequence]
+
+	rate = round(composition.edit_rate)
+	scene_numbers, durations, descriptions, locations, times_of_day = [], [], [], [], []
+
+	for component in continuity_components:
+
+		# Fillers, including the zero-length ones at either end of the sequence
+		if not isinstance(component, avb.components.SourceClip) or not component.length:
+			continue
+
+		if component.mob_id not in cache:
+			cache[component.mob_id] = matchback.matchback_sourceclip(component)
+
+		continuity_clip = cache[component.mob_id]
+
+		# Only one level deep for now: anything other than a master clip isn't a continuity clip
+		if continuity_clip is None or not compositions.composition_is_masterclip(continuity_clip):
+			continue
+
+		user_columns = _user_columns(continuity_clip)
+		if str(user_columns.get(IGNORE_COLUMN, "")).strip():
+			continue
+
+		scene_numbers.append(continuity_clip.name or "Sc ???")
+		durations.append(round(component.length * rate / float(component.edit_rate)))
+		descriptions.append(user_columns.get(DESCRIPTION_COLUMN, "-"))
+		locations.append(user_columns.get(LOCATION_COLUMN, "-"))
+		times_of_day.append(user_columns.get(TIME_OF_DAY_COLUMN, "-"))
+
+	return SceneTable(
+		reel_names    = [composition.name],
+		rate          = rate,
+		reel_index    = numpy.zeros(len(scene_numbers), dtype=numpy.int64),
+		scene_numbers = scene_numbers,
+		durations     = numpy.asarray(durations, dtype=numpy.int64),
+		descriptions  = descriptions,
+		locations     = locations,
+		times_of_day  = times_of_day,
+	)
+
+def get_scene_tables_from_bin(bin_path:str|pathlib.Path) -> list[SceneTable]:
+	"""Get the continuity scenes of each continuity timeline in a bin, one table per reel"""
+
+	with avb.open(bin_path) as bin_handle:
+		return [get_scene_table_for_timeline(composition) for composition in timeline.get_timelines_from_bin(bin_handle.content) if is_continuity_timeline(composition)]
+
+def get_scene_table_from_bins(bin_paths:collections.abc.Iterable[str|pathlib.Path], max_workers:int|None=None) -> SceneTable:
+	"""
+	Get the continuity scenes of every continuity timeline in the given bins, one bin per subprocess.
+
+	Reels are in human-sorted order of their timeline names.
+	"""
+
+	with concurrent.futures.ProcessPoolExecutor(max_workers=max_workers) as ex:
+		tables = [table for bin_tables in ex.map(get_scene_tables_from_bin, bin_paths) for table in bin_tables]
+
+	if not tables:
+		raise ValueError("No continuity timelines found")
+
+	return SceneTable.concatenate(sorted(tables, key=lambda table: sorting.human_sort(table.reel_names[0])))
+
+def format_duration(frames:int, rate:int) -> str:
+	"""Format a duration as timecode without leading zeroes (eg `1:02:03`)"""
+
+	formatted = str(Timecode(abs(int(frames)), rate=rate)).lstrip("0:") or "0"
+	return "-" + formatted if frames < 0 else formatted
+
+@dataclasses.dataclass
+class ContinuityReportLayout:
+	"""
+	Cell layout of a continuity report, worked out once so writers can write it row by row.
+
+	Column 0 labels each reel block: the reel label at the top, and its TRT at the bottom.  The feature (LP) TRT
+	goes below the last reel.
+	"""
+
+	HEADERS = ("", "Scene", "Duration", "Scene Description", "Location")
+	"""Column headers"""
+
+	rows:list[list[str]]
+	"""Cell text for every row, including the header"""
+
+	reel_blocks:list[range]
+	"""Rows of each reel block"""
+
+	total_rows:range
+	"""Rows of the LP TRT label and value"""
+
+	@property
+	def num_columns(self) -> int:
+		return len(self.HEADERS)
+
+	@classmethod
+	def from_scene_table(
+			cls,
+			scene_table:SceneTable,
+			reel_label:collections.abc.Callable[[str], str]=str,
+			reel_trt_label:collections.abc.Callable[[str], str]=lambda reel_name: "Reel TRT:"
+		) -> "ContinuityReportLayout":
+		"""Lay out a scene table, with `reel_label(reel_name)` and `reel_trt_label(reel_name)` labelling each reel block (eg `R6 v15.3.2` and `R6 TRT:`)"""
+
+		durations = [format_duration(frames, scene_table.rate) for frames in scene_table.durations.tolist()]
+		reel_durations = scene_table.reel_durations.tolist()
+
+		rows = [list(cls.HEADERS), [""] * len(cls.HEADERS)]
+		reel_blocks = []
+
+		for reel, scene_rows in enumerate(scene_table.reel_rows()):
+
+			reel_name = scene_table.reel_names[reel]
+
+			block_start = len(rows)
+			rows.extend(
+				["", scene_table.scene_numbers[idx], durations[idx], scene_table.descriptions[idx], " - ".join([scene_table.locations[idx], scene_table.times_of_day[idx]])]
+				for idx in scene_rows
+			)
+
+			# Reels with fewer than three scenes still get their label and TRT rows
+			while len(rows) - block_start < 3:
+				rows.append([""] * len(cls.HEADERS))
+
+			rows[block_start][0] = reel_label(reel_name)
+			rows[-2][0] = reel_trt_label(reel_name)
+			rows[-1][0] = format_duration(reel_durations[reel], scene_table.rate)
+
+			reel_blocks.append(range(block_start, len(rows)))
+			rows.append([""] * len(cls.HEADERS))
+
+		rows[-1][0] = "LP TRT:"
+		rows.append([format_duration(scene_table.total_duration, scene_table.rate)] + [""] * (len(cls.HEADERS) - 1))
+
+		return cls(rows=rows, reel_blocks=reel_blocks, total_rows=range(len(rows) - 2, len(rows)))
+
+def write_continuity_csv(layout:ContinuityReportLayout, output_path:str|pathlib.Path):
+	"""Write a continuity report as CSV"""
+
+	with open(output_path, "w", newline="", encoding="utf-8") as output_file:
+		csv.writer(output_file).writerows(layout.rows)
@@ -0,0 +1,335 @@
+"""Film edgecode (KeyKode/ink numbers) for timeline events, and film cut lists"""
+
+import dataclasses, collections.abc
+import avb, numpy
+from timecode import Timecode
+from . import compositions, events, sourcerefs, timeline, instrumentation
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class FilmFormat:
+	"""A film gauge and pulldown, for converting frames to feet and frames"""
+
+	name:str
+	"""Display name of the format"""
+
+	perfs_per_frame:int
+	"""Perforations advanced per frame"""
+
+	perfs_per_foot:int
+	"""Perforations in a foot of film"""
+
+	@property
+	def frames_per_foot(self) -> float:
+		"""Frames in a foot of film (not a whole number for 3-perf)"""
+		return self.perfs_per_foot / self.perfs_per_frame
+
+	def to_feet_and_frames(self, frames:numpy.ndarray|int) -> tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray]:
+		"""Split frame counts into `(feet, frames, perfs)`, where `perfs` is left over when frames don't line up with the foot (3-perf)"""
+
+		perfs = numpy.asarray(frames, dtype=numpy.int64) * self.perfs_per_frame
+		feet, perfs_into_foot = numpy.divmod(perfs, self.perfs_per_foot)
+		frames_into_foot, perf_offset = numpy.divmod(perfs_into_foot, self.perfs_per_frame)
+
+		return feet, frames_into_foot, perf_offset
+
+	def format_footage(self, frames:numpy.ndarray|int, feet_digits:int=0) -> list[str]|str:
+		"""Format frame counts as footage (eg `1234+05`, or `1234+05.2` for a 3-perf frame that starts 2 perfs past a frame line)"""
+
+		feet, frames_into_foot, perf_offset = self.to_feet_and_frames(frames)
+
+		formatted = [
+			f"{ft:0{feet_digits}}+{fr:02}" + (f".{po}" if po else "")
+			for ft, fr, po in zip(numpy.atleast_1d(feet).tolist(), numpy.atleast_1d(frames_into_foot).tolist(), numpy.atleast_1d(perf_offset).tolist())
+		]
+
+		return formatted if numpy.ndim(frames) else formatted[0]
+
+FILM_35MM_4PERF = FilmFormat("35mm 4-perf", perfs_per_frame=4, perfs_per_foot=64)
+"""35mm 4-perf: 16 frames per foot"""
+
+FILM_35MM_3PERF = FilmFormat("35mm 3-perf", perfs_per_frame=3, perfs_per_foot=64)
+"""35mm 3-perf: 21⅓ frames per foot"""
+
+FILM_35MM_2PERF = FilmFormat("35mm 2-perf", perfs_per_frame=2, perfs_per_foot=64)
+"""35mm 2-perf (Techniscope): 32 frames per foot"""
+
+FILM_16MM = FilmFormat("16mm", perfs_per_frame=1, perfs_per_foot=40)
+"""16mm: 40 frames per foot"""
+
+FILM_65MM_5PERF = FilmFormat("65mm 5-perf", perfs_per_frame=5, perfs_per_foot=64)
+"""65mm 5-perf: 12.8 frames per foot"""
+
+FILM_FORMATS_BY_KIND:dict[int, FilmFormat] = {
+	1: FILM_35MM_4PERF,
+	2: FILM_16MM,
+	4: FILM_65MM_5PERF,
+}
+"""Default format for each edgecode `film_kind`"""
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class EdgecodeInfo:
+	"""Edgecode of a source, from its edgecode track"""
+
+	prefix:str
+	"""Key number prefix (manufacturer, stock and roll, eg `KJ 23 1234`)"""
+
+	start:int
+	"""Footage count (in frames) at the start of the source"""
+
+	film_kind:int
+	"""Film kind as stored in the bin (1 = 35mm, 2 = 16mm, ...)"""
+
+	code_format:int
+	"""Code format as stored in the bin (keycode, edge numbers, ...)"""
+
+	@property
+	def film_format(self) -> FilmFormat:
+		"""The default film format for this source's film kind"""
+		return FILM_FORMATS_BY_KIND.get(self.film_kind, FILM_35MM_4PERF)
+
+	@classmethod
+	def from_edgecode_component(cls, component:avb.components.Edgecode) -> "EdgecodeInfo":
+		return cls(
+			prefix      = bytes(component.header).rstrip(b"\x00").decode("ascii", errors="replace").strip(),
+			start       = component.start_ec,
+			film_kind   = component.film_kind,
+			code_format = component.code_format,
+		)
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class _EdgecodeSpan:
+	"""A stretch of a referenced track that resolves through the same chain of clips, to the same edgecode source"""
+
+	start:float
+	"""Start of the stretch, in frames of the referenced track (`-inf` if it runs from the start)"""
+
+	end:float
+	"""End (exclusive) of the stretch (`inf` if it runs to the end)"""
+
+	edgecode_info:EdgecodeInfo|None
+	"""Edgecode of the source, or `None` if the stretch doesn't resolve to a source with edgecode"""
+
+	source_mob:avb.trackgroups.Composition|None
+	"""The physical source with edgecode"""
+
+	shift:int
+	"""Position in `source_mob`, less the position in the referenced track"""
+
+EdgecodeCache = dict[tuple[avb.mobid.MobID, str, int], list[_EdgecodeSpan]]
+"""Resolved stretches of each referenced track, keyed by `(mob ID, media kind, track ID)`"""
+
+def get_edgecode_for_composition(composition:avb.trackgroups.Composition) -> EdgecodeInfo|None:
+	"""Get edgecode info from a source's edgecode track, if it has one"""
+
+	for track in timeline.get_tracks_from_composition(composition, type=timeline.TrackTypes.EDGECODE):
+
+		if "component" not in track.property_data:
+			continue
+
+		component = track.component
+		if isinstance(component, avb.components.Sequence):
+			component, _ = component.nearest_component_at_time(0)
+
+		if isinstance(component, avb.components.Edgecode):
+			return EdgecodeInfo.from_edgecode_component(component)
+
+	return None
+
+def _is_physical_source(composition:avb.trackgroups.Composition) -> bool:
+	return compositions.MobTypes.from_composition(composition) == compositions.MobTypes.SOURCE_MOB \
+		and sourcerefs.SourceMobRole.from_composition(composition) != sourcerefs.SourceMobRole.ESSENCE
+
+def _resolve_edgecode_span(source_clip:avb.components.SourceClip, offset:int) -> _EdgecodeSpan:
+	"""
+	Follow a source clip down its chain of clips (as `sourcerefs.physical_references_for_component()` does) to the
+	first physical source with edgecode, noting how far either side of it the chain stays the same.
+	"""
+
+	frame = source_clip.start_time + offset
+	start, end = -numpy.inf, numpy.inf
+
+	component, component_offset = source_clip, offset
+
+	while isinstance(component, avb.components.SourceClip) and component.track:
+
+		position = component.start_time + component_offset
+
+		if _is_physical_source(component.mob):
+			edgecode_info = get_edgecode_for_composition(component.mob)
+			if edgecode_info is not None:
+				return _EdgecodeSpan(start, end, edgecode_info, component.mob, position - frame)
+
+		base, base_offset = sourcerefs.resolve_base_component_from_component(component.track.component, position)
+
+		# The next clip is the same for as long as its own range lasts, unless a change of rate stretches things.
+		# Like `Sequence.nearest_component_at_time()`, a range runs from just after its start to its end, inclusive.
+		if round(base.edit_rate) == round(component.edit_rate):
+			base_start = frame - base_offset.frame_number
+			start, end = max(start, base_start + 1), min(end, base_start + base.length + 1)
+		else:
+			start, end = frame, frame + 1
+
+		component, component_offset = base, base_offset.frame_number
+
+	return _EdgecodeSpan(start, end, None, None, 0)
+
+def _find_edgecode_source(source_clip:avb.components.SourceClip, offset:int, cache:EdgecodeCache) -> tuple[EdgecodeInfo, avb.trackgroups.Composition, int]|None:
+	"""Find the physical source with edgecode for an event, and the event's position in it"""
+
+	key = (source_clip.mob_id, source_clip.media_kind, source_clip.track_id)
+	frame = source_clip.start_time + offset
+	spans = cache.setdefault(key, [])
+
+	span = next((span for span in spans if span.start <= frame < span.end), None)
+	instrumentation.record_cache_lookup("edgecode.sources", span is not None)
+
+	if span is None:
+
+		try:
+			span = _resolve_edgecode_span(source_clip, offset)
+		except (ValueError, AttributeError):
+			return None
+
+		# Frames outside the range (a sequence's first frame, or past the end of what's referenced) still resolve,
+		# just not for any other frame
+		if not span.start <= frame < span.end:
+			span = dataclasses.replace(span, start=frame, end=frame + 1)
+
+		spans.append(span)
+
+	if span.edgecode_info is None:
+		return None
+
+	return span.edgecode_info, span.source_mob, frame + span.shift
+
+@dataclasses.dataclass
+class CutList:
+	"""Columnar film cut list: one row per event, with key numbers"""
+
+	film_format:FilmFormat
+	"""Film format used for footage"""
+
+	record_start_tc:Timecode
+	"""Starting timecode of the timeline"""
+
+	track_labels:list[str]
+	"""Track of each event"""
+
+	source_names:list[str|None]
+	"""Name of the film source (lab roll, camera roll) of each event"""
+
+	prefixes:list[str]
+	"""Key number prefix of each event"""
+
+	record_start:numpy.ndarray
+	"""Start of each event in the timeline (in frames)"""
+
+	record_end:numpy.ndarray
+	"""End (exclusive) of each event in the timeline"""
+
+	kn_start:numpy.ndarray
+	"""Footage count (in frames) of the first frame of each event"""
+
+	kn_end:numpy.ndarray
+	"""Footage count (in frames) of the last frame of each event"""
+
+	has_edgecode:numpy.ndarray
+	"""Whether a film source with edgecode was found for each event"""
+
+	def __len__(self) -> int:
+		return len(self.track_labels)
+
+	def format_key_numbers(self, kn:numpy.ndarray) -> list[str]:
+		"""Format footage counts as full key numbers (eg `KJ 23 1234 5678+05`)"""
+
+		footages = self.film_format.format_footage(kn, feet_digits=4)
+		return [
+			f"{prefix} {footage}" if has_edgecode else ""
+			for prefix, footage, has_edgecode in zip(self.prefixes, footages, self.has_edgecode.tolist())
+		]
+
+	def rows(self) -> collections.abc.Generator[dict[str, str], None, None]:
+		"""The cut list as display rows"""
+
+		kn_starts = self.format_key_numbers(self.kn_start)
+		kn_ends   = self.format_key_numbers(self.kn_end)
+		footages  = self.film_format.format_footage(self.record_start)
+		lengths   = self.film_format.format_footage(self.record_end - self.record_start)
+
+		for idx in range(len(self)):
+			yield {
+				"Event":        str(idx + 1),
+				"Track":        self.track_labels[idx],
+				"Record TC":    str(self.record_start_tc + int(self.record_start[idx])),
+				"Footage":      footages[idx],
+				"Length":       lengths[idx],
+				"Source":       self.source_names[idx] or "",
+				"KN Start":     kn_starts[idx],
+				"KN End":       kn_ends[idx],
+			}
+
+def get_cut_list(
+		composition:avb.trackgroups.Composition,
+		film_format:FilmFormat|None=None,
+		track_type:timeline.TrackTypes|None=timeline.TrackTypes.PICTURE,
+		cache:EdgecodeCache|None=None
+	) -> CutList:
+	"""
+	Build a film cut list for a timeline, with KN start/end for each event.
+
+	Sources are resolved to the physical source carrying edgecode once per stretch of each referenced track (for
+	a master clip, usually the whole clip), and reused by every event cut from it.  The footage math is done for
+	all events at once.  `film_format` defaults to the format of the first source with edgecode.
+	"""
+
+	cache = {} if cache is None else cache
+
+	track_labels, source_names, prefixes = [], [], []
+	record_start, lengths, source_lengths, source_positions, edgecode_starts, has_edgecode = [], [], [], [], [], []
+
+	for track_label, track_events in events.flatten_timeline(composition, track_type=track_type).items():
+		for event in track_events:
+
+			found = _find_edgecode_source(event.source_clip, event.source_offset - event.source_clip.start_time, cache)
+
+			track_labels.append(track_label)
+			record_start.append(event.record_offset)
+			lengths.append(event.length)
+
+			# Differs from the record length under a motion effect
+			source_lengths.append(event.source_end - event.source_offset)
+
+			if found is None:
+				source_names.append(None)
+				prefixes.append("")
+				source_positions.append(0)
+				edgecode_starts.append(0)
+				has_edgecode.append(False)
+				continue
+
+			edgecode_info, source_mob, source_position = found
+			film_format = film_format or edgecode_info.film_format
+
+			source_names.append(source_mob.name)
+			prefixes.append(edgecode_info.prefix)
+			source_positions.append(source_position)
+			edgecode_starts.append(edgecode_info.start)
+			has_edgecode.append(True)
+
+	record_start   = numpy.asarray(record_start, dtype=numpy.int64)
+	lengths        = numpy.asarray(lengths, dtype=numpy.int64)
+	source_lengths = numpy.asarray(source_lengths, dtype=numpy.int64)
+	kn_start       = numpy.asarray(edgecode_starts, dtype=numpy.int64) + numpy.asarray(source_positions, dtype=numpy.int64)
+
+	return CutList(
+		film_format     = film_format or FILM_35MM_4PERF,
+		record_start_tc = timeline.get_start_timecode_for_composition(composition),
+		track_labels    = track_labels,
+		source_names    = source_names,
+		prefixes        = prefixes,
+		record_start    = record_start,
+		record_end      = record_start + lengths,
+		kn_start        = kn_start,
+		kn_end          = kn_start + source_lengths - 1,
+		has_edgecode    = numpy.asarray(has_edgecode, dtype=bool),
+	)
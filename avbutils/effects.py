@@ -0,0 +1,214 @@
+"""Project-wide inventory of effects (TrackEffects, TimeWarps, transitions, group clips) in timelines"""
+
+import dataclasses, pathlib, collections.abc
+import avb
+from . import catalog, timeline
+
+EFFECTS_INDEX_NAME = "effects"
+"""Name of the effects index in the `ProjectCatalog`"""
+
+EFFECTS_SCHEMA = """
+	CREATE TABLE IF NOT EXISTS effect_inventory (
+		bin_path        TEXT    NOT NULL,
+		sequence_name   TEXT,
+		sequence_mob_id TEXT    NOT NULL,
+		track_label     TEXT    NOT NULL,
+		effect_type     TEXT    NOT NULL,
+		effect_class    TEXT    NOT NULL,
+		effect_id       TEXT,
+		record_start    INTEGER NOT NULL,
+		record_end      INTEGER NOT NULL,
+		depth           INTEGER NOT NULL,
+		edit_rate       REAL    NOT NULL
+	);
+	CREATE INDEX IF NOT EXISTS effect_inventory_by_bin  ON effect_inventory (bin_path);
+	CREATE INDEX IF NOT EXISTS effect_inventory_by_type ON effect_inventory (effect_type, effect_id);
+"""
+"""SQLite schema for the effects index"""
+
+EFFECT_TYPES:tuple[type, ...] = (
+	avb.trackgroups.TimeWarp,
+	avb.trackgroups.TransitionEffect,
+	avb.trackgroups.Selector,
+	avb.trackgroups.EssenceGroup,
+	avb.trackgroups.TrackEffect,
+)
+"""Component types counted as effects, most specific first.  An effect's `effect_type` is the first of these it is."""
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class EffectUsage:
+	"""An effect component somewhere in a timeline"""
+
+	sequence_name:str
+	"""Name of the timeline"""
+
+	sequence_mob_id:str
+	"""Mob ID of the timeline"""
+
+	track_label:str
+	"""Track the effect is on (eg `V1`)"""
+
+	effect_type:str
+	"""Kind of effect, from `EFFECT_TYPES` (eg `TimeWarp`, `Selector`)"""
+
+	effect_class:str
+	"""The component's own class (eg `MotionEffect`, `PanVolumeEffect`)"""
+
+	effect_id:str
+	"""Avid effect ID (eg `EFF_BLEND_DISSOLVE`), if it has one"""
+
+	record_start:int
+	"""Offset (in edit units) from the start of the timeline"""
+
+	record_end:int
+	"""Offset of the end (exclusive) from the start of the timeline"""
+
+	depth:int
+	"""How many effects this one is nested inside (0 if it's directly on the track)"""
+
+	edit_rate:float
+	"""Edit rate of the timeline"""
+
+	bin_path:str|None = None
+	"""The bin containing the timeline"""
+
+def get_effects_from_timeline(composition:avb.trackgroups.Composition) -> collections.abc.Generator[EffectUsage, None, None]:
+	"""Get every effect component in a timeline, including those nested in other effects and in every angle of a group"""
+
+	for track in composition.tracks:
+
+		if "component" not in track.property_data:
+			continue
+
+		track_label = timeline.format_track_label(track)
+
+		for item in timeline.walk_components(track.component):
+
+			if not isinstance(item.component, EFFECT_TYPES):
+				continue
+
+			yield EffectUsage(
+				sequence_name   = composition.name,
+				sequence_mob_id = str(composition.mob_id),
+				track_label     = track_label,
+				effect_type     = next(effect_type for effect_type in EFFECT_TYPES if isinstance(item.component, effect_type)).__name__,
+				effect_class    = type(item.component).__name__,
+				effect_id       = getattr(item.component, "effect_id", None) or "",
+				record_start    = item.offset,
+				record_end      = item.offset + item.component.length,
+				depth           = sum(isinstance(parent, EFFECT_TYPES) for parent in item.parents),
+				edit_rate       = float(composition.edit_rate),
+			)
+
+def get_effects_from_bin(bin_path:str|pathlib.Path) -> list[EffectUsage]:
+	"""Get every effect component in all timelines in a bin"""
+
+	with avb.open(bin_path) as bin_handle:
+		return [
+			effect_usage
+			for composition in timeline.get_timelines_from_bin(bin_handle.content)
+			for effect_usage in get_effects_from_timeline(composition)
+		]
+
+def store_effects(project_catalog:catalog.ProjectCatalog, bin_key:str, effect_usages:list[EffectUsage]):
+	"""Write a bin's effect rows to the catalog"""
+
+	project_catalog.connection.executemany(
+		"INSERT INTO effect_inventory (bin_path, sequence_name, sequence_mob_id, track_label, effect_type, effect_class, effect_id, record_start, record_end, depth, edit_rate) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+		((bin_key, e.sequence_name, e.sequence_mob_id, e.track_label, e.effect_type, e.effect_class, e.effect_id, e.record_start, e.record_end, e.depth, e.edit_rate) for e in effect_usages)
+	)
+
+def update_effects_index(project_catalog:catalog.ProjectCatalog, bin_paths:collections.abc.Iterable[str|pathlib.Path], max_workers:int|None=None) -> catalog.CatalogUpdate:
+	"""Inventory effects for the given bins (typically all bins in a project), re-parsing only bins that have changed"""
+
+	project_catalog.ensure_schema(EFFECTS_SCHEMA)
+
+	return project_catalog.update_index(
+		index_name  = EFFECTS_INDEX_NAME,
+		bin_paths   = bin_paths,
+		extract     = get_effects_from_bin,
+		store       = store_effects,
+		tables      = ["effect_inventory"],
+		max_workers = max_workers
+	)
+
+def _effect_filters(
+		effect_type:str|None,
+		effect_id:str|None,
+		sequence_name:str|None,
+		bin_paths:collections.abc.Iterable[str|pathlib.Path]|None
+	) -> tuple[str, list]:
+	"""SQL `WHERE` clause and parameters for the effect query filters"""
+
+	clauses, params = [], []
+
+	if effect_type is not None:
+		clauses.append("effect_type = ?")
+		params.append(effect_type)
+
+	if effect_id is not None:
+		clauses.append("effect_id = ?")
+		params.append(effect_id)
+
+	if sequence_name is not None:
+		clauses.append("sequence_name GLOB ?")
+		params.append(sequence_name)
+
+	if bin_paths is not None:
+		bin_keys = [str(pathlib.Path(p).resolve()) for p in bin_paths]
+		clauses.append(f"bin_path IN ({', '.join('?' * len(bin_keys))})")
+		params.extend(bin_keys)
+
+	return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+def find_effects(
+		project_catalog:catalog.ProjectCatalog,
+		effect_type:str|None=None,
+		effect_id:str|None=None,
+		sequence_name:str|None=None,
+		bin_paths:collections.abc.Iterable[str|pathlib.Path]|None=None
+	) -> list[EffectUsage]:
+	"""
+	Find effects in the catalog, such as all `TimeWarp`s in timelines matching `*LOCKED*`.
+
+	`sequence_name` is a glob pattern (case-sensitive, `*` and `?` wildcards).
+	"""
+
+	project_catalog.ensure_schema(EFFECTS_SCHEMA)
+	where, params = _effect_filters(effect_type, effect_id, sequence_name, bin_paths)
+
+	return [
+		EffectUsage(*row) for row in project_catalog.connection.execute(
+			"SELECT sequence_name, sequence_mob_id, track_label, effect_type, effect_class, effect_id, record_start, record_end, depth, edit_rate, bin_path "
+			f"FROM effect_inventory{where} ORDER BY sequence_name, record_start, track_label",
+			params
+		)
+	]
+
+def count_effects(
+		project_catalog:catalog.ProjectCatalog,
+		group_by:collections.abc.Sequence[str]=("effect_type", "effect_id"),
+		effect_type:str|None=None,
+		effect_id:str|None=None,
+		sequence_name:str|None=None,
+		bin_paths:collections.abc.Iterable[str|pathlib.Path]|None=None
+	) -> dict[tuple, int]:
+	"""
+	Count effects in the catalog, grouped by any of `effect_type`, `effect_class`, `effect_id`, `sequence_name`,
+	`track_label`, `depth` or `bin_path`.  Takes the same filters as `find_effects()`.
+	"""
+
+	allowed = {"effect_type", "effect_class", "effect_id", "sequence_name", "track_label", "depth", "bin_path"}
+	if not group_by or not set(group_by) <= allowed:
+		raise ValueError(f"Can only group by {', '.join(sorted(allowed))}")
+
+	project_catalog.ensure_schema(EFFECTS_SCHEMA)
+	where, params = _effect_filters(effect_type, effect_id, sequence_name, bin_paths)
+	columns = ", ".join(group_by)
+
+	return {
+		tuple(row[:-1]): row[-1] for row in project_catalog.connection.execute(
+			f"SELECT {columns}, COUNT(*) FROM effect_inventory{where} GROUP BY {columns} ORDER BY COUNT(*) DESC",
+			params
+		)
+	}
@@ -0,0 +1,256 @@
+"""Flatten timeline tracks into lists of source events"""
+
+import dataclasses, collections.abc
+import avb
+from . import compositions, timeline, instrumentation
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class SourceEvent:
+	"""A source clip in use on a flattened track"""
+
+	source_clip:avb.components.SourceClip
+	"""The `SourceClip` this event cuts in"""
+
+	record_offset:int
+	"""Offset of the event (in edit units) from the start of the flattened track"""
+
+	length:int
+	"""Duration of the event (in edit units)"""
+
+	source_offset:int
+	"""Offset of the event (in edit units) into the track referenced by `source_clip`"""
+
+	effects:tuple[avb.trackgroups.TrackGroup, ...] = tuple()
+	"""Any TrackEffects, TimeWarps or Transitions this event is nested inside, outermost first"""
+
+	source_length:int|None = None
+	"""Duration of the source material used (in edit units), if a motion effect makes it differ from `length`"""
+
+	@property
+	def record_end(self) -> int:
+		"""Offset of the end of the event (exclusive) from the start of the flattened track"""
+		return self.record_offset + self.length
+
+	@property
+	def source_end(self) -> int:
+		"""Offset of the end of the event (exclusive) into the referenced track"""
+		return self.source_offset + (self.length if self.source_length is None else self.source_length)
+
+	@property
+	def mob_id(self) -> avb.mobid.MobID:
+		"""Mob ID of the source mob this event references"""
+		return self.source_clip.mob_id
+
+NestedEventCache = dict[tuple, list[SourceEvent]]
+"""Flattened events for nested timelines, keyed by mob ID and track"""
+
+def _expand_for_flattening(item:timeline.ComponentWalkItem) -> list[tuple[avb.components.Component, int]]|None:
+	"""Expand compound components, following only the active track of Selectors and EssenceGroups"""
+
+	component = item.component
+
+	# Only the selected angle of a group is cut in
+	if isinstance(component, avb.trackgroups.Selector):
+		return [(component.tracks[component.selected].component, item.offset)]
+
+	# EssenceGroups hold alternate representations of the same thing; the first will do
+	elif isinstance(component, avb.trackgroups.EssenceGroup):
+		return [(track.component, item.offset) for track in component.tracks[:1] if "component" in track.property_data]
+
+	return timeline.get_component_children(component, item.offset)
+
+def _is_effect(component:avb.components.Component) -> bool:
+	"""Component is an effect we'd like to know about on a `SourceEvent`"""
+
+	return isinstance(component, (avb.trackgroups.TrackEffect, avb.trackgroups.TimeWarp, avb.trackgroups.TransitionEffect))
+
+def _nested_timeline_track(source_clip:avb.components.SourceClip) -> avb.trackgroups.Track|None:
+	"""If a source clip references another timeline (a nested sequence), return the referenced track"""
+
+	mob = source_clip.mob
+
+	if mob is None or not compositions.composition_is_timeline(mob):
+		return None
+
+	return source_clip.track
+
+def _time_warp_input_length(time_warp:avb.trackgroups.TimeWarp) -> int:
+	"""Length of the material going into a TimeWarp, in the edit units of its input track"""
+
+	input_track = next((track for track in time_warp.tracks if "component" in track.property_data), None)
+	return (input_track.component.length if input_track is not None else 0) or time_warp.length
+
+def _warp_to_record(
+		item:timeline.ComponentWalkItem,
+		warp_offsets:dict[int, int]
+	) -> tuple[int, int, int, int]|None:
+	"""
+	Map a source clip nested in TimeWarps out to `(record_offset, length, source_offset, source_length)`, or `None` if
+	it falls outside them.
+
+	Inside a TimeWarp, offsets run in the edit units of its input, so each one (innermost first) clips the clip to
+	what it uses and stretches it to its own length on the track.
+	"""
+
+	source_clip = item.component
+	record_start, record_end = item.offset, item.offset + source_clip.length
+	source_start, source_end = source_clip.start_time, source_clip.start_time + source_clip.length
+
+	for time_warp in reversed(item.parents):
+
+		if not isinstance(time_warp, avb.trackgroups.TimeWarp):
+			continue
+
+		warp_start   = warp_offsets[id(time_warp)]
+		input_length = _time_warp_input_length(time_warp)
+
+		# Trim the source to the part of the input the effect uses
+		clip_start = max(record_start, warp_start)
+		clip_end   = min(record_end, warp_start + input_length)
+
+		if clip_start >= clip_end:
+			return None
+
+		source_scale = (source_end - source_start) / (record_end - record_start)
+		source_start, source_end = source_start + round((clip_start - record_start) * source_scale), source_end - round((record_end - clip_end) * source_scale)
+
+		# Then out to the effect's own length
+		record_scale = time_warp.length / input_length
+		record_start = warp_start + round((clip_start - warp_start) * record_scale)
+		record_end   = warp_start + round((clip_end - warp_start) * record_scale)
+
+	return record_start, record_end - record_start, source_start, source_end - source_start
+
+def flatten_track_component(component:avb.components.Component, offset:int=0, cache:NestedEventCache|None=None) -> list[SourceEvent]:
+	"""
+	Flatten a track component into a list of `SourceEvent`s, ordered by record offset.
+
+	Nested timelines, transitions and effects are expanded all the way down.  Expanded nested timelines are
+	stored in `cache` by mob ID and track, so a nest used many times is only expanded once.  Pass the same
+	`cache` between calls to share it across tracks or timelines.
+
+	Events under a motion effect (or other TimeWarp) cover the effect's range on the track, with the source
+	material it plays kept in `source_length`.
+	"""
+
+	cache = {} if cache is None else cache
+	events:list[SourceEvent] = []
+
+	# Where each TimeWarp sits, to map what's inside it back out
+	warp_offsets:dict[int, int] = {}
+
+	for item in timeline.walk_components(component, offset, expand=_expand_for_flattening):
+
+		source_clip = item.component
+
+		if isinstance(source_clip, avb.trackgroups.TimeWarp):
+			warp_offsets[id(source_clip)] = item.offset
+			continue
+
+		# Filler and such are not source events
+		if not isinstance(source_clip, avb.components.SourceClip) or not source_clip.length:
+			continue
+
+		effects = tuple(p for p in item.parents if _is_effect(p))
+		nested_track = _nested_timeline_track(source_clip)
+
+		# Where the clip lands on the track, and the stretch of its source it plays there
+		if any(isinstance(effect, avb.trackgroups.TimeWarp) for effect in effects):
+			placement = _warp_to_record(item, warp_offsets)
+			if placement is None or placement[1] <= 0 or placement[3] <= 0:
+				continue
+		else:
+			placement = (item.offset, source_clip.length, source_clip.start_time, source_clip.length)
+
+		record_offset, length, source_offset, source_length = placement
+
+		if nested_track is None:
+			events.append(SourceEvent(
+				source_clip   = source_clip,
+				record_offset = record_offset,
+				length        = length,
+				source_offset = source_offset,
+				effects       = effects,
+				source_length = source_length if source_length != length else None
+			))
+			continue
+
+		# Cut the used portion out of the nested timeline and stretch it into place
+		window_start = source_offset
+		window_end   = source_offset + source_length
+		record_scale = length / source_length
+
+		for nested_event in _flatten_nested_track(source_clip.mob_id, nested_track, cache):
+
+			start = max(nested_event.record_offset, window_start)
+			end   = min(nested_event.record_end, window_end)
+
+			if start >= end:
+				continue
+
+			event_start = record_offset + round((start - window_start) * record_scale)
+			event_end   = record_offset + round((end - window_start) * record_scale)
+
+			if event_start >= event_end:
+				continue
+
+			# Source runs faster or slower than record under a motion effect
+			source_scale = 1 if nested_event.source_length is None else nested_event.source_length / nested_event.length
+			event_source_length = round((end - start) * source_scale)
+
+			events.append(SourceEvent(
+				source_clip   = nested_event.source_clip,
+				record_offset = event_start,
+				length        = event_end - event_start,
+				source_offset = nested_event.source_offset + round((start - nested_event.record_offset) * source_scale),
+				effects       = effects + nested_event.effects,
+				source_length = event_source_length if event_source_length != event_end - event_start else None
+			))
+
+	events.sort(key=lambda e: e.record_offset)
+	return events
+
+def _flatten_nested_track(mob_id:avb.mobid.MobID, track:avb.trackgroups.Track, cache:NestedEventCache) -> list[SourceEvent]:
+	"""Flatten a track of a nested timeline, using the cache if it's been done before"""
+
+	key = (mob_id, track.media_kind, track.index)
+
+	instrumentation.record_cache_lookup("events.nested_timelines", key in cache)
+
+	if key not in cache:
+		cache[key] = flatten_track_component(track.component, cache=cache)
+
+	return cache[key]
+
+def flatten_track(track:avb.trackgroups.Track, cache:NestedEventCache|None=None) -> list[SourceEvent]:
+	"""Flatten a timeline track into a list of `SourceEvent`s"""
+
+	if "component" not in track.property_data:
+		return []
+
+	return flatten_track_component(track.component, cache=cache)
+
+def flatten_timeline(
+		composition:avb.trackgroups.Composition,
+		track_type:timeline.TrackTypes|None=None,
+		cache:NestedEventCache|None=None
+	) -> dict[str, list[SourceEvent]]:
+	"""Flatten each track of a timeline into lists of `SourceEvent`s, keyed by track label (eg `V1`, `A2`)"""
+
+	cache = {} if cache is None else cache
+
+	return {
+		timeline.format_track_label(track): flatten_track(track, cache=cache)
+		for track in timeline.get_tracks_from_composition(composition, type=track_type)
+	}
+
+def iter_flattened_timelines(
+		compositions_to_flatten:collections.abc.Iterable[avb.trackgroups.Composition],
+		track_type:timeline.TrackTypes|None=None
+	) -> collections.abc.Generator[tuple[avb.trackgroups.Composition, dict[str, list[SourceEvent]]], None, None]:
+	"""Flatten several timelines (such as all reels in a bin), sharing the nested timeline cache between them"""
+
+	cache:NestedEventCache = {}
+
+	for composition in compositions_to_flatten:
+		yield composition, flatten_timeline(composition, track_type=track_type, cache=cache)
@@ -0,0 +1,215 @@
+"""Gaps, filler runs, zero-length components and overlaps in timeline tracks, for delivery QC"""
+
+import dataclasses, enum, collections.abc
+import avb, numpy
+from timecode import Timecode
+from . import timeline
+
+class GapType(enum.Enum):
+	"""Kinds of problems found in a track"""
+
+	FILLER      = "Filler"
+	"""A run of filler: black on a picture track, silence on an audio track"""
+
+	SHORT_TRACK = "Short Track"
+	"""The track ends before the timeline does"""
+
+	ZERO_LENGTH = "Zero Length"
+	"""A zero-length component within the track"""
+
+	OVERLAP     = "Overlap"
+	"""A component starting before the previous one ends, beyond what a transition accounts for"""
+
+	def __str__(self) -> str:
+		return self.value
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class TrackGap:
+	"""A gap or other problem in a timeline track"""
+
+	gap_type:GapType
+	"""What kind of problem this is"""
+
+	sequence_name:str
+	"""Name of the timeline"""
+
+	track_label:str
+	"""Track it's on (eg `V1`)"""
+
+	record_start:int
+	"""Offset (in edit units) from the start of the timeline"""
+
+	length:int
+	"""Duration (in edit units)"""
+
+	record_tc:Timecode
+	"""Record timecode of the start"""
+
+	@property
+	def record_end(self) -> int:
+		"""Offset of the end (exclusive) from the start of the timeline"""
+		return self.record_start + self.length
+
+@dataclasses.dataclass
+class TrackLayout:
+	"""Columnar layout of a track's top-level components"""
+
+	start:numpy.ndarray
+	"""Start of each component, as an offset from the start of the track"""
+
+	length:numpy.ndarray
+	"""Length of each component"""
+
+	is_filler:numpy.ndarray
+	"""Whether each component is filler"""
+
+	is_transition:numpy.ndarray
+	"""Whether each component is a transition (which overlaps its neighbours)"""
+
+	def __len__(self) -> int:
+		return len(self.start)
+
+	@property
+	def end(self) -> numpy.ndarray:
+		"""End (exclusive) of each component"""
+		return self.start + self.length
+
+	@property
+	def track_length(self) -> int:
+		"""Length of the track"""
+
+		if not len(self):
+			return 0
+
+		advance = numpy.where(self.is_transition, -self.length, self.length)
+		return int(advance.sum())
+
+	@classmethod
+	def from_track(cls, track:avb.trackgroups.Track) -> "TrackLayout":
+		"""Lay out the components of a track"""
+
+		component = track.component if "component" in track.property_data else None
+		components = list(component.components) if isinstance(component, avb.components.Sequence) else [component] if component is not None else []
+
+		length        = numpy.fromiter((c.length for c in components), dtype=numpy.int64, count=len(components))
+		is_filler     = numpy.fromiter((isinstance(c, avb.components.Filler) for c in components), dtype=bool, count=len(components))
+		is_transition = numpy.fromiter((isinstance(c, avb.trackgroups.TransitionEffect) for c in components), dtype=bool, count=len(components))
+
+		# Same as `Sequence.positions()`: transitions back up over the previous component, and the next one starts there
+		advance = numpy.where(is_transition, -length, length)
+		running = numpy.cumsum(advance)
+		start   = numpy.where(is_transition, running, running - advance)
+
+		return cls(start=start, length=length, is_filler=is_filler, is_transition=is_transition)
+
+def find_filler_runs(layout:TrackLayout) -> tuple[numpy.ndarray, numpy.ndarray]:
+	"""`(start, length)` of each run of consecutive filler with any duration"""
+
+	if not len(layout):
+		return numpy.empty(0, dtype=numpy.int64), numpy.empty(0, dtype=numpy.int64)
+
+	is_filler = numpy.concatenate(([False], layout.is_filler, [False]))
+	edges = numpy.diff(is_filler.astype(numpy.int8))
+
+	firsts = numpy.flatnonzero(edges == 1)
+	lasts  = numpy.flatnonzero(edges == -1) - 1
+
+	start  = layout.start[firsts]
+	length = layout.end[lasts] - start
+
+	has_length = length > 0
+	return start[has_length], length[has_length]
+
+def find_zero_length_components(layout:TrackLayout) -> numpy.ndarray:
+	"""Offsets of zero-length components, other than the filler every sequence begins and ends with"""
+
+	is_zero = layout.length == 0
+
+	if len(layout):
+		is_zero[[0, -1]] &= ~layout.is_filler[[0, -1]]
+
+	return layout.start[is_zero]
+
+def find_overlaps(layout:TrackLayout) -> tuple[numpy.ndarray, numpy.ndarray]:
+	"""`(start, length)` of each overlap between components that a transition doesn't account for"""
+
+	is_clip = ~layout.is_transition & (layout.length > 0)
+	clip_indexes = numpy.flatnonzero(is_clip)
+
+	if len(clip_indexes) < 2:
+		return numpy.empty(0, dtype=numpy.int64), numpy.empty(0, dtype=numpy.int64)
+
+	start = layout.start[clip_indexes]
+	previous_end = numpy.maximum.accumulate(layout.end[clip_indexes])[:-1]
+
+	# A transition right before a component lets it start that much early
+	allowance = numpy.where(layout.is_transition[clip_indexes[1:] - 1], layout.length[clip_indexes[1:] - 1], 0)
+
+	# ...but a transition longer than the component before it runs back over whatever came before that
+	overlap = numpy.maximum(previous_end - allowance - start[1:], start[:-1] - start[1:])
+	has_overlap = overlap > 0
+
+	return start[1:][has_overlap], overlap[has_overlap]
+
+def find_gaps_in_track(
+		track:avb.trackgroups.Track,
+		timeline_length:int,
+		sequence_name:str="",
+		record_start_tc:Timecode|None=None
+	) -> list[TrackGap]:
+	"""Find filler runs, zero-length components, overlaps and a short ending in a track"""
+
+	record_start_tc = record_start_tc or Timecode(0)
+	track_label = timeline.format_track_label(track)
+	layout = TrackLayout.from_track(track)
+
+	found:list[tuple[GapType, int, int]] = []
+
+	filler_start, filler_length = find_filler_runs(layout)
+	found.extend((GapType.FILLER, start, length) for start, length in zip(filler_start.tolist(), filler_length.tolist()))
+
+	found.extend((GapType.ZERO_LENGTH, start, 0) for start in find_zero_length_components(layout).tolist())
+
+	overlap_start, overlap_length = find_overlaps(layout)
+	found.extend((GapType.OVERLAP, start, length) for start, length in zip(overlap_start.tolist(), overlap_length.tolist()))
+
+	track_length = layout.track_length
+	if track_length < timeline_length:
+		found.append((GapType.SHORT_TRACK, track_length, timeline_length - track_length))
+
+	return [
+		TrackGap(
+			gap_type      = gap_type,
+			sequence_name = sequence_name,
+			track_label   = track_label,
+			record_start  = start,
+			length        = length,
+			record_tc     = record_start_tc + start,
+		)
+		for gap_type, start, length in sorted(found, key=lambda f: f[1])
+	]
+
+def find_gaps(
+		composition:avb.trackgroups.Composition,
+		track_types:collections.abc.Iterable[timeline.TrackTypes]=(timeline.TrackTypes.PICTURE, timeline.TrackTypes.SOUND)
+	) -> list[TrackGap]:
+	"""Find gaps and other problems in every picture and audio track of a timeline, in record order"""
+
+	record_start_tc = timeline.get_start_timecode_for_composition(composition)
+	media_kinds = {track_type.value for track_type in track_types}
+
+	gaps = []
+	for track in composition.tracks:
+		if track.media_kind in media_kinds:
+			gaps.extend(find_gaps_in_track(track, composition.length, composition.name, record_start_tc))
+
+	return sorted(gaps, key=lambda gap: (gap.record_start, gap.track_label))
+
+def find_gaps_in_timelines(
+		compositions:collections.abc.Iterable[avb.trackgroups.Composition],
+		track_types:collections.abc.Iterable[timeline.TrackTypes]=(timeline.TrackTypes.PICTURE, timeline.TrackTypes.SOUND)
+	) -> dict[str, list[TrackGap]]:
+	"""Find gaps in several timelines (such as all reels of a feature), keyed by timeline name"""
+
+	track_types = tuple(track_types)
+	return {composition.name: find_gaps(composition, track_types) for composition in compositions}
@@ -0,0 +1,284 @@
+"""
+Opt-in instrumentation for finding out where the time goes.
+
+Enable for a block of code with the `instrumented()` context manager, or for a whole program by setting the
+`AVBUTILS_INSTRUMENT` environment variable (`1` for call counts and timings, `profile` to also run `cProfile`),
+in which case a summary is printed to stderr at exit.  When disabled, nothing is wrapped and there is no overhead.
+"""
+
+import sys, os, time, dataclasses, functools, inspect, threading, contextlib, cProfile, pstats, io, atexit, types, typing
+import avb
+
+INSTRUMENTED_MODULES = ("sourcerefs", "matchback", "markers", "timeline", "bins", "lockfile", "events", "pulls", "usage", "markerindex", "changelist", "binpool", "timecodes", "edgecode", "continuity", "mobstack", "sourcemap", "gaps", "sync", "effects", "multicam", "namesearch")
+"""avbutils modules whose public functions and methods get instrumented"""
+
+ENVIRONMENT_VARIABLE = "AVBUTILS_INSTRUMENT"
+"""Set to `1` to instrument on import, or `profile` to also profile with `cProfile`"""
+
+@dataclasses.dataclass
+class FunctionStats:
+	"""Timing for an instrumented function"""
+
+	calls:int = 0
+	"""Number of times the function was called"""
+
+	total_time:float = 0.0
+	"""Cumulative time spent in the function, including anything it calls (in seconds)"""
+
+	@property
+	def time_per_call(self) -> float:
+		"""Average time per call (in seconds)"""
+		return self.total_time / self.calls if self.calls else 0.0
+
+@dataclasses.dataclass
+class CacheStats:
+	"""Hits and misses for a cache"""
+
+	hits:int = 0
+	misses:int = 0
+
+	@property
+	def hit_rate(self) -> float:
+		"""Fraction of lookups that were hits"""
+		lookups = self.hits + self.misses
+		return self.hits / lookups if lookups else 0.0
+
+_enabled:bool = False
+_lock = threading.Lock()
+_function_stats:dict[str, FunctionStats] = {}
+_cache_stats:dict[str, CacheStats] = {}
+_patches:list[tuple[typing.Any, str, typing.Any]] = []
+_profiler:cProfile.Profile|None = None
+
+def is_enabled() -> bool:
+	"""Instrumentation is currently enabled"""
+	return _enabled
+
+def record_cache_lookup(cache_name:str, hit:bool):
+	"""Record a cache hit or miss.  Caches in avbutils call this; it does nothing unless instrumentation is enabled."""
+
+	if not _enabled:
+		return
+
+	with _lock:
+		stats = _cache_stats.setdefault(cache_name, CacheStats())
+		if hit:
+			stats.hits += 1
+		else:
+			stats.misses += 1
+
+def _wrap(func:types.FunctionType, stats_name:str) -> types.FunctionType:
+	"""Wrap a function to record its call count and time"""
+
+	def _record(elapsed:float, new_call:bool):
+		with _lock:
+			stats = _function_stats.setdefault(stats_name, FunctionStats())
+			stats.calls += new_call
+			stats.total_time += elapsed
+
+	# Generators do their work as they're iterated, so time each step rather than the call
+	if inspect.isgeneratorfunction(func):
+
+		@functools.wraps(func)
+		def generator_wrapper(*args, **kwargs):
+			_record(0.0, True)
+			generator = func(*args, **kwargs)
+			try:
+				while True:
+					started = time.perf_counter()
+					try:
+						value = next(generator)
+					except StopIteration as e:
+						return e.value
+					finally:
+						_record(time.perf_counter() - started, False)
+					yield value
+			finally:
+				generator.close()
+
+		return generator_wrapper
+
+	@functools.wraps(func)
+	def wrapper(*args, **kwargs):
+		started = time.perf_counter()
+		try:
+			return func(*args, **kwargs)
+		finally:
+			_record(time.perf_counter() - started, True)
+
+	return wrapper
+
+def _instrumentation_targets() -> list[tuple[typing.Any, str, typing.Any, typing.Any]]:
+	"""Find `(owner, attribute name, original, wrapped)` for everything to instrument"""
+
+	import importlib
+
+	targets = []
+
+	# Bin decoding happens in pyavb
+	targets.append((avb, "open", avb.open, _wrap(avb.open, "avb.open")))
+
+	for module_name in INSTRUMENTED_MODULES:
+
+		module = importlib.import_module(f"{__package__}.{module_name}")
+
+		for name, attr in vars(module).items():
+
+			if name.startswith("_") or getattr(attr, "__module__", None) != module.__name__:
+				continue
+
+			if isinstance(attr, types.FunctionType):
+				targets.append((module, name, attr, _wrap(attr, f"{module_name}.{name}")))
+
+			elif isinstance(attr, type):
+
+				for method_name, method in vars(attr).items():
+
+					if method_name.startswith("_"):
+						continue
+
+					stats_name = f"{module_name}.{attr.__name__}.{method_name}"
+
+					if isinstance(method, classmethod):
+						targets.append((attr, method_name, method, classmethod(_wrap(method.__func__, stats_name))))
+					elif isinstance(method, staticmethod):
+						targets.append((attr, method_name, method, staticmethod(_wrap(method.__func__, stats_name))))
+					elif isinstance(method, types.FunctionType):
+						targets.append((attr, method_name, method, _wrap(method, stats_name)))
+
+	return targets
+
+def enable(profile:bool=False):
+	"""Start instrumenting avbutils functions, and optionally profiling with `cProfile`"""
+
+	global _enabled, _profiler
+
+	if not _enabled:
+
+		targets = _instrumentation_targets()
+		wrapped_functions = {id(original): wrapped for owner, _, original, wrapped in targets if isinstance(original, types.FunctionType)}
+
+		for owner, name, original, wrapped in targets:
+			_patches.append((owner, name, original))
+			setattr(owner, name, wrapped)
+
+		# Also catch functions imported by name elsewhere (`from .timeline import ...`, the `avbutils` namespace, etc)
+		for module_name, module in list(sys.modules.items()):
+			if module is None or not (module_name == __package__ or module_name.startswith(f"{__package__}.")):
+				continue
+			for name, attr in list(vars(module).items()):
+				if id(attr) in wrapped_functions and getattr(module, name) is not wrapped_functions[id(attr)]:
+					_patches.append((module, name, attr))
+					setattr(module, name, wrapped_functions[id(attr)])
+
+		_enabled = True
+
+	# Picks up where it left off after `disable()`, until `reset()`
+	if profile:
+		if _profiler is None:
+			_profiler = cProfile.Profile()
+		_profiler.enable()
+
+def disable():
+	"""Stop instrumenting, restoring the original functions.  Collected stats are kept until `reset()`."""
+
+	global _enabled
+
+	if _profiler is not None:
+		_profiler.disable()
+
+	while _patches:
+		owner, name, original = _patches.pop()
+		setattr(owner, name, original)
+
+	_enabled = False
+
+def reset():
+	"""Clear all collected stats"""
+
+	global _profiler
+
+	with _lock:
+		_function_stats.clear()
+		_cache_stats.clear()
+
+	if _profiler is not None:
+		_profiler.disable()
+		_profiler = cProfile.Profile() if _enabled else None
+		if _profiler is not None:
+			_profiler.enable()
+
+def get_function_stats() -> dict[str, FunctionStats]:
+	"""Collected stats per function, slowest first"""
+
+	with _lock:
+		return dict(sorted(((name, dataclasses.replace(stats)) for name, stats in _function_stats.items()), key=lambda s: s[1].total_time, reverse=True))
+
+def get_cache_stats() -> dict[str, CacheStats]:
+	"""Collected stats per cache"""
+
+	with _lock:
+		return {name: dataclasses.replace(stats) for name, stats in _cache_stats.items()}
+
+def get_profile_stats() -> pstats.Stats|None:
+	"""The `cProfile` results as `pstats.Stats`, if profiling was enabled"""
+
+	if _profiler is None:
+		return None
+
+	return pstats.Stats(_profiler, stream=io.StringIO())
+
+def format_summary(limit:int|None=25) -> str:
+	"""Format the collected stats as a human-readable table"""
+
+	lines = [f"{'Function'.ljust(56)} {'Calls'.rjust(10)} {'Total (s)'.rjust(12)} {'Per Call (ms)'.rjust(14)}"]
+
+	for name, stats in list(get_function_stats().items())[:limit]:
+		lines.append(f"{name.ljust(56)} {str(stats.calls).rjust(10)} {stats.total_time:12.4f} {stats.time_per_call*1000:14.4f}")
+
+	cache_stats = get_cache_stats()
+	if cache_stats:
+		lines.append("")
+		lines.append(f"{'Cache'.ljust(56)} {'Hits'.rjust(10)} {'Misses'.rjust(12)} {'Hit Rate'.rjust(14)}")
+		for name, stats in cache_stats.items():
+			lines.append(f"{name.ljust(56)} {str(stats.hits).rjust(10)} {str(stats.misses).rjust(12)} {stats.hit_rate:14.1%}")
+
+	return "\n".join(lines)
+
+def print_summary(file:typing.TextIO|None=None, limit:int|None=25):
+	"""Print the collected stats, and the top of the `cProfile` results if profiling"""
+
+	file = file or sys.stderr
+
+	print(format_summary(limit=limit), file=file)
+
+	profile_stats = get_profile_stats()
+	if profile_stats is not None:
+		profile_stats.stream = file
+		profile_stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(limit)
+
+@contextlib.contextmanager
+def instrumented(profile:bool=False):
+	"""Instrument avbutils for the duration of the block, starting from fresh stats"""
+
+	was_enabled = _enabled
+
+	reset()
+	enable(profile=profile)
+
+	try:
+		yield
+	finally:
+		if not was_enabled:
+			disable()
+
+def enable_from_environment():
+	"""Enable instrumentation if requested by the `AVBUTILS_INSTRUMENT` environment variable, printing a summary at exit"""
+
+	setting = os.environ.get(ENVIRONMENT_VARIABLE, "").strip().lower()
+
+	if setting in ("", "0", "false", "no"):
+		return
+
+	enable(profile=(setting == "profile"))
+	atexit.register(print_summary)
@@ -2,7 +2,7 @@
 
 import pathlib, dataclasses
 
-@dataclasses.dataclass()
+@dataclasses.dataclass(slots=True)
 class LockInfo:
 	"""Represents a bin lock file (.lck)"""
 
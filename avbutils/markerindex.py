@@ -0,0 +1,159 @@
+"""Full-text search index of marker comments across a project's timelines"""
+
+import dataclasses, pathlib, datetime, collections.abc
+import avb
+from . import catalog, markers, timeline
+
+MARKER_INDEX_NAME = "markers"
+"""Name of the marker index in the `ProjectCatalog`"""
+
+MARKER_SCHEMA = """
+	CREATE TABLE IF NOT EXISTS marker_index (
+		bin_path        TEXT    NOT NULL,
+		timeline_name   TEXT,
+		timeline_mob_id TEXT    NOT NULL,
+		track_label     TEXT    NOT NULL,
+		frm_offset      INTEGER NOT NULL,
+		user            TEXT,
+		comment         TEXT,
+		color           TEXT,
+		date_created    REAL,
+		date_modified   REAL
+	);
+	CREATE INDEX IF NOT EXISTS marker_index_by_bin ON marker_index (bin_path);
+
+	CREATE VIRTUAL TABLE IF NOT EXISTS marker_search USING fts5 (
+		comment, user, timeline_name, track_label,
+		content='marker_index', content_rowid='rowid', tokenize='unicode61 remove_diacritics 2'
+	);
+
+	-- Keep the search table in sync with the marker rows
+	CREATE TRIGGER IF NOT EXISTS marker_index_insert AFTER INSERT ON marker_index BEGIN
+		INSERT INTO marker_search (rowid, comment, user, timeline_name, track_label)
+		VALUES (new.rowid, new.comment, new.user, new.timeline_name, new.track_label);
+	END;
+	CREATE TRIGGER IF NOT EXISTS marker_index_delete AFTER DELETE ON marker_index BEGIN
+		INSERT INTO marker_search (marker_search, rowid, comment, user, timeline_name, track_label)
+		VALUES ('delete', old.rowid, old.comment, old.user, old.timeline_name, old.track_label);
+	END;
+"""
+"""SQLite schema for the marker index"""
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class IndexedMarker:
+	"""A marker on a timeline somewhere in a project"""
+
+	timeline_name:str
+	"""Name of the timeline the marker is on"""
+
+	timeline_mob_id:str
+	"""Mob ID of the timeline the marker is on"""
+
+	track_label:str
+	"""Track label the marker belongs to"""
+
+	frm_offset:int
+	"""Marker offset from the start of the timeline (in frames)"""
+
+	user:str
+	"""Marker creator"""
+
+	comment:str
+	"""Marker comment"""
+
+	color:str
+	"""Marker color name (eg `Red`)"""
+
+	date_created:datetime.datetime
+	"""Date the marker was first created"""
+
+	date_modified:datetime.datetime
+	"""Date the marker was last modified"""
+
+	bin_path:str|None = None
+	"""The bin containing the timeline"""
+
+	@classmethod
+	def from_marker_info(cls, composition:avb.trackgroups.Composition, marker_info:markers.MarkerInfo) -> "IndexedMarker":
+		return cls(
+			timeline_name   = composition.name,
+			timeline_mob_id = str(composition.mob_id),
+			track_label     = marker_info.track_label,
+			frm_offset      = marker_info.frm_offset,
+			user            = marker_info.user,
+			comment         = marker_info.comment,
+			color           = marker_info.color.value,
+			date_created    = marker_info.date_created,
+			date_modified   = marker_info.date_modified,
+		)
+
+def get_indexed_markers_from_bin(bin_path:str|pathlib.Path) -> list[IndexedMarker]:
+	"""Get the markers from all timelines in a bin"""
+
+	with avb.open(bin_path) as bin_handle:
+		return [
+			IndexedMarker.from_marker_info(composition, marker_info)
+			for composition in timeline.get_timelines_from_bin(bin_handle.content)
+			for marker_info in markers.get_markers_from_timeline(composition)
+		]
+
+def store_markers(project_catalog:catalog.ProjectCatalog, bin_key:str, indexed_markers:list[IndexedMarker]):
+	"""Write a bin's marker rows to the catalog"""
+
+	project_catalog.connection.executemany(
+		"INSERT INTO marker_index (bin_path, timeline_name, timeline_mob_id, track_label, frm_offset, user, comment, color, date_created, date_modified) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+		((bin_key, m.timeline_name, m.timeline_mob_id, m.track_label, m.frm_offset, m.user, m.comment, m.color, m.date_created.timestamp(), m.date_modified.timestamp()) for m in indexed_markers)
+	)
+
+def update_marker_index(project_catalog:catalog.ProjectCatalog, bin_paths:collections.abc.Iterable[str|pathlib.Path], max_workers:int|None=None) -> catalog.CatalogUpdate:
+	"""Index markers for the given bins (typically all bins in a project), re-parsing only bins that have changed"""
+
+	project_catalog.ensure_schema(MARKER_SCHEMA)
+
+	return project_catalog.update_index(
+		index_name  = MARKER_INDEX_NAME,
+		bin_paths   = bin_paths,
+		extract     = get_indexed_markers_from_bin,
+		store       = store_markers,
+		tables      = ["marker_index"],
+		max_workers = max_workers
+	)
+
+def quote_fts_query(query:str) -> str:
+	"""Quote each word of a query as an FTS5 string, so text like `32A-4` or a stray `"` is searched for as-is"""
+	return " ".join('"' + term.replace('"', '""') + '"' for term in query.split())
+
+def search_markers(project_catalog:catalog.ProjectCatalog, query:str, limit:int|None=None, raw:bool=False) -> list[IndexedMarker]:
+	"""
+	Search marker comments, users, timeline names and track labels, best matches first.
+
+	Words in `query` are ANDed together and matched as typed.  With `raw`, `query` uses SQLite FTS5 syntax instead:
+	`"music cue"` matches a phrase, `VFX*` matches a prefix, and `comment:ADR` limits a term to one column.
+	"""
+
+	project_catalog.ensure_schema(MARKER_SCHEMA)
+
+	if not raw:
+		query = quote_fts_query(query)
+
+	if not query.strip():
+		return []
+
+	return [
+		IndexedMarker(
+			timeline_name, timeline_mob_id, track_label, frm_offset, user, comment, color,
+			datetime.datetime.fromtimestamp(date_created), datetime.datetime.fromtimestamp(date_modified),
+			bin_path
+		)
+		for timeline_name, timeline_mob_id, track_label, frm_offset, user, comment, color, date_created, date_modified, bin_path
+		in project_catalog.connection.execute(
+			"""
+			SELECT m.timeline_name, m.timeline_mob_id, m.track_label, m.frm_offset, m.user, m.comment, m.color, m.date_created, m.date_modified, m.bin_path
+			FROM marker_search JOIN marker_index AS m ON m.rowid = marker_search.rowid
+			WHERE marker_search MATCH ?
+			ORDER BY marker_search.rank
+			LIMIT ?
+			""",
+			(query, -1 if limit is None else limit)
+		)
+	]
@@ -34,7 +34,7 @@ MarkerColors = enum.Enum("MarkerColors", _marker_colors)
 MarkerColorsExtended = enum.Enum("ExtendedMarkerColors", _marker_colors_extended)
 """Additional marker colors available with Avid 2024.6"""
 
-@dataclasses.dataclass()
+@dataclasses.dataclass(slots=True)
 class MarkerInfo:
 	"""Avid marker info"""
 
@@ -68,11 +68,20 @@ class MarkerInfo:
 			track_label = track_label,
 			user = marker.attributes.get("_ATN_CRM_USER",""),
 			comment = marker.attributes.get("_ATN_CRM_COM",""),
-			color = MarkerColors(marker.attributes.get("_ATN_CRM_COLOR","Red")),
+			color = cls.get_color_from_attributes(marker.attributes),
 			date_created = cls.get_creation_datetime_from_attributes(marker.attributes),
 			date_modified = datetime.fromtimestamp(marker.attributes.get("_ATN_CRM_LONG_MOD_DATE",0))
 		)
 	
+	@staticmethod
+	def get_color_from_attributes(marker_attributes:avb.attributes.Attributes) -> MarkerColors|MarkerColorsExtended:
+		"""Get the marker color, which may be one of the extended colors"""
+
+		color = marker_attributes.get("_ATN_CRM_COLOR","Red")
+		if color in MarkerColors._value2member_map_:
+			return MarkerColors(color)
+		return MarkerColorsExtended(color)
+	
 	@staticmethod
 	def get_creation_datetime_from_attributes(marker_attributes:avb.attributes.Attributes) -> datetime:
 		"""Get the marker creation datetime from whatever's there"""
@@ -118,42 +127,38 @@ def get_markers_from_track(track:avb.trackgroups.Track, start:int=0):
 
 def get_components_from_track_component(track_component:avb.components.Component) -> list[avb.components.Component]:
 
-	# Most of the "main" tracks (V1, A1, etc) reference a Sequence component
-	if isinstance(track_component, avb.components.Sequence):
-		return track_component.components
-
+	# Most of the "main" tracks (V1, A1, etc) reference a Sequence component, whose components we want
 	# Audio tracks with RTAS effects are TrackGroups though
 	# The sub-tracks in this trackgroup consist of the usual Sequence as well as TrackEffects
 	# RTAS is the only time I've encountered this but I'll bet ya there are others
-	elif isinstance(track_component, avb.trackgroups.TrackGroup):
-		components = []
-		for sub_track in track_component.tracks:
-			if "component" not in sub_track.property_data:
-				continue
-			components.extend(get_components_from_track_component(sub_track.component))
-		return components
-
-	# Typically Timecode, Edgecode... I would imagine DescriptiveMetadata
-	else:
-		return [track_component]
+	# Anything else is typically Timecode, Edgecode... I would imagine DescriptiveMetadata
+
+	def _expand(item:avbutils.ComponentWalkItem):
+		"""Dig through TrackGroups, but stop at the components of the first Sequence"""
+		if item.parents and isinstance(item.parents[-1], avb.components.Sequence):
+			return None
+		return avbutils.get_component_children(item.component, item.offset)
+
+	return [
+		item.component for item in avbutils.walk_components(track_component, expand=_expand)
+		if (item.parents and isinstance(item.parents[-1], avb.components.Sequence))
+		or not isinstance(item.component, (avb.components.Sequence, avb.trackgroups.TrackGroup))
+	]
 
 def get_component_markers(c):
-	if 'attributes' not in c.property_data:
-		return []
-
-	attributes = c.attributes or {}
-	markers = attributes.get('_TMP_CRM',  [])
-	if isinstance(c, avb.components.Sequence):
-		for item in c.components:
-			more_markers = get_component_markers(item)
-			markers.extend(more_markers)
-
-	elif isinstance(c, avb.trackgroups.TrackGroup):
-		for track in c.tracks:
-			if 'component' not in track.property_data:
-				continue
-
-			more_markers = get_component_markers(track.component)
-			markers.extend(more_markers)
+
+	def _expand(item:avbutils.ComponentWalkItem):
+		"""Only dig into Sequences and TrackGroups that have attributes"""
+		if 'attributes' not in item.component.property_data or not isinstance(item.component, (avb.components.Sequence, avb.trackgroups.TrackGroup)):
+			return None
+		return avbutils.get_component_children(item.component, item.offset)
+
+	markers = []
+	for item in avbutils.walk_components(c, expand=_expand):
+		if 'attributes' not in item.component.property_data:
+			continue
+
+		attributes = item.component.attributes or {}
+		markers.extend(attributes.get('_TMP_CRM', []))
 
 	return markers
\ No newline at end of file
@@ -2,9 +2,9 @@
 NOTE: See also `sourcerefs` for a non-OO approach
 """
 
-import enum
+import enum, dataclasses
 import avb
-from . import compositions, timeline
+from . import compositions, timeline, instrumentation
 
 class StopMatchback(StopIteration):
 	"""Track cannot be resolved further"""
@@ -45,6 +45,43 @@ class SourceMobRole(enum.Enum):
 		return self.name.replace("_"," ").title()
 	
 
+MobStackHop = tuple[avb.trackgroups.Composition, avb.trackgroups.Track, int]
+"""The mob a track resolves to, its matching track, and the start time into it"""
+
+@dataclasses.dataclass(eq=False)
+class _TrackHops:
+	"""A mob's track unwrapped down to the component referencing the next mob, and the hops resolved from it so far"""
+
+	track:avb.trackgroups.Track
+	"""The track holding `component` (may be nested in an effect)"""
+
+	component:avb.components.Component
+	"""The unwrapped component"""
+
+	only_index:int|None
+	"""For a sequence with a single clip in it, its index (the hop is the same for every offset)"""
+
+	hops:dict[int|None, MobStackHop|type[StopMatchback]|type[FillerDuringMatchback]] = dataclasses.field(default_factory=dict)
+	"""Resolved hop (or the exception it raised) per sequence component index"""
+
+	def component_index_at(self, offset:int) -> int|None:
+		"""Index of the sequence component at an offset, or `None` if the component isn't a sequence"""
+
+		if not isinstance(self.component, avb.components.Sequence):
+			return None
+
+		if self.only_index is not None:
+			return self.only_index
+
+		index, _ = self.component.nearest_index_at_time(offset)
+		return index
+
+	def component_at_index(self, index:int|None) -> avb.components.Component:
+		return self.component if index is None else self.component.components[index]
+
+MobStackCache = dict[tuple[avb.mobid.MobID, str, int], _TrackHops]
+"""Unwrapped tracks and their resolved hops, keyed by `(mob ID, media kind, track index)`"""
+
 class MobStack:
 	"""Stack of resolved mobs"""
 
@@ -53,7 +90,15 @@ class MobStack:
 		self._stack = mob_stack
 	
 	@classmethod
-	def from_composition(cls, composition:avb.trackgroups.Composition, track:avb.trackgroups.Track, frame_offset:int):
+	def from_composition(cls, composition:avb.trackgroups.Composition, track:avb.trackgroups.Track, frame_offset:int, cache:MobStackCache|None=None):
+		"""
+		Resolve the stack of mobs under a composition's track.
+
+		Pass the same `cache` when building stacks for many clips: clips share most of their chain (the same tape or
+		source file), so each hop is only unwrapped and resolved once.
+		"""
+
+		cache = {} if cache is None else cache
 
 		comps = []
 
@@ -62,7 +107,7 @@ class MobStack:
 		while True:
 			comps.append(composition)
 			try:
-				composition, track, last_component_offset = cls._get_mob_from_track_at_offset(track, frame_offset + last_component_offset+1) # NOTE: WHY THE +1 NEEDED ARGH
+				composition, track, last_component_offset = cls._get_mob_from_track_at_offset(track, frame_offset + last_component_offset+1, composition.mob_id, cache) # NOTE: WHY THE +1 NEEDED ARGH
 			except StopMatchback:
 				break
 			except FillerDuringMatchback:
@@ -70,9 +115,55 @@ class MobStack:
 		
 		return cls(comps)
 	
-
 	@classmethod
-	def _get_mob_from_track_at_offset(cls, track:avb.trackgroups.Track, offset:int) -> tuple[avb.trackgroups.Composition, avb.trackgroups.Track, int]:
+	def _get_mob_from_track_at_offset(cls, track:avb.trackgroups.Track, offset:int, mob_id:avb.mobid.MobID|None=None, cache:MobStackCache|None=None) -> MobStackHop:
+
+		if mob_id is None or cache is None:
+			track, component = cls._unwrap_track(track)
+			if isinstance(component, avb.components.Sequence):
+				component, component_offset = component.nearest_component_at_time(offset)
+				# NOTE: What to do about component_offset? ...add to offset or something?
+			return cls._resolve_component(track, component)
+
+		track_key = (mob_id, track.media_kind, track.index)
+
+		instrumentation.record_cache_lookup("mobstack.tracks", track_key in cache)
+
+		if track_key not in cache:
+			unwrapped_track, component = cls._unwrap_track(track)
+			cache[track_key] = _TrackHops(track=unwrapped_track, component=component, only_index=cls._only_component_index(component))
+
+		track_hops = cache[track_key]
+		index = track_hops.component_index_at(offset)
+
+		instrumentation.record_cache_lookup("mobstack.hops", index in track_hops.hops)
+
+		if index not in track_hops.hops:
+			try:
+				track_hops.hops[index] = cls._resolve_component(track_hops.track, track_hops.component_at_index(index))
+			except (StopMatchback, FillerDuringMatchback) as e:
+				track_hops.hops[index] = type(e)
+
+		hop = track_hops.hops[index]
+
+		if isinstance(hop, type):
+			raise hop
+
+		return hop
+
+	@staticmethod
+	def _only_component_index(component:avb.components.Component) -> int|None:
+		"""If a sequence holds just one non-zero-length component (typical of master clips and sources), its index"""
+
+		if not isinstance(component, avb.components.Sequence):
+			return None
+
+		indexes = [index for index, sequence_component in enumerate(component.components) if sequence_component.length]
+		return indexes[0] if len(indexes) == 1 and component.components[indexes[0]].class_id != b"TNFX" else None
+
+	@staticmethod
+	def _unwrap_track(track:avb.trackgroups.Track) -> tuple[avb.trackgroups.Track, avb.components.Component]:
+		"""Unwrap group clips and effects on a track down to the component that references the next mob"""
 
 		# Track contains a component that points to another mob
 		# For a master/source mob, typically resolves to a Sequence -> SourceClip
@@ -91,23 +182,22 @@ class MobStack:
 			track = next(filter(lambda t: t.media_kind == track.media_kind, component.tracks))
 			
 			component = track.component
-		
-		if isinstance(component, avb.components.Sequence):
-			component, component_offset = component.nearest_component_at_time(offset)
-			# NOTE: What to do about component_offset? ...add to offset or something?
+
+		return track, component
+
+	@staticmethod
+	def _resolve_component(track:avb.trackgroups.Track, component:avb.components.Component) -> MobStackHop:
+		"""Resolve the mob and track a component references"""
 
 		if isinstance(component, avb.components.Filler):
 			raise FillerDuringMatchback
 
 		if isinstance(component, avb.components.SourceClip) and component.track_id == 0:
-			print("******* OOOH LOOOOK     ", component.mob_id.material.fields, component.mob_id.to_dict())
 			raise StopMatchback
 		
 		if isinstance(component, avb.components.Timecode):
 			raise StopMatchback
 		
-		print("**** NOPE  ", component.mob_id.material, component.mob_id.to_dict())
-
 		resolved_mob = track.root.content.find_by_mob_id(component.mob_id)
 		resolved_track = next(t for t in resolved_mob.tracks if t.media_kind == track.media_kind and t.index == component.track_id)
 
@@ -0,0 +1,289 @@
+"""Multicam angle usage: which angles of which group clips are cut into each reel, and for how long"""
+
+import dataclasses, collections.abc
+import avb, numpy
+from . import compositions, events, timeline, instrumentation
+
+@dataclasses.dataclass
+class GroupClipLayout:
+	"""The selectors on a group clip track: where each one is, which angle it has selected, and its angles"""
+
+	start:numpy.ndarray
+	"""Start of each selector, as an offset into the group clip"""
+
+	end:numpy.ndarray
+	"""End (exclusive) of each selector"""
+
+	selected:numpy.ndarray
+	"""Selected angle of each selector"""
+
+	angle_names:list[list[str]]
+	"""Name of each angle (the clip it shows) per selector"""
+
+	def __len__(self) -> int:
+		return len(self.start)
+
+	def shifted(self, offset:int) -> "GroupClipLayout":
+		"""The same layout, moved later by `offset`"""
+		return GroupClipLayout(start=self.start + offset, end=self.end + offset, selected=self.selected, angle_names=self.angle_names)
+
+GroupClipCache = dict[tuple[avb.mobid.MobID, str, int], GroupClipLayout|None]
+"""Group clip track layouts, keyed by `(mob ID, media kind, track index)`; `None` for tracks that aren't group clips"""
+
+def _is_group_mob(composition:avb.trackgroups.Composition|None) -> bool:
+	return composition is not None and (compositions.composition_is_groupclip(composition) or compositions.composition_is_groupoofter(composition))
+
+def _angle_name(angle_track:avb.trackgroups.Track) -> str:
+	"""Name of the clip an angle shows, following the group's own mobs (such as the oofter) through to it"""
+
+	visited = set()
+
+	while angle_track is not None and "component" in angle_track.property_data:
+
+		source_clip = next((
+			item.component for item in timeline.walk_components(angle_track.component)
+			if isinstance(item.component, avb.components.SourceClip) and item.component.length
+		), None)
+
+		if source_clip is None or source_clip.mob is None:
+			return ""
+
+		if not _is_group_mob(source_clip.mob):
+			return source_clip.mob.name or ""
+
+		if source_clip.mob_id in visited:
+			return ""
+
+		visited.add(source_clip.mob_id)
+		angle_track = source_clip.track
+
+	return ""
+
+def get_group_clip_layout(mob_id:avb.mobid.MobID, track:avb.trackgroups.Track, cache:GroupClipCache|None=None) -> GroupClipLayout|None:
+	"""
+	Lay out the selectors of a group clip's track, or `None` if there aren't any.
+
+	Group clips referenced through another group mob (such as the "oofter" accompanying a group clip) are followed.
+	"""
+
+	cache = {} if cache is None else cache
+	key = (mob_id, track.media_kind, track.index)
+
+	instrumentation.record_cache_lookup("multicam.group_clips", key in cache)
+
+	if key in cache:
+		return cache[key]
+
+	# Guard against a group referencing itself while it's being laid out
+	cache[key] = None
+
+	component = track.component if "component" in track.property_data else None
+	children = list(component.positions()) if isinstance(component, avb.components.Sequence) else [(0, 0, component)] if component is not None else []
+
+	starts, ends, selected, angle_names = [], [], [], []
+	nested_layouts:list[GroupClipLayout] = []
+
+	for _, position, child in children:
+
+		if not child.length:
+			continue
+
+		if isinstance(child, avb.trackgroups.Selector):
+			starts.append(position)
+			ends.append(position + child.length)
+			selected.append(child.selected)
+			angle_names.append([_angle_name(angle_track) for angle_track in child.tracks])
+
+		elif isinstance(child, avb.components.SourceClip) and _is_group_mob(child.mob):
+			nested = get_group_clip_layout(child.mob_id, child.track, cache) if child.track is not None else None
+			if nested is not None:
+				nested_layouts.append(_clip_layout(nested.shifted(position - child.start_time), position, position + child.length))
+
+	layouts = nested_layouts + ([GroupClipLayout(
+		start       = numpy.asarray(starts, dtype=numpy.int64),
+		end         = numpy.asarray(ends, dtype=numpy.int64),
+		selected    = numpy.asarray(selected, dtype=numpy.int64),
+		angle_names = angle_names,
+	)] if starts else [])
+
+	cache[key] = _join_layouts(layouts) if layouts else None
+	return cache[key]
+
+def _clip_layout(layout:GroupClipLayout, start:int, end:int) -> GroupClipLayout:
+	"""Trim a layout to a range"""
+
+	keep = (layout.end > start) & (layout.start < end)
+	return GroupClipLayout(
+		start       = numpy.maximum(layout.start[keep], start),
+		end         = numpy.minimum(layout.end[keep], end),
+		selected    = layout.selected[keep],
+		angle_names = [names for names, is_kept in zip(layout.angle_names, keep.tolist()) if is_kept],
+	)
+
+def _join_layouts(layouts:list[GroupClipLayout]) -> GroupClipLayout:
+	"""Combine layouts, in order of start"""
+
+	start = numpy.concatenate([layout.start for layout in layouts])
+	order = numpy.argsort(start, kind="stable")
+	angle_names = [names for layout in layouts for names in layout.angle_names]
+
+	return GroupClipLayout(
+		start       = start[order],
+		end         = numpy.concatenate([layout.end for layout in layouts])[order],
+		selected    = numpy.concatenate([layout.selected for layout in layouts])[order],
+		angle_names = [angle_names[idx] for idx in order.tolist()],
+	)
+
+@dataclasses.dataclass
+class AngleUsageTable:
+	"""Columnar table of angle usage: one row per stretch of a group clip angle cut into a reel"""
+
+	reel_names:list[str]
+	"""Timeline names, referenced by `reel_index`"""
+
+	group_clips:list[avb.trackgroups.Composition]
+	"""Group clips, referenced by `group_index`"""
+
+	angle_names:list[str]
+	"""Angle names, referenced by `angle_name_index`"""
+
+	reel_index:numpy.ndarray
+	"""Index into `reel_names` for each row"""
+
+	group_index:numpy.ndarray
+	"""Index into `group_clips` for each row"""
+
+	angle:numpy.ndarray
+	"""Angle number (index of the angle's track in the group) for each row"""
+
+	angle_name_index:numpy.ndarray
+	"""Index into `angle_names` for each row"""
+
+	frames:numpy.ndarray
+	"""Frames of the angle cut in for each row"""
+
+	def __len__(self) -> int:
+		return len(self.frames)
+
+	def summarize(self, by:collections.abc.Sequence[str]=("reel", "group", "angle")) -> list[dict]:
+		"""
+		Total frames and number of stretches (`events`) of each angle, grouped by any of `reel`, `group` and `angle`, most used first.
+
+		For example, `by=("group", "angle")` gives per-angle usage of each group clip across all reels.
+		"""
+
+		columns = {"reel": self.reel_index, "group": self.group_index, "angle": self.angle}
+
+		if not by or not set(by) <= columns.keys():
+			raise ValueError(f"Can only summarize by {', '.join(columns)}")
+
+		if not len(self):
+			return []
+
+		keys = numpy.stack([columns[column] for column in by], axis=1)
+		unique_keys, inverse = numpy.unique(keys, axis=0, return_inverse=True)
+		inverse = inverse.reshape(-1)
+
+		frames = numpy.bincount(inverse, weights=self.frames, minlength=len(unique_keys)).astype(numpy.int64)
+		counts = numpy.bincount(inverse, minlength=len(unique_keys))
+
+		# Any row's angle name will do for the group
+		first_rows = numpy.full(len(unique_keys), len(self), dtype=numpy.int64)
+		numpy.minimum.at(first_rows, inverse, numpy.arange(len(self)))
+
+		summary = []
+		for key_index in numpy.argsort(-frames, kind="stable").tolist():
+
+			row = int(first_rows[key_index])
+			entry = {}
+
+			if "reel" in by:
+				entry["reel"] = self.reel_names[self.reel_index[row]]
+			if "group" in by:
+				entry["group"] = self.group_clips[self.group_index[row]].name
+			if "angle" in by:
+				entry["angle"] = int(self.angle[row])
+				entry["angle_name"] = self.angle_names[self.angle_name_index[row]]
+
+			entry["frames"] = int(frames[key_index])
+			entry["events"] = int(counts[key_index])
+			summary.append(entry)
+
+		return summary
+
+def get_angle_usage(
+		compositions_to_check:collections.abc.Iterable[avb.trackgroups.Composition],
+		track_type:timeline.TrackTypes|None=timeline.TrackTypes.PICTURE,
+		cache:GroupClipCache|None=None
+	) -> AngleUsageTable:
+	"""
+	Find which angles of which group clips are cut into the given timelines (such as all reels of a show).
+
+	Works from the flattened events of each timeline.  Each group clip track is laid out once, then every event
+	cut in from it is matched to the selectors it covers with `searchsorted`.
+	"""
+
+	cache = {} if cache is None else cache
+
+	reel_names:list[str] = []
+	group_clips:list[avb.trackgroups.Composition] = []
+	group_lookup:dict[avb.mobid.MobID, int] = {}
+	angle_names:list[str] = []
+	angle_name_lookup:dict[str, int] = {}
+
+	reel_index, group_index, angle, angle_name_index, frames = [], [], [], [], []
+
+	for composition, flattened in events.iter_flattened_timelines(compositions_to_check, track_type=track_type):
+
+		reel_names.append(composition.name)
+
+		for track_events in flattened.values():
+			for event in track_events:
+
+				group_mob = event.source_clip.mob
+				if not _is_group_mob(group_mob):
+					continue
+
+				group_track = event.source_clip.track
+				layout = get_group_clip_layout(event.mob_id, group_track, cache) if group_track is not None else None
+				if not layout:
+					continue
+
+				if event.mob_id not in group_lookup:
+					group_lookup[event.mob_id] = len(group_clips)
+					group_clips.append(group_mob)
+
+				# Selectors the event covers
+				first = int(numpy.searchsorted(layout.end, event.source_offset, side="right"))
+				last  = int(numpy.searchsorted(layout.start, event.source_end, side="left"))
+
+				for selector in range(first, last):
+
+					covered = min(int(layout.end[selector]), event.source_end) - max(int(layout.start[selector]), event.source_offset)
+					if covered <= 0:
+						continue
+
+					selected = int(layout.selected[selector])
+					names = layout.angle_names[selector]
+					name = names[selected] if selected < len(names) else ""
+
+					if name not in angle_name_lookup:
+						angle_name_lookup[name] = len(angle_names)
+						angle_names.append(name)
+
+					reel_index.append(len(reel_names) - 1)
+					group_index.append(group_lookup[event.mob_id])
+					angle.append(selected)
+					angle_name_index.append(angle_name_lookup[name])
+					frames.append(covered)
+
+	return AngleUsageTable(
+		reel_names       = reel_names,
+		group_clips      = group_clips,
+		angle_names      = angle_names,
+		reel_index       = numpy.asarray(reel_index, dtype=numpy.int64),
+		group_index      = numpy.asarray(group_index, dtype=numpy.int64),
+		angle            = numpy.asarray(angle, dtype=numpy.int64),
+		angle_name_index = numpy.asarray(angle_name_index, dtype=numpy.int64),
+		frames           = numpy.asarray(frames, dtype=numpy.int64),
+	)
@@ -0,0 +1,285 @@
+"""Fuzzy clip name search across a project's bins, from a trigram index of clip names and user columns"""
+
+import dataclasses, pathlib, functools, re, collections.abc
+import avb, numpy
+from . import catalog, sorting
+
+NAME_INDEX_NAME = "names"
+"""Name of the clip name index in the `ProjectCatalog`"""
+
+NAME_COLUMN = "Name"
+"""Column name recorded for a clip's own name, as opposed to one of its user columns"""
+
+CONTAINMENT_WEIGHT = 0.8
+"""
+Weight of containment (how much of the query is in a name) against similarity (how alike the two are overall) in
+match scores.  Mostly containment, so a short query like `32A-4` finds the long clip names it's part of; similarity
+breaks the tie in favour of names closer to the query.
+"""
+
+NAME_SCHEMA = """
+	CREATE TABLE IF NOT EXISTS clip_names (
+		name_id      INTEGER PRIMARY KEY,
+		bin_path     TEXT    NOT NULL,
+		mob_id       TEXT    NOT NULL,
+		clip_name    TEXT,
+		column_name  TEXT    NOT NULL,
+		text         TEXT    NOT NULL,
+		num_trigrams INTEGER NOT NULL
+	);
+	CREATE INDEX IF NOT EXISTS clip_names_by_bin ON clip_names (bin_path);
+
+	CREATE TABLE IF NOT EXISTS clip_name_trigrams (
+		trigram TEXT    NOT NULL,
+		name_id INTEGER NOT NULL,
+		PRIMARY KEY (trigram, name_id)
+	) WITHOUT ROWID;
+	CREATE INDEX IF NOT EXISTS clip_name_trigrams_by_name ON clip_name_trigrams (name_id);
+
+	-- Drop a name's trigrams along with it
+	CREATE TRIGGER IF NOT EXISTS clip_names_delete AFTER DELETE ON clip_names BEGIN
+		DELETE FROM clip_name_trigrams WHERE name_id = old.name_id;
+	END;
+"""
+"""SQLite schema for the clip name index"""
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class IndexedName:
+	"""A clip name (or user column value) in the name index"""
+
+	mob_id:str
+	"""Mob ID of the clip"""
+
+	clip_name:str
+	"""Name of the clip"""
+
+	column_name:str
+	"""Bin column the text is from: `NAME_COLUMN` or a user column"""
+
+	text:str
+	"""The indexed text"""
+
+	bin_path:str|None = None
+	"""The bin containing the clip"""
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class NameMatch:
+	"""A fuzzy match for a name search"""
+
+	indexed_name:IndexedName
+	"""The name that matched"""
+
+	score:float
+	"""How well the name matches the query, from 0 to 1 (see `CONTAINMENT_WEIGHT`)"""
+
+def normalize_name(text:str) -> list[str]:
+	"""Split a name into lowercase words and numbers, following `human_sort` (so `32A_Take004` and `32a take 4` match)"""
+
+	words = []
+
+	for part in sorting.human_sort(text):
+		if isinstance(part, int):
+			words.append(str(part))
+		else:
+			words.extend(re.findall(r"[^\W_]+", part))
+
+	return words
+
+def get_trigrams(text:str) -> set[str]:
+	"""
+	Trigrams of the normalized name, padded so short words like scene letters and take numbers still count.
+
+	Trigrams run across word boundaries, so `32A_T4` and `32D_T4_A` share fewer than `32A_T4` and `32a take 4`.
+	"""
+
+	padded = f"  {' '.join(normalize_name(text))} "
+	return {padded[idx:idx+3] for idx in range(len(padded) - 2)} if padded.strip() else set()
+
+def _user_columns(composition:avb.trackgroups.Composition) -> dict:
+	return (composition.attributes.get("_USER") if "attributes" in composition.property_data else None) or {}
+
+def get_names_from_bin(bin_path:str|pathlib.Path, user_columns:collections.abc.Iterable[str]=()) -> list[IndexedName]:
+	"""Get the names, and the given user columns, of every clip in a bin"""
+
+	user_columns = list(user_columns)
+	indexed_names = []
+
+	with avb.open(bin_path) as bin_handle:
+
+		# Clips, subclips, sequences and so on as they appear in the bin, not the sources behind them
+		for bin_item in bin_handle.content.items:
+
+			composition = bin_item.mob
+			if not bin_item.user_placed or not isinstance(composition, avb.trackgroups.Composition):
+				continue
+
+			clip_name = composition.name or ""
+			values = {NAME_COLUMN: clip_name}
+
+			column_values = _user_columns(composition)
+			values.update((column, str(column_values[column])) for column in user_columns if column in column_values)
+
+			indexed_names.extend(
+				IndexedName(mob_id=str(composition.mob_id), clip_name=clip_name, column_name=column, text=text)
+				for column, text in values.items() if text.strip()
+			)
+
+	return indexed_names
+
+def store_names(project_catalog:catalog.ProjectCatalog, bin_key:str, indexed_names:list[IndexedName]):
+	"""Write a bin's names, and their trigrams, to the catalog"""
+
+	next_name_id = project_catalog.connection.execute("SELECT COALESCE(MAX(name_id), 0) + 1 FROM clip_names").fetchone()[0]
+	name_rows, trigram_rows = [], []
+
+	for name_id, indexed_name in enumerate(indexed_names, start=next_name_id):
+		trigrams = get_trigrams(indexed_name.text)
+		name_rows.append((name_id, bin_key, indexed_name.mob_id, indexed_name.clip_name, indexed_name.column_name, indexed_name.text, len(trigrams)))
+		trigram_rows.extend((trigram, name_id) for trigram in trigrams)
+
+	project_catalog.connection.executemany(
+		"INSERT INTO clip_names (name_id, bin_path, mob_id, clip_name, column_name, text, num_trigrams) VALUES (?, ?, ?, ?, ?, ?, ?)",
+		name_rows
+	)
+	project_catalog.connection.executemany("INSERT INTO clip_name_trigrams (trigram, name_id) VALUES (?, ?)", trigram_rows)
+
+def update_name_index(
+		project_catalog:catalog.ProjectCatalog,
+		bin_paths:collections.abc.Iterable[str|pathlib.Path],
+		user_columns:collections.abc.Iterable[str]=(),
+		max_workers:int|None=None
+	) -> catalog.CatalogUpdate:
+	"""
+	Index clip names, and the given user columns (eg `Scene`, `Take`), for the given bins, re-parsing only bins that
+	have changed.
+
+	Bins are only re-indexed when they change, so changing `user_columns` for an existing catalog needs a fresh one.
+	"""
+
+	project_catalog.ensure_schema(NAME_SCHEMA)
+
+	return project_catalog.update_index(
+		index_name  = NAME_INDEX_NAME,
+		bin_paths   = bin_paths,
+		extract     = functools.partial(get_names_from_bin, user_columns=tuple(user_columns)),
+		store       = store_names,
+		tables      = ["clip_names"],
+		max_workers = max_workers
+	)
+
+def search_names(
+		project_catalog:catalog.ProjectCatalog,
+		query:str,
+		limit:int|None=20,
+		min_score:float=0.3,
+		column_names:collections.abc.Iterable[str]|None=None
+	) -> list[NameMatch]:
+	"""
+	Fuzzy-search clip names and indexed user columns, best matches first.
+
+	For many searches against a large project, `NameIndex.from_catalog()` loads the index into memory once instead.
+	"""
+
+	project_catalog.ensure_schema(NAME_SCHEMA)
+
+	query_trigrams = sorted(get_trigrams(query))
+	if not query_trigrams:
+		return []
+
+	column_filter, column_params = "", []
+	if column_names is not None:
+		column_params = list(column_names)
+		column_filter = f" AND n.column_name IN ({', '.join('?' * len(column_params))})"
+
+	return [
+		NameMatch(IndexedName(mob_id, clip_name, column_name, text, bin_path), score)
+		for mob_id, clip_name, column_name, text, bin_path, score in project_catalog.connection.execute(
+			f"""
+			WITH shared AS (
+				SELECT name_id, COUNT(*) AS num_shared FROM clip_name_trigrams
+				WHERE trigram IN ({', '.join('?' * len(query_trigrams))})
+				GROUP BY name_id
+			)
+			SELECT n.mob_id, n.clip_name, n.column_name, n.text, n.bin_path,
+				? * s.num_shared / ? + ? * s.num_shared / (? + n.num_trigrams - s.num_shared) AS score
+			FROM shared AS s JOIN clip_names AS n USING (name_id)
+			WHERE score >= ?{column_filter}
+			ORDER BY score DESC, n.text
+			LIMIT ?
+			""",
+			(*query_trigrams, CONTAINMENT_WEIGHT, float(len(query_trigrams)), 1 - CONTAINMENT_WEIGHT, float(len(query_trigrams)), min_score, *column_params, -1 if limit is None else limit)
+		)
+	]
+
+@dataclasses.dataclass
+class NameIndex:
+	"""The catalog's trigram index, loaded into memory for fast repeated searches"""
+
+	names:list[IndexedName]
+	"""Every indexed name"""
+
+	num_trigrams:numpy.ndarray
+	"""Number of distinct trigrams in each name"""
+
+	trigrams:dict[str, int]
+	"""Position of each trigram's postings in `postings_start`"""
+
+	postings_start:numpy.ndarray
+	"""Start of each trigram's postings in `postings`, plus the end of the last one"""
+
+	postings:numpy.ndarray
+	"""Index into `names` of every name containing each trigram, grouped by trigram"""
+
+	def __len__(self) -> int:
+		return len(self.names)
+
+	@classmethod
+	def from_catalog(cls, project_catalog:catalog.ProjectCatalog) -> "NameIndex":
+		"""Load the name index from the catalog"""
+
+		project_catalog.ensure_schema(NAME_SCHEMA)
+		connection = project_catalog.connection
+
+		name_rows = connection.execute("SELECT name_id, mob_id, clip_name, column_name, text, bin_path, num_trigrams FROM clip_names ORDER BY name_id").fetchall()
+		name_ids = numpy.fromiter((row[0] for row in name_rows), dtype=numpy.int64, count=len(name_rows))
+
+		trigram_counts = connection.execute("SELECT trigram, COUNT(*) FROM clip_name_trigrams GROUP BY trigram ORDER BY trigram").fetchall()
+		posting_ids = numpy.fromiter((row[0] for row in connection.execute("SELECT name_id FROM clip_name_trigrams ORDER BY trigram, name_id")), dtype=numpy.int64)
+
+		return cls(
+			names          = [IndexedName(mob_id, clip_name, column_name, text, bin_path) for _, mob_id, clip_name, column_name, text, bin_path, _ in name_rows],
+			num_trigrams   = numpy.fromiter((row[-1] for row in name_rows), dtype=numpy.int64, count=len(name_rows)),
+			trigrams       = {trigram: idx for idx, (trigram, _) in enumerate(trigram_counts)},
+			postings_start = numpy.concatenate(([0], numpy.cumsum([count for _, count in trigram_counts], dtype=numpy.int64))),
+			postings       = numpy.searchsorted(name_ids, posting_ids).astype(numpy.int32),
+		)
+
+	def search(self, query:str, limit:int|None=20, min_score:float=0.3) -> list[NameMatch]:
+		"""Fuzzy-search the names, best matches first"""
+
+		query_trigrams = get_trigrams(query)
+		known = [self.trigrams[trigram] for trigram in query_trigrams if trigram in self.trigrams]
+
+		if not known:
+			return []
+
+		# Trigrams each name has in common with the query
+		matched = numpy.concatenate([self.postings[self.postings_start[idx]:self.postings_start[idx + 1]] for idx in known])
+		num_shared = numpy.bincount(matched, minlength=len(self.names))
+
+		candidates = numpy.flatnonzero(num_shared)
+		shared = num_shared[candidates]
+		containment = shared / len(query_trigrams)
+		similarity  = shared / (len(query_trigrams) + self.num_trigrams[candidates] - shared)
+		scores = CONTAINMENT_WEIGHT * containment + (1 - CONTAINMENT_WEIGHT) * similarity
+
+		is_match = scores >= min_score
+		candidates, scores = candidates[is_match], scores[is_match]
+
+		# Only fully sort the best ones
+		if limit is not None and len(candidates) > limit:
+			best = numpy.argpartition(-scores, limit - 1)[:limit]
+			candidates, scores = candidates[best], scores[best]
+
+		order = numpy.lexsort((candidates, -scores))
+		return [NameMatch(self.names[idx], float(score)) for idx, score in zip(candidates[order].tolist(), scores[order].tolist())]
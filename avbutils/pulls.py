@@ -0,0 +1,161 @@
+"""Merged source ranges with handles, for consolidate, transcode and VFX pull lists"""
+
+import dataclasses, enum, collections.abc
+import avb, numpy
+from timecode import TimecodeRange
+from . import events, sourcerefs, timeline
+
+class SourceReferenceType(enum.Enum):
+	"""Which sources to pull from"""
+
+	PHYSICAL = "physical"
+	"""Tapes, film, soundrolls and imported source files"""
+
+	FILE     = "file"
+	"""Media files"""
+
+	def references_for_component(self, component:avb.components.Component, offset:int=0):
+		"""Resolve source references of this type for a component"""
+
+		if self == SourceReferenceType.PHYSICAL:
+			return sourcerefs.physical_references_for_component(component, offset)
+		return sourcerefs.file_references_for_component(component, offset)
+
+@dataclasses.dataclass
+class SourceRangeTable:
+	"""Columnar table of source ranges (in source edit units), one row per range"""
+
+	sources:list[avb.trackgroups.Composition]
+	"""Source mobs referenced by `source_index`"""
+
+	source_index:numpy.ndarray
+	"""Index into `sources` for each range"""
+
+	start:numpy.ndarray
+	"""Start of each range, as an offset into the source"""
+
+	end:numpy.ndarray
+	"""End (exclusive) of each range"""
+
+	def __len__(self) -> int:
+		return len(self.source_index)
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class PullRange:
+	"""A merged range of source material in use"""
+
+	source_mob:avb.trackgroups.Composition
+	"""The source mob (tape, source file, media file, etc)"""
+
+	start:int
+	"""Start of the range, as an offset (in edit units) into the source"""
+
+	end:int
+	"""End of the range (exclusive)"""
+
+	@property
+	def source_name(self) -> str:
+		"""Name of the source"""
+		return self.source_mob.name
+
+	@property
+	def duration(self) -> int:
+		"""Duration of the range, in edit units"""
+		return self.end - self.start
+
+	@property
+	def timecode_range(self) -> TimecodeRange:
+		"""The range in the source's master timecode"""
+
+		source_range = timeline.get_timecode_range_for_composition(self.source_mob)
+		return TimecodeRange(start=source_range.start + self.start, duration=self.duration)
+
+def collect_source_ranges(
+		compositions:collections.abc.Iterable[avb.trackgroups.Composition],
+		reference_type:SourceReferenceType=SourceReferenceType.PHYSICAL,
+		track_type:timeline.TrackTypes|None=None
+	) -> SourceRangeTable:
+	"""Collect the source range used by every event of the given timelines, skipping events whose sources can't be resolved"""
+
+	sources:list[avb.trackgroups.Composition] = []
+	source_lookup:dict[str, int] = {}
+	source_index, starts, ends = [], [], []
+
+	for composition, flattened in events.iter_flattened_timelines(compositions, track_type=track_type):
+		for track_events in flattened.values():
+			for event in track_events:
+
+				# Resolve the whole chain first, so a broken one doesn't leave half an event behind
+				try:
+					references = list(reference_type.references_for_component(event.source_clip, event.source_offset - event.source_clip.start_time))
+				except (ValueError, AttributeError):
+					continue
+
+				for source_clip, offset in references:
+
+					mob_id = str(source_clip.mob_id)
+					if mob_id not in source_lookup:
+						source_lookup[mob_id] = len(sources)
+						sources.append(source_clip.mob)
+
+					# Scale the event into the source's edit rate
+					start  = source_clip.start_time + offset.frame_number
+					length = round((event.source_end - event.source_offset) * float(source_clip.edit_rate) / float(event.source_clip.edit_rate))
+
+					source_index.append(source_lookup[mob_id])
+					starts.append(start)
+					ends.append(start + length)
+
+	return SourceRangeTable(
+		sources      = sources,
+		source_index = numpy.asarray(source_index, dtype=numpy.int64),
+		start        = numpy.asarray(starts, dtype=numpy.int64),
+		end          = numpy.asarray(ends, dtype=numpy.int64),
+	)
+
+def merge_ranges(source_index:numpy.ndarray, start:numpy.ndarray, end:numpy.ndarray, handles:int=0) -> tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray]:
+	"""
+	Merge overlapping or abutting ranges per source, after padding each with `handles`.
+
+	Returns `(source_index, start, end)` arrays of the merged ranges, sorted by source then start.
+	"""
+
+	source_index = numpy.asarray(source_index, dtype=numpy.int64)
+	start = numpy.maximum(numpy.asarray(start, dtype=numpy.int64) - handles, 0)
+	end   = numpy.asarray(end, dtype=numpy.int64) + handles
+
+	if not len(source_index):
+		return source_index, start, end
+
+	order = numpy.lexsort((start, source_index))
+	source_index, start, end = source_index[order], start[order], end[order]
+
+	# Lift each source into its own band so one running maximum works across all sources at once
+	band = int(end.max() - start.min()) + 1
+	lifted_start = start + source_index * band
+	running_end  = numpy.maximum.accumulate(end + source_index * band)
+
+	# A new merged range begins wherever a range starts after everything before it has ended
+	is_first = numpy.empty(len(start), dtype=bool)
+	is_first[0]  = True
+	is_first[1:] = lifted_start[1:] > running_end[:-1]
+
+	firsts = numpy.flatnonzero(is_first)
+
+	return source_index[firsts], start[firsts], numpy.maximum.reduceat(end, firsts)
+
+def get_pull_list(
+		compositions:collections.abc.Iterable[avb.trackgroups.Composition],
+		handles:int=0,
+		reference_type:SourceReferenceType=SourceReferenceType.PHYSICAL,
+		track_type:timeline.TrackTypes|None=None
+	) -> list[PullRange]:
+	"""Get the merged ranges of source material used by the given timelines (such as all reels of a feature), with handles"""
+
+	table = collect_source_ranges(compositions, reference_type=reference_type, track_type=track_type)
+	source_index, start, end = merge_ranges(table.source_index, table.start, table.end, handles=handles)
+
+	return [
+		PullRange(source_mob=table.sources[idx], start=range_start, end=range_end)
+		for idx, range_start, range_end in zip(source_index.tolist(), start.tolist(), end.tolist())
+	]
@@ -0,0 +1,155 @@
+"""Per-frame source maps: which source and source frame is up at every record frame of a timeline"""
+
+import dataclasses, collections.abc
+import avb, numpy
+from timecode import Timecode
+from . import events, pulls, timeline
+
+NO_SOURCE = -1
+"""Source index (and source frame) for record frames with nothing cut in"""
+
+@dataclasses.dataclass
+class SourceFrameMap:
+	"""Dense map of one track of a timeline: source index and source frame for every record frame"""
+
+	track_label:str
+	"""Track this maps (eg `V1`)"""
+
+	sources:list[avb.trackgroups.Composition]
+	"""Source mobs referenced by `source_index`"""
+
+	source_index:numpy.ndarray
+	"""Index into `sources` for each record frame, or `NO_SOURCE`"""
+
+	source_frame:numpy.ndarray
+	"""Offset (in the source's edit units) into the source for each record frame, or `NO_SOURCE`"""
+
+	def __len__(self) -> int:
+		return len(self.source_index)
+
+	def source_at(self, record_frame:int) -> tuple[avb.trackgroups.Composition, int]|None:
+		"""The source mob and source frame at a record frame, if anything is cut in there"""
+
+		idx = int(self.source_index[record_frame])
+		return None if idx == NO_SOURCE else (self.sources[idx], int(self.source_frame[record_frame]))
+
+	def source_timecode_at(self, record_frame:int) -> Timecode|None:
+		"""The source's timecode at a record frame, if anything is cut in there"""
+
+		source = self.source_at(record_frame)
+
+		if source is None:
+			return None
+
+		source_mob, source_frame = source
+		return timeline.get_timecode_range_for_composition(source_mob).start + source_frame
+
+def _fill_frames(
+		num_frames:int,
+		record_start:numpy.ndarray,
+		length:numpy.ndarray,
+		event_source_index:numpy.ndarray,
+		source_start:numpy.ndarray,
+		rate_scale:numpy.ndarray
+	) -> tuple[numpy.ndarray, numpy.ndarray]:
+	"""Expand events into dense per-frame source index and source frame arrays"""
+
+	source_index = numpy.full(num_frames, NO_SOURCE, dtype=numpy.int32)
+	source_frame = numpy.full(num_frames, NO_SOURCE, dtype=numpy.int32)
+
+	# Anything hanging off the end of the timeline doesn't get mapped
+	length = numpy.clip(numpy.minimum(record_start + length, num_frames) - record_start, 0, None)
+
+	if not length.sum():
+		return source_index, source_frame
+
+	# Event number and frame-within-the-event for every mapped frame
+	frame_event = numpy.repeat(numpy.arange(len(length)), length)
+	into_event  = numpy.arange(len(frame_event)) - numpy.repeat(numpy.cumsum(length) - length, length)
+	record_frames = record_start[frame_event] + into_event
+
+	source_index[record_frames] = event_source_index[frame_event]
+	source_frame[record_frames] = source_start[frame_event] + numpy.floor(into_event * rate_scale[frame_event]).astype(numpy.int64)
+
+	return source_index, source_frame
+
+def get_source_frame_map_for_events(
+		track_events:collections.abc.Iterable[events.SourceEvent],
+		num_frames:int,
+		track_label:str="",
+		reference_type:pulls.SourceReferenceType|None=None
+	) -> SourceFrameMap:
+	"""
+	Map flattened events to every record frame.
+
+	With no `reference_type`, sources are the clips cut into the timeline (master clips, subclips, ...).  Otherwise
+	each event is resolved once to its physical or file source, and source frames are in that source's edit rate.
+	"""
+
+	sources:list[avb.trackgroups.Composition] = []
+	source_lookup:dict[avb.mobid.MobID, int] = {}
+	record_start, length, event_source_index, source_start, rate_scale = [], [], [], [], []
+
+	for event in track_events:
+
+		# Source frames per record frame, other than 1 under a motion effect
+		speed = (event.source_end - event.source_offset) / event.length
+
+		if reference_type is None:
+			source_clip, start, scale = event.source_clip, event.source_offset, speed
+
+		else:
+			try:
+				source_clip, offset = next(reference_type.references_for_component(event.source_clip, event.source_offset - event.source_clip.start_time))
+			except (StopIteration, ValueError, AttributeError):
+				continue
+
+			start = source_clip.start_time + offset.frame_number
+			scale = speed * float(source_clip.edit_rate) / float(event.source_clip.edit_rate)
+
+		if source_clip.mob_id not in source_lookup:
+			source_lookup[source_clip.mob_id] = len(sources)
+			sources.append(source_clip.mob)
+
+		record_start.append(event.record_offset)
+		length.append(event.length)
+		event_source_index.append(source_lookup[source_clip.mob_id])
+		source_start.append(start)
+		rate_scale.append(scale)
+
+	source_index, source_frame = _fill_frames(
+		num_frames,
+		numpy.asarray(record_start, dtype=numpy.int64),
+		numpy.asarray(length, dtype=numpy.int64),
+		numpy.asarray(event_source_index, dtype=numpy.int32),
+		numpy.asarray(source_start, dtype=numpy.int64),
+		numpy.asarray(rate_scale, dtype=numpy.float64),
+	)
+
+	return SourceFrameMap(track_label=track_label, sources=sources, source_index=source_index, source_frame=source_frame)
+
+def get_source_frame_maps(
+		composition:avb.trackgroups.Composition,
+		track_labels:collections.abc.Iterable[str]=("V1",),
+		reference_type:pulls.SourceReferenceType|None=None,
+		cache:events.NestedEventCache|None=None
+	) -> dict[str, SourceFrameMap]:
+	"""Map every record frame of a timeline's tracks (eg `V1`, `A1`, `A2`) to its source and source frame"""
+
+	cache = {} if cache is None else cache
+	track_labels = list(track_labels)
+	tracks = {timeline.format_track_label(track): track for track in composition.tracks}
+
+	missing = [track_label for track_label in track_labels if track_label not in tracks]
+	if missing:
+		raise ValueError(f"{composition.name}: Tracks not found: {', '.join(missing)}")
+
+	return {
+		track_label: get_source_frame_map_for_events(
+			events.flatten_track(tracks[track_label], cache=cache),
+			composition.length,
+			track_label    = track_label,
+			reference_type = reference_type
+		)
+		for track_label in track_labels
+	}
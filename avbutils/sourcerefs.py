@@ -55,34 +55,41 @@ def resolve_base_component_from_component(component:avb.components.Component, of
 		#raise ValueError(f"{offset.rate=} does not equal {component.edit_rate=}")
 		offset = offset.resample(rate=round(component.edit_rate))
 	
-	if isinstance(component, avb.components.Sequence):
+	target_frame = offset.frame_number
 
-		#print(component.property_data)
+	def _expand(item:timeline.ComponentWalkItem) -> list[tuple[avb.components.Component, int]]|None:
+		"""Follow the single path down to the component at `target_frame`"""
 
-		#print("From components:", component.components)
-
-		component, from_sequence_start = component.nearest_component_at_time(offset.frame_number)
-		offset -= from_sequence_start
+		# NOTE: Only digs one level into a Sequence; whatever's at that time in the Sequence is the base component
+		if item.parents and isinstance(item.parents[-1], avb.components.Sequence):
+			return None
+		
+		component = item.component
+	
+		if isinstance(component, avb.components.Sequence):
+			component, from_sequence_start = component.nearest_component_at_time(target_frame - item.offset)
+			return [(component, item.offset + from_sequence_start)]
+
+		elif isinstance(component, avb.trackgroups.EssenceGroup) or isinstance(component, avb.trackgroups.TrackEffect) or isinstance(component, avb.trackgroups.TimeWarp):
+			if len(component.tracks) == 1:
+				return [(component.tracks[0].component, item.offset)]
+			#print(f"LOOK: For {component}, Got {len(component.tracks)}  {avbutils.format_track_labels(component.tracks)}")
+		
+		elif isinstance(component, avb.trackgroups.Track) and "component" in component.property_data:
+			return [(component.component, item.offset)]
+			# print("LOOK: Just an empty track on this fella")
+		
+		return None
+	
+	# The deepest component along the path is the base component
+	*_, base = timeline.walk_components(component, expand=_expand)
 
-		if round(component.edit_rate) != offset.rate:
+	offset = timecode.Timecode(target_frame - base.offset, rate=offset.rate)
 
-			offset.resample(round(component.edit_rate))
+	if round(base.component.edit_rate) != offset.rate:
+		offset = offset.resample(rate=round(base.component.edit_rate))
 
-	elif isinstance(component, avb.trackgroups.EssenceGroup) or isinstance(component, avb.trackgroups.TrackEffect) or isinstance(component, avb.trackgroups.TimeWarp):
-		if len(component.tracks) == 1:
-			component, offset = resolve_base_component_from_component(component.tracks[0].component, offset)
-		else:
-			#print("HAHA OH NO")
-			pass #??
-#			print(f"LOOK: For {component}, Got {len(component.tracks)}  {avbutils.format_track_labels(component.tracks)}")
-	
-	elif isinstance(component, avb.trackgroups.Track) and "component" in component.property_data:
-		component, offset = resolve_base_component_from_component(component.component, offset)
-		# print("LOOK: Just an empty track on this fella")
-	
-#	else:
-#		print(component)
-	return component, offset
+	return base.component, offset
 
 
 def source_references_for_component(component:avb.components.Component, offset:timecode.Timecode|int=0) -> typing.Generator[tuple[avb.components.SourceClip, timecode.Timecode], None, None]:
@@ -104,24 +111,24 @@ def source_references_for_component(component:avb.components.Component, offset:t
 		yield component, offset
 		component, offset = resolve_base_component_from_component(component.track.component, component.start_time + offset)
 
-def file_references_for_component(component:avb.components.Component) -> typing.Generator[tuple[avb.components.SourceClip, timecode.Timecode], None, None]:
+def file_references_for_component(component:avb.components.Component, offset:timecode.Timecode|int=0) -> typing.Generator[tuple[avb.components.SourceClip, timecode.Timecode], None, None]:
 	"""Get the active file source mobs since the most recent physical source mob"""
 
 	yield from filter(
 		lambda source_clip:
 			compositions.MobTypes.from_composition(source_clip[0].mob) == compositions.MobTypes.SOURCE_MOB \
 				and SourceMobRole.from_composition(source_clip[0].mob) == SourceMobRole.ESSENCE,
-		source_references_for_component(component)
+		source_references_for_component(component, offset)
 	)
 
-def physical_references_for_component(component:avb.components.Component) -> typing.Generator[tuple[avb.components.SourceClip, timecode.Timecode], None, None]:
+def physical_references_for_component(component:avb.components.Component, offset:timecode.Timecode|int=0) -> typing.Generator[tuple[avb.components.SourceClip, timecode.Timecode], None, None]:
 	"""Get the active physical source mobs"""
 	
 	yield from filter(
 		lambda source_clip:
 			compositions.MobTypes.from_composition(source_clip[0].mob) == compositions.MobTypes.SOURCE_MOB \
 				and SourceMobRole.from_composition(source_clip[0].mob) != SourceMobRole.ESSENCE,
-		source_references_for_component(component)
+		source_references_for_component(component, offset)
 	)
 
 def physical_source_name_for_composition(composition:avb.trackgroups.Composition) -> str|None:
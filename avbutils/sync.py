@@ -0,0 +1,139 @@
+"""Audio/picture sync checks: find audio cut in out of sync with the picture from the same clip"""
+
+import dataclasses, collections.abc
+import avb, numpy
+from timecode import Timecode
+from . import events, sourcemap, timeline
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class SyncBreak:
+	"""A stretch of a timeline where audio is out of sync with picture from the same clip"""
+
+	sequence_name:str
+	"""Name of the timeline"""
+
+	picture_track_label:str
+	"""The picture track (eg `V1`)"""
+
+	audio_track_label:str
+	"""The audio track (eg `A3`)"""
+
+	source_mob:avb.trackgroups.Composition
+	"""The clip both tracks are cut in from"""
+
+	record_start:int
+	"""Offset (in edit units) from the start of the timeline"""
+
+	length:int
+	"""Duration (in edit units)"""
+
+	offset:int
+	"""How far the audio is out of sync (in edit units); positive if the audio is late, like Avid's sync break numbers"""
+
+	record_tc:Timecode
+	"""Record timecode of the start"""
+
+	@property
+	def record_end(self) -> int:
+		"""Offset of the end (exclusive) from the start of the timeline"""
+		return self.record_start + self.length
+
+def _global_source_index(frame_map:sourcemap.SourceFrameMap, source_lookup:dict[avb.mobid.MobID, int], sources:list[avb.trackgroups.Composition]) -> numpy.ndarray:
+	"""Translate a map's per-track source indexes into indexes shared between tracks"""
+
+	for source in frame_map.sources:
+		if source.mob_id not in source_lookup:
+			source_lookup[source.mob_id] = len(sources)
+			sources.append(source)
+
+	to_global = numpy.asarray([source_lookup[source.mob_id] for source in frame_map.sources] + [sourcemap.NO_SOURCE], dtype=numpy.int32)
+
+	# `NO_SOURCE` (-1) picks up the trailing `NO_SOURCE`
+	return to_global[frame_map.source_index]
+
+def find_sync_breaks_in_maps(picture_map:sourcemap.SourceFrameMap, audio_map:sourcemap.SourceFrameMap) -> tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray, numpy.ndarray, list[avb.trackgroups.Composition]]:
+	"""
+	Compare the source frames of a picture and an audio track, frame for frame.
+
+	Returns `(record_start, length, offset, source_index, sources)` for each run of frames where both tracks show the
+	same clip, but at different source frames.
+	"""
+
+	source_lookup:dict[avb.mobid.MobID, int] = {}
+	sources:list[avb.trackgroups.Composition] = []
+
+	picture_source = _global_source_index(picture_map, source_lookup, sources)
+	audio_source   = _global_source_index(audio_map, source_lookup, sources)
+
+	num_frames = min(len(picture_source), len(audio_source))
+	picture_source, audio_source = picture_source[:num_frames], audio_source[:num_frames]
+
+	is_linked = (picture_source == audio_source) & (picture_source != sourcemap.NO_SOURCE)
+	offset = numpy.where(is_linked, audio_map.source_frame[:num_frames].astype(numpy.int64) - picture_map.source_frame[:num_frames], 0)
+	source = numpy.where(is_linked, picture_source, sourcemap.NO_SOURCE)
+
+	# Runs of the same source and offset
+	changes = numpy.flatnonzero((numpy.diff(offset) != 0) | (numpy.diff(source) != 0)) + 1
+	run_start  = numpy.concatenate(([0], changes)) if num_frames else numpy.empty(0, dtype=numpy.int64)
+	run_length = numpy.diff(numpy.concatenate((run_start, [num_frames])))
+
+	is_break = offset[run_start] != 0 if num_frames else numpy.empty(0, dtype=bool)
+
+	return run_start[is_break], run_length[is_break], offset[run_start][is_break], source[run_start][is_break], sources
+
+def find_sync_breaks(
+		composition:avb.trackgroups.Composition,
+		picture_track_label:str="V1",
+		audio_track_labels:collections.abc.Iterable[str]|None=None,
+		cache:events.NestedEventCache|None=None
+	) -> list[SyncBreak]:
+	"""
+	Find everywhere audio is out of sync with the picture track, where both are cut in from the same clip.
+
+	Checks every audio track unless `audio_track_labels` are given.  Audio cut in from other clips (music, sound
+	effects, wild lines) isn't considered linked, and is left alone.
+	"""
+
+	if audio_track_labels is None:
+		audio_track_labels = [timeline.format_track_label(track) for track in timeline.get_tracks_from_composition(composition, type=timeline.TrackTypes.SOUND)]
+
+	track_labels = [picture_track_label] + [label for label in audio_track_labels if label != picture_track_label]
+	frame_maps = sourcemap.get_source_frame_maps(composition, track_labels, cache=cache)
+
+	record_start_tc = timeline.get_start_timecode_for_composition(composition)
+	sync_breaks = []
+
+	for audio_track_label in track_labels[1:]:
+
+		record_start, length, offset, source_index, sources = find_sync_breaks_in_maps(frame_maps[picture_track_label], frame_maps[audio_track_label])
+
+		sync_breaks.extend(
+			SyncBreak(
+				sequence_name       = composition.name,
+				picture_track_label = picture_track_label,
+				audio_track_label   = audio_track_label,
+				source_mob          = sources[idx],
+				record_start        = start,
+				length              = run_length,
+				offset              = run_offset,
+				record_tc           = record_start_tc + start,
+			)
+			for start, run_length, run_offset, idx in zip(record_start.tolist(), length.tolist(), offset.tolist(), source_index.tolist())
+		)
+
+	return sorted(sync_breaks, key=lambda sync_break: (sync_break.record_start, sync_break.audio_track_label))
+
+def find_sync_breaks_in_timelines(
+		compositions:collections.abc.Iterable[avb.trackgroups.Composition],
+		picture_track_label:str="V1",
+		audio_track_labels:collections.abc.Iterable[str]|None=None
+	) -> dict[str, list[SyncBreak]]:
+	"""Find sync breaks in several timelines (such as all reels of a feature), keyed by timeline name"""
+
+	cache:events.NestedEventCache = {}
+	audio_track_labels = list(audio_track_labels) if audio_track_labels is not None else None
+
+	return {
+		composition.name: find_sync_breaks(composition, picture_track_label, audio_track_labels, cache=cache)
+		for composition in compositions
+	}
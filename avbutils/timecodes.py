@@ -0,0 +1,189 @@
+"""Bulk extraction of every timecode role for many clips at once, for bin reports"""
+
+import dataclasses, collections.abc
+import avb, numpy
+from timecode import Timecode, TimecodeRange
+from . import timeline, sourcerefs, compositions, instrumentation
+
+TimecodeRow = tuple[tuple[int, int, int, float]|None, ...]
+"""`(start, duration, rate, edit_rate)` per role for one mob, or `None` where a role isn't present"""
+
+TimecodeCache = dict[avb.mobid.MobID, TimecodeRow]
+"""Extracted timecode rows, keyed by mob ID"""
+
+ALL_ROLES:tuple[timeline.TimecodeTrackRoles, ...] = tuple(timeline.TimecodeTrackRoles)
+"""Every timecode role Media Composer has a column for"""
+
+@dataclasses.dataclass
+class TimecodeTable:
+	"""Columnar table of timecodes: one row per mob, one column per timecode role"""
+
+	mob_ids:list[avb.mobid.MobID]
+	"""Mob ID for each row"""
+
+	roles:tuple[timeline.TimecodeTrackRoles, ...]
+	"""Timecode role for each column"""
+
+	start:numpy.ndarray
+	"""Start timecode (as a frame number) of each role, per mob"""
+
+	duration:numpy.ndarray
+	"""Duration of each role, per mob"""
+
+	rate:numpy.ndarray
+	"""Timecode rate of each role, per mob"""
+
+	present:numpy.ndarray
+	"""Whether each role exists for each mob"""
+
+	def __len__(self) -> int:
+		return len(self.mob_ids)
+
+	def role_index(self, role:timeline.TimecodeTrackRoles) -> int:
+		"""Column index for a timecode role"""
+		return self.roles.index(role)
+
+	def get_timecode_range(self, row:int, role:timeline.TimecodeTrackRoles=timeline.TimecodeTrackRoles.MASTER_TC) -> TimecodeRange|None:
+		"""The timecode range for a given row and role, or `None` if the mob doesn't have it"""
+
+		col = self.role_index(role)
+
+		if not self.present[row, col]:
+			return None
+
+		return TimecodeRange(
+			start    = Timecode(int(self.start[row, col]), rate=int(self.rate[row, col])),
+			duration = int(self.duration[row, col])
+		)
+
+def _timecode_component(track:avb.trackgroups.Track) -> avb.components.Timecode|None:
+	"""The Timecode component of a timecode track, if it has one"""
+
+	if "component" not in track.property_data:
+		return None
+
+	component = track.component
+
+	if isinstance(component, avb.components.Sequence):
+		component, _ = component.nearest_component_at_time(0)
+
+	return component if isinstance(component, avb.components.Timecode) else None
+
+def _timecode_rate(timecode_component:avb.components.Timecode) -> int:
+	return int(getattr(timecode_component, "fps", 0) or round(timecode_component.edit_rate))
+
+def get_timecode_row_from_tracks(composition:avb.trackgroups.Composition, roles:collections.abc.Sequence[timeline.TimecodeTrackRoles]=ALL_ROLES) -> TimecodeRow|None:
+	"""Read each timecode role from a composition's own timecode tracks, in one pass.  `None` if it has none."""
+
+	found:dict[timeline.TimecodeTrackRoles, tuple[int, int, int, float]] = {}
+
+	for track in composition.tracks:
+
+		if track.media_kind != timeline.TrackTypes.TIMECODE.value:
+			continue
+
+		try:
+			role = timeline.TimecodeTrackRoles.from_timecode_track(track)
+		except ValueError:
+			continue
+
+		timecode_component = _timecode_component(track)
+		if timecode_component is not None:
+			found[role] = (timecode_component.start, timecode_component.length, _timecode_rate(timecode_component), float(timecode_component.edit_rate))
+
+	if not found:
+		return None
+
+	return tuple(found.get(role) for role in roles)
+
+def get_timecode_row(composition:avb.trackgroups.Composition, roles:collections.abc.Sequence[timeline.TimecodeTrackRoles]=ALL_ROLES, cache:TimecodeCache|None=None) -> TimecodeRow:
+	"""
+	Get each timecode role for a composition.
+
+	Clips without timecode tracks of their own (master clips, subclips) take their timecode from their
+	physical source (tape, source file, etc), offset to where the clip starts in it.
+	"""
+
+	cache = {} if cache is None else cache
+
+	instrumentation.record_cache_lookup("timecodes.rows", composition.mob_id in cache)
+
+	if composition.mob_id in cache:
+		return cache[composition.mob_id]
+
+	row = get_timecode_row_from_tracks(composition, roles)
+
+	if row is None and compositions.composition_is_timeline(composition):
+		row = tuple(None for _ in roles)
+
+	elif row is None:
+		row = _get_timecode_row_from_source(composition, roles, cache)
+
+	cache[composition.mob_id] = row
+	return row
+
+def _get_timecode_row_from_source(composition:avb.trackgroups.Composition, roles:collections.abc.Sequence[timeline.TimecodeTrackRoles], cache:TimecodeCache) -> TimecodeRow:
+	"""Timecode of a clip as offset into its physical source"""
+
+	empty = tuple(None for _ in roles)
+
+	try:
+		track = sourcerefs.primary_track_for_composition(composition)
+		source_clip, offset = next(sourcerefs.physical_references_for_component(track.component))
+	except (ValueError, AttributeError, StopIteration):
+		return empty
+
+	source_row = get_timecode_row(source_clip.mob, roles, cache)
+	source_position = source_clip.start_time + offset.frame_number
+	source_rate = float(source_clip.edit_rate)
+	duration = composition.length
+
+	row = []
+	for role_timecode in source_row:
+
+		if role_timecode is None:
+			row.append(None)
+			continue
+
+		# Other roles (24, 25, 30NP) run at their own rates.  Scale by edit rate, not timecode rate: 23.976 material
+		# has 24fps timecode, but one frame of it is still one frame of timecode.
+		start, _, rate, timecode_edit_rate = role_timecode
+		scale = timecode_edit_rate / source_rate if source_rate and timecode_edit_rate else 1
+		row.append((start + round(source_position * scale), round(duration * scale), rate, timecode_edit_rate))
+
+	return tuple(row)
+
+def get_timecode_table(
+		compositions:collections.abc.Iterable[avb.trackgroups.Composition],
+		roles:collections.abc.Sequence[timeline.TimecodeTrackRoles]=ALL_ROLES,
+		cache:TimecodeCache|None=None
+	) -> TimecodeTable:
+	"""
+	Get every timecode role for many compositions (such as all clips in a bin) as a columnar table.
+
+	Rows are cached by mob ID, and clips sharing a source only resolve the source's timecode once.  Pass the same
+	`cache` between calls (with the same `roles`) to keep it across bins.
+	"""
+
+	cache = {} if cache is None else cache
+	roles = tuple(roles)
+
+	mob_ids = []
+	rows = []
+	for composition in compositions:
+		mob_ids.append(composition.mob_id)
+		rows.append(get_timecode_row(composition, roles, cache))
+
+	shape = (len(rows), len(roles))
+	start    = numpy.zeros(shape, dtype=numpy.int64)
+	duration = numpy.zeros(shape, dtype=numpy.int64)
+	rate     = numpy.zeros(shape, dtype=numpy.int32)
+	present  = numpy.zeros(shape, dtype=bool)
+
+	for row_index, row in enumerate(rows):
+		for col_index, role_timecode in enumerate(row):
+			if role_timecode is not None:
+				start[row_index, col_index], duration[row_index, col_index], rate[row_index, col_index], _ = role_timecode
+				present[row_index, col_index] = True
+
+	return TimecodeTable(mob_ids=mob_ids, roles=roles, start=start, duration=duration, rate=rate, present=present)
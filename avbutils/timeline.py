@@ -59,10 +59,13 @@ class TimecodeTrackRoles(enum.IntEnum):
 
 	@classmethod
 	def from_timecode_track(cls, timecode_track:avb.trackgroups.Track) -> typing.Self:
+		"""Get the role of a timecode track from its index"""
 
 		if not TrackTypes.from_track(timecode_track) == TrackTypes.TIMECODE:
 
 			raise ValueError(f"Track must be a timecode track (got {TrackTypes.from_track(timecode_track)})")
+		
+		return cls(timecode_track.index)
 
 def format_track_label(track:avb.trackgroups.Track) -> str:
 	# TODO: Integrate this into that there `TrackTypes` enum maybe or something?
@@ -134,6 +137,69 @@ def format_track_labels(tracks:list[avb.trackgroups.Track]) -> str:
 	return " ".join(formatted_labels)
 
 
+class ComponentWalkItem(typing.NamedTuple):
+	"""A component encountered by `walk_components()`"""
+
+	component:avb.components.Component
+	"""The component itself"""
+
+	offset:int
+	"""Absolute offset of the component (in edit units) from the start of the walk"""
+
+	depth:int
+	"""How deeply nested the component is (the root component is 0)"""
+
+	parents:tuple[avb.components.Component, ...]
+	"""Chain of parent components, outermost first"""
+
+def get_component_children(component:avb.components.Component, offset:int=0) -> list[tuple[avb.components.Component, int]]|None:
+	"""Get the child components of a "compound" component with their absolute offsets, or `None` if it has no children"""
+
+	# Sequence components are laid out end-to-end, with transitions overlapping the previous component
+	if isinstance(component, avb.components.Sequence):
+		return [(child, offset + position) for _, position, child in component.positions()]
+	
+	# Sub-tracks of a TrackGroup (TrackEffects, EssenceGroups, Selectors, etc) run in parallel
+	elif isinstance(component, avb.trackgroups.TrackGroup):
+		return [(track.component, offset) for track in component.tracks if "component" in track.property_data]
+	
+	elif isinstance(component, avb.trackgroups.Track) and "component" in component.property_data:
+		return [(component.component, offset)]
+	
+	return None
+
+def walk_components(
+		component:avb.components.Component,
+		offset:int=0,
+		expand:collections.abc.Callable[[ComponentWalkItem], collections.abc.Iterable[tuple[avb.components.Component, int]]|None]|None=None
+	) -> collections.abc.Generator[ComponentWalkItem, None, None]:
+	"""
+	Walk a component tree depth-first, in timeline order, yielding each component with its absolute offset, depth, and parent chain.
+
+	`expand` is given each `ComponentWalkItem` and returns its `(child, absolute offset)` pairs to walk into, or `None` to
+	stop there.  By default, everything is expanded via `get_component_children()`.
+	"""
+
+	# NOTE: Uses an explicit stack rather than recursion, so deeply nested VFX timelines don't hit the recursion limit
+	
+	expand = expand or (lambda item: get_component_children(item.component, item.offset))
+
+	stack = [ComponentWalkItem(component, offset, 0, ())]
+
+	while stack:
+
+		item = stack.pop()
+		yield item
+
+		children = expand(item)
+		if not children:
+			continue
+
+		parents = item.parents + (item.component,)
+
+		# Push in reverse so children pop off in timeline order
+		stack.extend(ComponentWalkItem(child, child_offset, item.depth + 1, parents) for child, child_offset in reversed(list(children)))
+
 def get_timelines_from_bin(bin:avb.bin.Bin) -> collections.abc.Generator[avb.trackgroups.Composition,None,None]:
 	"""Get all top-level timelines ("Sequences" in Media Composer) in a given Avid bin"""
 	return (mob for mob in bin.toplevel() if isinstance(mob, avb.trackgroups.Composition))
@@ -182,6 +248,14 @@ def get_timecode_range_for_composition(
 		duration=timecode_component.length
 	)
 
+def get_start_timecode_for_composition(composition:avb.trackgroups.Composition) -> Timecode:
+	"""Starting master timecode of a composition, or zero if it doesn't have any"""
+
+	try:
+		return get_timecode_range_for_composition(composition).start
+	except ValueError:
+		return Timecode(0, rate=round(composition.edit_rate))
+
 def get_video_track_from_composition(composition:avb.trackgroups.Composition, media_kind:str="picture", track_index:int=1) -> avb.components.Sequence:
 	"""Get V1 by default"""
 
@@ -0,0 +1,128 @@
+"""Reverse usage index: where master clips and sources are used in a project's timelines"""
+
+import dataclasses, pathlib, collections.abc
+import avb
+from . import catalog, events, sourcerefs, timeline
+
+USAGE_INDEX_NAME = "usage"
+"""Name of the usage index in the `ProjectCatalog`"""
+
+USAGE_SCHEMA = """
+	CREATE TABLE IF NOT EXISTS clip_usage (
+		mob_id          TEXT    NOT NULL,
+		bin_path        TEXT    NOT NULL,
+		sequence_name   TEXT,
+		sequence_mob_id TEXT    NOT NULL,
+		track_label     TEXT    NOT NULL,
+		record_start    INTEGER NOT NULL,
+		record_end      INTEGER NOT NULL,
+		edit_rate       REAL    NOT NULL
+	);
+	CREATE INDEX IF NOT EXISTS clip_usage_by_mob_id ON clip_usage (mob_id);
+	CREATE INDEX IF NOT EXISTS clip_usage_by_bin    ON clip_usage (bin_path);
+"""
+"""SQLite schema for the usage index"""
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class ClipUsage:
+	"""A use of a mob (master clip, source, etc) somewhere in a timeline"""
+
+	mob_id:str
+	"""The mob being used"""
+
+	sequence_name:str
+	"""Name of the timeline it's used in"""
+
+	sequence_mob_id:str
+	"""Mob ID of the timeline it's used in"""
+
+	track_label:str
+	"""Track it's used on (eg `V1`)"""
+
+	record_start:int
+	"""Offset (in edit units) from the start of the timeline"""
+
+	record_end:int
+	"""Offset of the end (exclusive) from the start of the timeline"""
+
+	edit_rate:float
+	"""Edit rate of the timeline"""
+
+	bin_path:str|None = None
+	"""The bin containing the timeline"""
+
+def _referenced_mob_ids(event:events.SourceEvent) -> set[str]:
+	"""The mob the event cuts in, plus every mob down its source reference chain (master clip, source file, tape, ...)"""
+
+	mob_ids = {str(event.mob_id)}
+
+	try:
+		for source_clip, _ in sourcerefs.source_references_for_component(event.source_clip, event.source_offset - event.source_clip.start_time):
+			mob_ids.add(str(source_clip.mob_id))
+	except (ValueError, AttributeError):
+		# Partially resolvable is better than nothing
+		pass
+
+	return mob_ids
+
+def get_clip_usage_from_timeline(composition:avb.trackgroups.Composition, cache:events.NestedEventCache|None=None) -> collections.abc.Generator[ClipUsage, None, None]:
+	"""Get every use of every mob in a timeline"""
+
+	for track_label, track_events in events.flatten_timeline(composition, cache=cache).items():
+		for event in track_events:
+			for mob_id in _referenced_mob_ids(event):
+				yield ClipUsage(
+					mob_id          = mob_id,
+					sequence_name   = composition.name,
+					sequence_mob_id = str(composition.mob_id),
+					track_label     = track_label,
+					record_start    = event.record_offset,
+					record_end      = event.record_end,
+					edit_rate       = float(composition.edit_rate),
+				)
+
+def get_clip_usage_from_bin(bin_path:str|pathlib.Path) -> list[ClipUsage]:
+	"""Get every use of every mob in all timelines in a bin"""
+
+	cache:events.NestedEventCache = {}
+
+	with avb.open(bin_path) as bin_handle:
+		return [
+			usage
+			for composition in timeline.get_timelines_from_bin(bin_handle.content)
+			for usage in get_clip_usage_from_timeline(composition, cache=cache)
+		]
+
+def store_clip_usage(project_catalog:catalog.ProjectCatalog, bin_key:str, usages:list[ClipUsage]):
+	"""Write a bin's usage rows to the catalog"""
+
+	project_catalog.connection.executemany(
+		"INSERT INTO clip_usage (mob_id, bin_path, sequence_name, sequence_mob_id, track_label, record_start, record_end, edit_rate) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+		((u.mob_id, bin_key, u.sequence_name, u.sequence_mob_id, u.track_label, u.record_start, u.record_end, u.edit_rate) for u in usages)
+	)
+
+def update_usage_index(project_catalog:catalog.ProjectCatalog, bin_paths:collections.abc.Iterable[str|pathlib.Path], max_workers:int|None=None) -> catalog.CatalogUpdate:
+	"""Index clip usage for the given bins (typically all bins in a project), re-parsing only bins that have changed"""
+
+	project_catalog.ensure_schema(USAGE_SCHEMA)
+
+	return project_catalog.update_index(
+		index_name  = USAGE_INDEX_NAME,
+		bin_paths   = bin_paths,
+		extract     = get_clip_usage_from_bin,
+		store       = store_clip_usage,
+		tables      = ["clip_usage"],
+		max_workers = max_workers
+	)
+
+def where_used(project_catalog:catalog.ProjectCatalog, mob_id:avb.mobid.MobID|str) -> list[ClipUsage]:
+	"""Find everywhere a given mob (master clip, source mob, etc) is used, according to the catalog"""
+
+	project_catalog.ensure_schema(USAGE_SCHEMA)
+
+	return [
+		ClipUsage(*row) for row in project_catalog.connection.execute(
+			"SELECT mob_id, sequence_name, sequence_mob_id, track_label, record_start, record_end, edit_rate, bin_path FROM clip_usage WHERE mob_id = ? ORDER BY sequence_name, track_label, record_start",
+			(str(mob_id),)
+		)
+	]
@@ -0,0 +1,207 @@
+import avb, avbutils
+import sys, pathlib, re, datetime
+from timecode import Timecode
+import get_trts
+
+# START CONFIG
+
+CATALOG_PATH = pathlib.Path("attic_history.db")
+"""Where to keep the parsed Attic info.  Backups never change, so each one is only ever parsed once."""
+
+INDEX_NAME = "attic_reels"
+"""Name of the index in the catalog"""
+
+# END CONFIG
+
+USAGE = f"Usage: {__file__} path/to/Avid\\ Attic [--db {CATALOG_PATH}] [--head {get_trts.SLATE_HEAD_DURATION}] [--tail {get_trts.SLATE_TAIL_DURATION}]"
+
+# Attic backups are named like the bin with a backup number tacked on (eg `Reel 1.3.avb` or `Reel 1.avb.3`)
+pat_backup_name = re.compile(r"^(?P<bin_name>.*?)(\.\d+)?\.avb(\.\d+)?$", re.I)
+
+_ATTIC_SCHEMA = """
+	CREATE TABLE IF NOT EXISTS attic_reels (
+		bin_path       TEXT    NOT NULL,
+		bin_name       TEXT    NOT NULL,
+		backup_time    REAL    NOT NULL,
+		sequence_name  TEXT    NOT NULL,
+		reel_number    TEXT,
+		duration_total INTEGER NOT NULL,
+		rate           INTEGER NOT NULL,
+		date_modified  REAL    NOT NULL
+	);
+	CREATE INDEX IF NOT EXISTS attic_reels_by_bin ON attic_reels (bin_path);
+"""
+
+def get_backups_from_attic(attic_path:pathlib.Path) -> list[pathlib.Path]:
+	"""Find all bin backups in an Attic folder"""
+
+	return sorted(
+		p for p in attic_path.rglob("*.avb*")
+		if p.is_file() and pat_backup_name.match(p.name) and not any(part.startswith(".") for part in p.relative_to(attic_path).parts)
+	)
+
+def get_bin_name_from_backup(backup_path:pathlib.Path) -> str:
+	"""The name of the bin a backup was made from"""
+	return pat_backup_name.match(backup_path.name).group("bin_name")
+
+def get_reel_info_from_backup(backup_path:pathlib.Path) -> tuple[float, get_trts.ReelInfo|None]:
+	"""Get the backup time and latest sequence info from a bin backup, with `None` if it has no sequences"""
+
+	# Taken with the parse, since the backup may be rotated out of the Attic before it's stored
+	backup_time = backup_path.stat().st_mtime
+
+	# Backups without sequences are still recorded as parsed, so they aren't parsed again every run
+	try:
+		return backup_time, get_trts.get_reel_info_from_path(backup_path, sort_by=get_trts.BIN_SORTING_METHOD)
+	except Exception as e:
+		if str(e) == "No sequences found in bin":
+			return backup_time, None
+		raise
+
+def store_reel_info(project_catalog:avbutils.ProjectCatalog, bin_key:str, backup_info:tuple[float, get_trts.ReelInfo|None]):
+	"""Write a backup's reel info to the catalog"""
+
+	backup_time, reel_info = backup_info
+
+	if reel_info is None:
+		return
+
+	backup_path = pathlib.Path(bin_key)
+
+	project_catalog.connection.execute(
+		"INSERT INTO attic_reels (bin_path, bin_name, backup_time, sequence_name, reel_number, duration_total, rate, date_modified) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+		(
+			bin_key,
+			get_bin_name_from_backup(backup_path),
+			backup_time,
+			reel_info.sequence_name,
+			reel_info.reel_number,
+			reel_info.duration_total.frame_number,
+			reel_info.duration_total.rate,
+			reel_info.date_modified.timestamp()
+		)
+	)
+
+def update_attic_history(project_catalog:avbutils.ProjectCatalog, attic_path:pathlib.Path) -> avbutils.CatalogUpdate:
+	"""Parse any new backups in the Attic, in parallel"""
+
+	project_catalog.ensure_schema(_ATTIC_SCHEMA)
+
+	return project_catalog.update_index(
+		index_name = INDEX_NAME,
+		bin_paths  = get_backups_from_attic(attic_path),
+		extract    = get_reel_info_from_backup,
+		store      = store_reel_info,
+		tables     = ["attic_reels"],
+		prune      = False  # Avid rotates old backups out of the Attic, but their history is the point
+	)
+
+def get_reel_history(project_catalog:avbutils.ProjectCatalog) -> dict[str, list[tuple[datetime.datetime, get_trts.ReelInfo]]]:
+	"""Time series of backup time and reel info, per bin"""
+
+	history = {}
+
+	for bin_name, backup_time, sequence_name, reel_number, duration_total, rate, date_modified in project_catalog.connection.execute(
+		"SELECT bin_name, backup_time, sequence_name, reel_number, duration_total, rate, date_modified FROM attic_reels ORDER BY bin_name, backup_time"
+	):
+		history.setdefault(bin_name, []).append((
+			datetime.datetime.fromtimestamp(backup_time),
+			get_trts.ReelInfo(
+				sequence_name        = sequence_name,
+				duration_total       = Timecode(duration_total, rate=rate),
+				date_modified        = datetime.datetime.fromtimestamp(date_modified),
+				reel_number          = reel_number,
+				duration_head_leader = get_trts.SLATE_HEAD_DURATION,
+				duration_tail_leader = get_trts.SLATE_TAIL_DURATION,
+			)
+		))
+
+	return history
+
+def print_reel_history(history:dict[str, list[tuple[datetime.datetime, get_trts.ReelInfo]]]):
+	"""Print the TRT of each version of each reel over time"""
+
+	for bin_name in sorted(history, key=avbutils.human_sort):
+
+		print("")
+		print(bin_name)
+		print("=" * len(bin_name))
+
+		last_sequence_name = None
+		last_duration = None
+
+		for backup_time, reel_info in history[bin_name]:
+
+			# Backups are made whether anything changed or not
+			if reel_info.sequence_name == last_sequence_name and getattr(reel_info.duration_adjusted, "frame_number", 0) == last_duration:
+				continue
+
+			# NOTE: `duration_adjusted` bottoms out at a plain `0`
+			duration_frames = getattr(reel_info.duration_adjusted, "frame_number", 0)
+
+			if last_duration is None:
+				change = ""
+			else:
+				change_frames = duration_frames - last_duration
+				change = ("-" if change_frames < 0 else "+") + str(Timecode(abs(change_frames), rate=reel_info.duration_total.rate))
+
+			print(get_trts.COLUMN_SPACING.join([
+				str(backup_time.replace(microsecond=0)).ljust(19),
+				reel_info.sequence_name.ljust(get_trts.HEADERS["Reel Name"]),
+				str(reel_info.duration_adjusted).rjust(get_trts.HEADERS["Reel TRT"]),
+				change.rjust(12),
+			]))
+
+			last_sequence_name = reel_info.sequence_name
+			last_duration = duration_frames
+
+	print("")
+
+def process_args():
+	"""Look for --db option, plus the get_trts.py ones"""
+
+	global CATALOG_PATH
+
+	while "--db" in sys.argv:
+		db_index = sys.argv.index("--db")
+
+		CATALOG_PATH = pathlib.Path(sys.argv[db_index+1])
+
+		del sys.argv[db_index+1]
+		del sys.argv[db_index]
+
+	get_trts.process_args()
+
+def main():
+
+	if not len(sys.argv) > 1:
+		sys.exit(USAGE)
+
+	try:
+		process_args()
+	except:
+		sys.exit(USAGE)
+
+	attic_path = pathlib.Path(sys.argv[1])
+	if not attic_path.is_dir():
+		sys.exit(f"Attic folder not found at {attic_path}")
+
+	with avbutils.ProjectCatalog(CATALOG_PATH) as project_catalog:
+
+		results = update_attic_history(project_catalog, attic_path)
+		print(f"Parsed {len(results.updated)} new backup(s)")
+
+		for backup_path, e in results.failed.items():
+			print(f"Skipping {backup_path.name}: {e}")
+
+		history = get_reel_history(project_catalog)
+
+	if not history:
+		sys.exit(f"No sequences were found in any backups.")
+
+	get_trts.HEADERS["Reel Name"] = max(len(reel_info.sequence_name) for series in history.values() for _, reel_info in series)
+	print_reel_history(history)
+
+if __name__ == "__main__":
+
+	main()
@@ -1,6 +1,6 @@
 #!/usr/bin/env python
 
-import sys, typing, math
+import sys, typing, math, functools
 import avb, avbutils
 from PySide6 import QtWidgets, QtCore, QtGui
 
@@ -225,37 +225,271 @@ class BinViewItem(QtWidgets.QTreeWidgetItem):
 		headers = headers or []
 
 		try:
-			mastermob = avbutils.matchback_to_masterclip(mob)
-			sourcemob = avbutils.matchback_to_sourcemob(mastermob)
+			mastermob = cls.get_mastermob(mob)
 		except Exception as e:
 			return [mob.name, str(mob), f"Skipping {mob}: {e}"]
 		
-		print(mastermob.attributes)
+		return [cls.get_cell_data(mob, mastermob, header) for header in headers]
+	
+	@staticmethod
+	def get_mastermob(mob:avb.misc.MobRef) -> avb.trackgroups.Composition:
+		"""Match back to the masterclip, making sure it also resolves to a source mob"""
+
+		mastermob = avbutils.matchback_to_masterclip(mob)
+		avbutils.matchback_to_sourcemob(mastermob)
+		return mastermob
+	
+	@staticmethod
+	def get_cell_data(mob:avb.misc.MobRef, mastermob:avb.trackgroups.Composition, header:str):
+		"""Get the data for a single column"""
+
+		if header in mob.attributes:
+			return mob.attributes.get(header)
+		elif "_USER" in mob.attributes.get("_USER"):
+			return mob.attributes.get("_USER").get(header)
+		elif header in mastermob.attributes:
+			return mastermob.attributes.get(header)
+		elif "_USER" in mastermob.attributes:
+			return mastermob.attributes.get("_USER").get(header, "???")
+		else:
+			return "No attributes atom"
+
+class BinItemsModel(QtCore.QAbstractTableModel):
+	"""Bin items for the list view, computed on demand as rows are fetched and shown"""
+
+	FETCH_BATCH_SIZE = 500
+	"""Number of rows to make available each time the view wants more"""
+
+	CELL_CACHE_SIZE  = 50_000
+	"""Number of computed cells to keep around"""
+
+	MOB_CACHE_SIZE   = 5_000
+	"""Number of matched-back master clips to keep around"""
+
+	def __init__(self):
+		super().__init__()
+
+		self._mobs:list[avb.trackgroups.Composition] = []
+		self._headers:list[str] = []
+		self._order:list[int] = []
+		self._fetched_rows:int = 0
+		self._sort_keys:dict[int, list] = {}
+
+		self._reset_caches()
+	
+	def _reset_caches(self):
+		"""Fresh caches for a new set of items"""
+
+		self._cell_data = functools.lru_cache(maxsize=self.CELL_CACHE_SIZE)(self._compute_cell_data)
+		self._mastermob = functools.lru_cache(maxsize=self.MOB_CACHE_SIZE)(self._compute_mastermob)
+		self._sort_keys = {}
+	
+	def set_bin_items(self, mobs:list[avb.trackgroups.Composition], headers:list[str]):
+		"""Set the mobs and column headers to display"""
+
+		self.beginResetModel()
+		self._mobs    = list(mobs)
+		self._headers = list(headers)
+		self._order   = list(range(len(self._mobs)))
+		self._fetched_rows = 0
+		self._reset_caches()
+		self.endResetModel()
+	
+	def _compute_mastermob(self, mob_index:int) -> tuple[avb.trackgroups.Composition|None, Exception|None]:
+		"""Match back a mob to its master clip"""
+
+		try:
+			return BinViewItem.get_mastermob(self._mobs[mob_index]), None
+		except Exception as e:
+			return None, e
+	
+	def _compute_cell_data(self, mob_index:int, column:int) -> str:
+		"""Compute the display text for a cell"""
+
+		mob = self._mobs[mob_index]
+		mastermob, error = self._mastermob(mob_index)
+
+		if error is not None:
+			return [mob.name, str(mob), f"Skipping {mob}: {error}"][column] if column < 3 else ""
 		
-		data = []
-		for header in headers:
-			if header in mob.attributes:
-				data.append(mob.attributes.get(header))
-			elif "_USER" in mob.attributes.get("_USER"):
-				data.append(mob.attributes.get("_USER").get(header))
-			elif header in mastermob.attributes:
-				data.append(mastermob.attributes.get(header))
-			elif "_USER" in mastermob.attributes:
-				data.append(mastermob.attributes.get("_USER").get(header, "???"))
-			else:
-				data.append("No attributes atom")
+		try:
+			value = BinViewItem.get_cell_data(mob, mastermob, self._headers[column])
+		except Exception as e:
+			value = f"Error: {e}"
 
-		return data
+		return "" if value is None else str(value)
 	
+	def rowCount(self, parent:QtCore.QModelIndex=QtCore.QModelIndex()) -> int:
+		if parent.isValid():
+			return 0
+		return self._fetched_rows
+	
+	def columnCount(self, parent:QtCore.QModelIndex=QtCore.QModelIndex()) -> int:
+		if parent.isValid():
+			return 0
+		return len(self._headers)
+	
+	def canFetchMore(self, parent:QtCore.QModelIndex) -> bool:
+		if parent.isValid():
+			return False
+		return self._fetched_rows < len(self._mobs)
+	
+	def fetchMore(self, parent:QtCore.QModelIndex):
+		if parent.isValid():
+			return
+		
+		batch_size = min(self.FETCH_BATCH_SIZE, len(self._mobs) - self._fetched_rows)
+		if batch_size <= 0:
+			return
+		
+		self.beginInsertRows(QtCore.QModelIndex(), self._fetched_rows, self._fetched_rows + batch_size - 1)
+		self._fetched_rows += batch_size
+		self.endInsertRows()
+	
+	def headerData(self, section:int, orientation:QtCore.Qt.Orientation, role:QtCore.Qt.ItemDataRole=QtCore.Qt.ItemDataRole.DisplayRole):
+		if orientation == QtCore.Qt.Orientation.Horizontal and role == QtCore.Qt.ItemDataRole.DisplayRole:
+			return self._headers[section]
+		return None
+	
+	def data(self, index:QtCore.QModelIndex, role:QtCore.Qt.ItemDataRole=QtCore.Qt.ItemDataRole.DisplayRole):
+		if not index.isValid() or role != QtCore.Qt.ItemDataRole.DisplayRole:
+			return None
+		
+		return self._cell_data(self._order[index.row()], index.column())
+	
+	def is_marked_true(self, row:int, column:int) -> bool:
+		"""Whether a row's mob is marked "True" in a column, going by its own attributes so nothing is matched back"""
+
+		mob = self._mobs[self._order[row]]
+		attributes = (mob.attributes if "attributes" in mob.property_data else None) or {}
+		value = attributes.get(self._headers[column], (attributes.get("_USER") or {}).get(self._headers[column]))
+
+		return str(value) == "True"
+	
+	def _column_sort_keys(self, column:int) -> list:
+		"""Natural-sort keys for every item in a column, computed once per column"""
+
+		if column not in self._sort_keys:
+			self._sort_keys[column] = [avbutils.human_sort(self._cell_data(mob_index, column)) for mob_index in range(len(self._mobs))]
+		return self._sort_keys[column]
+	
+	def sort(self, column:int, order:QtCore.Qt.SortOrder=QtCore.Qt.SortOrder.AscendingOrder):
+		if not 0 <= column < len(self._headers):
+			return
+		
+		self.layoutAboutToBeChanged.emit()
+
+		old_persistent = self.persistentIndexList()
+		old_mob_indexes = [self._order[index.row()] for index in old_persistent]
+
+		keys = self._column_sort_keys(column)
+		self._order.sort(key=keys.__getitem__, reverse=(order == QtCore.Qt.SortOrder.DescendingOrder))
+
+		new_rows = {mob_index: row for row, mob_index in enumerate(self._order)}
+		self.changePersistentIndexList(old_persistent, [
+			self.index(new_rows[mob_index], index.column()) if new_rows[mob_index] < self._fetched_rows else QtCore.QModelIndex()
+			for mob_index, index in zip(old_mob_indexes, old_persistent)
+		])
+
+		self.layoutChanged.emit()
+	
+
+class FrameGridIndex:
+	"""Uniform grid over bin item positions, for finding the items in a region of the frame view"""
+
+	def __init__(self, cell_size:tuple[int,int]):
+
+		# NOTE: Cells should be at least as big as the largest thumbnail, so an item only spills into the next cell over
+		self._cell_width, self._cell_height = cell_size
+		self._positions:list[tuple[int,int]] = []
+		self._cells:dict[tuple[int,int], list[int]] = {}
+	
+	def _cell_for_point(self, x:int, y:int) -> tuple[int,int]:
+		return (math.floor(x / self._cell_width), math.floor(y / self._cell_height))
+	
+	def set_positions(self, positions:list[tuple[int,int]]):
+		"""Index a new set of item positions"""
+
+		self._positions = list(positions)
+		self._cells = {}
+		for item_index, (x, y) in enumerate(self._positions):
+			self._cells.setdefault(self._cell_for_point(x, y), []).append(item_index)
+	
+	def move_item(self, item_index:int, x:int, y:int):
+		"""Update the position of an item"""
+
+		old_cell = self._cell_for_point(*self._positions[item_index])
+		new_cell = self._cell_for_point(x, y)
+		self._positions[item_index] = (x, y)
+
+		if old_cell != new_cell:
+			self._cells[old_cell].remove(item_index)
+			if not self._cells[old_cell]:
+				del self._cells[old_cell]
+			self._cells.setdefault(new_cell, []).append(item_index)
+	
+	def position(self, item_index:int) -> tuple[int,int]:
+		"""Position of an item"""
+		return self._positions[item_index]
+	
+	def items_in_cell(self, cell:tuple[int,int]) -> list[int]:
+		"""Indexes of the items anchored in a cell"""
+		return self._cells.get(cell, [])
+	
+	def cells_in_rect(self, rect:QtCore.QRectF) -> list[tuple[int,int]]:
+		"""Occupied cells whose items may be visible in a given scene rect"""
+
+		# Start a cell early, for items anchored up/left of the rect that spill into it
+		col_start, row_start = self._cell_for_point(rect.left(), rect.top())
+		col_end, row_end     = self._cell_for_point(rect.right(), rect.bottom())
+
+		return [
+			(col, row)
+			for col in range(col_start - 1, col_end + 1)
+			for row in range(row_start - 1, row_end + 1)
+			if (col, row) in self._cells
+		]
+	
+	def bounding_rect(self, item_size:tuple[int,int]) -> QtCore.QRectF:
+		"""Bounding rect of all items, given the size of an item"""
+
+		if not self._positions:
+			return QtCore.QRectF()
+		
+		xs = [x for x, _ in self._positions]
+		ys = [y for _, y in self._positions]
+		return QtCore.QRectF(min(xs), min(ys), max(xs) - min(xs) + item_size[0], max(ys) - min(ys) + item_size[1])
 
 class FrameViewGraph(QtWidgets.QGraphicsView):
 
+	sig_viewport_changed = QtCore.Signal()
+
+	ZOOM_STEP = 1.25
+
 	def __init__(self, *args, **kwargs):
 
 		super().__init__(*args, **kwargs)
 
 		self.grid_scale = avbutils.THUMB_FRAME_MODE_RANGE.stop
 	
+	def scrollContentsBy(self, dx:int, dy:int):
+		super().scrollContentsBy(dx, dy)
+		self.sig_viewport_changed.emit()
+	
+	def resizeEvent(self, event:QtGui.QResizeEvent):
+		super().resizeEvent(event)
+		self.sig_viewport_changed.emit()
+	
+	def wheelEvent(self, event:QtGui.QWheelEvent):
+		"""Ctrl+Wheel to zoom"""
+
+		if not event.modifiers() & QtCore.Qt.KeyboardModifier.ControlModifier:
+			return super().wheelEvent(event)
+		
+		factor = self.ZOOM_STEP if event.angleDelta().y() > 0 else 1 / self.ZOOM_STEP
+		self.scale(factor, factor)
+		self.sig_viewport_changed.emit()
+	
 	def drawBackground(self, painter: QtGui.QPainter, rect: QtCore.QRectF | QtCore.QRect) -> None:
 
 		x_unit_size = avbutils.THUMB_UNIT_SIZE[0] * self.grid_scale
@@ -293,6 +527,9 @@ class FrameViewGraph(QtWidgets.QGraphicsView):
 
 class FrameView(QtWidgets.QWidget):
 
+	LOD_MIN_ITEM_PIXELS = 12
+	"""Thumbnails narrower than this on screen are drawn as one block per grid cell instead"""
+
 	def __init__(self, scale:typing.Optional[int]=avbutils.THUMB_FRAME_MODE_RANGE.start):
 
 		super().__init__()
@@ -300,49 +537,113 @@ class FrameView(QtWidgets.QWidget):
 		self.scene = QtWidgets.QGraphicsScene()
 		self.scale = 1
 
+		# Only items in visible grid cells get a graphics item
+		self.grid_index = FrameGridIndex((avbutils.THUMB_UNIT_SIZE[0] * avbutils.THUMB_FRAME_MODE_RANGE.stop, avbutils.THUMB_UNIT_SIZE[1] * avbutils.THUMB_FRAME_MODE_RANGE.stop))
+		self._cell_graphics:dict[tuple[int,int], list[tuple[int|None, QtWidgets.QGraphicsRectItem]]] = {}
+		self._showing_blocks:bool = False
+
 		self.setLayout(QtWidgets.QVBoxLayout())
 
 		self.frameview = FrameViewGraph(self.scene)
+		self.frameview.sig_viewport_changed.connect(self.update_visible_items)
 		self.layout().addWidget(self.frameview)
 
 		self.brush_bg = QtGui.QBrush()
 		self.brush_bg.setStyle(QtCore.Qt.BrushStyle.CrossPattern)
 		self.frameview.setBackgroundBrush(self.brush_bg )
+
+		self.brush_block = QtGui.QBrush(QtGui.QColor(128, 128, 128, 160))
+	
+	def _item_size(self, scale:int|None=None) -> tuple[int,int]:
+		scale = scale or self.scale
+		return (avbutils.THUMB_UNIT_SIZE[0] * scale, avbutils.THUMB_UNIT_SIZE[1] * scale)
 	
 	def set_items(self, items:list[avb.bin.BinItem]):
 		"""Set the items in the frame view"""
 
 		self.scene.clear()
+		self._cell_graphics = {}
 
-		for item in (x for x in items if x.user_placed):
-			icon = self.scene.addRect(item.x, item.y, avbutils.THUMB_UNIT_SIZE[0] * self.scale, avbutils.THUMB_UNIT_SIZE[1] * self.scale)
-			#print("Add", item.x, item.y)
-			icon.setFlags(QtWidgets.QGraphicsItem.GraphicsItemFlag.ItemIsMovable)
+		self.grid_index.set_positions([(item.x, item.y) for item in items if item.user_placed])
 		
 		self.set_view_scale(self.scale)
 		self.frameview.show()
+	
+	def _show_cell(self, cell:tuple[int,int], as_block:bool):
+		"""Create the graphics items for a grid cell"""
+
+		item_indexes = self.grid_index.items_in_cell(cell)
+		width, height = self._item_size()
+
+		if as_block:
+			positions = [self.grid_index.position(idx) for idx in item_indexes]
+			left, top = min(x for x, _ in positions), min(y for _, y in positions)
+			block = self.scene.addRect(left, top, max(x for x, _ in positions) + width - left, max(y for _, y in positions) + height - top, QtGui.QPen(QtCore.Qt.PenStyle.NoPen), self.brush_block)
+			block.setToolTip(f"{len(item_indexes)} item(s)")
+			self._cell_graphics[cell] = [(None, block)]
+			return
 
-	def set_view_scale(self, scale:int):
+		graphics = []
+		for item_index in item_indexes:
+			x, y = self.grid_index.position(item_index)
+			icon = self.scene.addRect(x, y, width, height)
+			icon.setFlags(QtWidgets.QGraphicsItem.GraphicsItemFlag.ItemIsMovable)
+			graphics.append((item_index, icon))
+		self._cell_graphics[cell] = graphics
+	
+	def _hide_cell(self, cell:tuple[int,int]):
+		"""Remove the graphics items for a grid cell, keeping any moves the user made"""
 
-		for item in self.scene.items():
-			if isinstance(item, QtWidgets.QGraphicsRectItem):
-				item.prepareGeometryChange()
-				new_rect = QtCore.QRectF(item.rect())
-				new_rect.setWidth(avbutils.THUMB_UNIT_SIZE[0] * scale)
-				new_rect.setHeight(avbutils.THUMB_UNIT_SIZE[1] * scale)
-				item.setRect(new_rect)
-				#print(item.rect())
-		
-		self.frameview.grid_scale = scale
-		self.scale = scale
-		self.scene.update()
-		#for item in self.scene.items():
-		#	item.setRect(item.scenePos().x(), item.scenePos().y(), avbutils.THUMB_UNIT_SIZE[0] * scale, avbutils.THUMB_UNIT_SIZE[1] * scale)
+		for item_index, graphic in self._cell_graphics.pop(cell):
+			if item_index is not None and not graphic.pos().isNull():
+				self.grid_index.move_item(item_index, round(graphic.rect().x() + graphic.pos().x()), round(graphic.rect().y() + graphic.pos().y()))
+			self.scene.removeItem(graphic)
+	
+	@QtCore.Slot()
+	def update_visible_items(self):
+		"""Create graphics items for newly-visible grid cells, and remove those scrolled out of view"""
 
+		show_blocks = self._item_size()[0] * self.frameview.transform().m11() < self.LOD_MIN_ITEM_PIXELS
 
+		# Switching between blocks and thumbnails: start over
+		if show_blocks != self._showing_blocks:
+			for cell in list(self._cell_graphics):
+				self._hide_cell(cell)
+			self._showing_blocks = show_blocks
 
+		visible_rect = self.frameview.mapToScene(self.frameview.viewport().rect()).boundingRect()
+		visible_cells = set(self.grid_index.cells_in_rect(visible_rect))
 
+		for cell in set(self._cell_graphics) - visible_cells:
+			self._hide_cell(cell)
+		
+		for cell in visible_cells - set(self._cell_graphics):
+			self._show_cell(cell, as_block=show_blocks)
 
+	def set_view_scale(self, scale:int):
+
+		self.frameview.grid_scale = scale
+		self.scale = scale
+		width, height = self._item_size()
+
+		# The scene won't grow to fit items that haven't been created yet
+		self.scene.setSceneRect(self.grid_index.bounding_rect(self._item_size()))
+
+		# Only the instantiated items need resizing; blocks get rebuilt
+		if self._showing_blocks:
+			for cell in list(self._cell_graphics):
+				self._hide_cell(cell)
+		else:
+			for graphics in self._cell_graphics.values():
+				for _, item in graphics:
+					item.prepareGeometryChange()
+					new_rect = QtCore.QRectF(item.rect())
+					new_rect.setWidth(width)
+					new_rect.setHeight(height)
+					item.setRect(new_rect)
+		
+		self.update_visible_items()
+		self.scene.update()
 
 class BinmanMain(QtWidgets.QWidget):
 	"""Main window component"""
@@ -352,6 +653,8 @@ class BinmanMain(QtWidgets.QWidget):
 
 		self.setLayout(QtWidgets.QHBoxLayout())
 
+		self._bin_handle:avb.file.AVBFile|None = None
+
 		self.tabs_binpreview = QtWidgets.QTabWidget()
 
 		self.binpreview = BinPreviewTree()
@@ -410,16 +713,11 @@ class BinmanMain(QtWidgets.QWidget):
 				[[str(idx+1), col.get("title"),avbutils.BinColumnFormat(col.get("format")).name.replace("_"," ").title(), str(col.get("type")), str(int(col.get("hidden")))] for idx, col in enumerate(bin.view_setting.columns)]
 			)
 
-			self.binpreview.clear()
-			self.binpreview.setHeaderLabels(col.get("title") for col in bin.view_setting.columns)
-			[self.binpreview.setColumnHidden(idx, col.get("hidden")) for idx, col in enumerate(bin.view_setting.columns)]
-			self.binpreview.addTopLevelItems(
-				#[BinViewItem(BinViewItem.get_column_data(x.mob)) for x in bin.items if x.user_placed and x.mob in bin.compositionmobs()]
-				[BinViewItem(BinViewItem.get_column_data(x.mob, headers=[col.get("title") for col in bin.view_setting.columns])) for x in bin.items if x.user_placed]
+			self.binpreview.model().set_bin_items(
+				[x.mob for x in bin.items if x.user_placed],
+				headers=[col.get("title") for col in bin.view_setting.columns]
 			)
-
-			for item in self.binpreview.findItems("True", QtCore.Qt.MatchFlag.MatchExactly, column=1):
-				item.setHidden(True)
+			[self.binpreview.setColumnHidden(idx, col.get("hidden")) for idx, col in enumerate(bin.view_setting.columns)]
 
 			self.binpreview.resizeColumnToContents(0)
 
@@ -430,22 +728,41 @@ class BinmanMain(QtWidgets.QWidget):
 	@QtCore.Slot()
 	def load_bin(self, bin_path:QtCore.QFileInfo):
 		print("Opening ", bin_path.absoluteFilePath())
-		with avb.open(bin_path.absoluteFilePath()) as bin_handle:
-			bin = bin_handle.content
-			wnd_main.setWindowTitle(bin_path.fileName())
-			self.new_bin_loaded(bin)
 
+		# NOTE: The bin stays open while it's displayed, since the list view reads items as they're scrolled to
+		if self._bin_handle is not None:
+			self._bin_handle.close()
+
+		self._bin_handle = avb.open(bin_path.absoluteFilePath())
+		bin = self._bin_handle.content
+		wnd_main.setWindowTitle(bin_path.fileName())
+		self.new_bin_loaded(bin)
 
-class BinPreviewTree(QtWidgets.QTreeWidget):
+
+class BinPreviewTree(QtWidgets.QTreeView):
 	"""The bin preview"""
 
 	def __init__(self):
 
 		super().__init__()
 		self.setIndentation(0)
+		self.setUniformRowHeights(True)
 		self.setAlternatingRowColors(True)
+		self.setModel(BinItemsModel())
 		self.setSortingEnabled(True)
-		self.clear()
+
+		self.model().rowsInserted.connect(self.hide_rows)
+	
+	@QtCore.Slot(QtCore.QModelIndex, int, int)
+	def hide_rows(self, parent:QtCore.QModelIndex, first:int, last:int):
+		"""Hide newly-fetched rows marked "True" in the second column"""
+
+		if self.model().columnCount() < 2:
+			return
+
+		for row in range(first, last+1):
+			if self.model().is_marked_true(row, 1):
+				self.setRowHidden(row, parent, True)
 
 
 class BinmanMenuBar(QtWidgets.QMenuBar):
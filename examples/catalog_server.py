@@ -0,0 +1,389 @@
+import avb, avbutils
+import sys, pathlib, json, threading, datetime, dataclasses, http.server, urllib.parse, sqlite3
+from timecode import Timecode
+
+# START CONFIG
+
+HOST = "127.0.0.1"
+"""Address to serve on (local only by default)"""
+
+PORT = 8765
+"""Port to serve on"""
+
+CATALOG_PATH = pathlib.Path("catalog_server.db")
+"""Where to keep the catalog between runs, so a restart only parses bins that changed in the meantime"""
+
+REFRESH_INTERVAL = 30
+"""Seconds between checks for changed bins"""
+
+REEL_NUMBER_BIN_COLUMN_NAME = "Reel #"
+"""The name of the Avid bin column from which to extract the Reel Number"""
+
+INDEX_NAME = "server"
+"""Name of the index in the catalog"""
+
+# END CONFIG
+
+USAGE = f"Usage: {__file__} path/to/project [--db {CATALOG_PATH}] [--port {PORT}]"
+
+ENDPOINTS = {
+	"/status":     "Catalog status and the last refresh",
+	"/bins":       "All bins, with their timelines and lock status",
+	"/reels":      "The latest timeline in each bin, with TRTs (?head=8:00&tail=3:23 to remove leaders, ?sort=date_modified|date_created|name)",
+	"/markers":    "Search marker comments (?q=VFX&limit=50, or raw=1 for FTS5 syntax)",
+	"/where-used": "Timelines using a mob (?mob_id=...)",
+	"/locks":      "Bins that are currently locked, and by whom",
+	"/refresh":    "Check for changed bins now, rather than waiting",
+}
+
+_TIMELINE_SCHEMA = """
+	CREATE TABLE IF NOT EXISTS bin_timelines (
+		bin_path      TEXT    NOT NULL,
+		name          TEXT,
+		mob_id        TEXT    NOT NULL,
+		length        INTEGER NOT NULL,
+		edit_rate     REAL    NOT NULL,
+		start_tc      INTEGER,
+		reel_number   TEXT,
+		date_created  REAL,
+		date_modified REAL
+	);
+	CREATE INDEX IF NOT EXISTS bin_timelines_by_bin ON bin_timelines (bin_path);
+"""
+
+@dataclasses.dataclass
+class TimelineSummary:
+	"""The basics of a timeline, for listings"""
+
+	name:str
+	mob_id:str
+	length:int
+	edit_rate:float
+	start_tc:int|None
+	reel_number:str|None
+	date_created:datetime.datetime
+	date_modified:datetime.datetime
+
+	@classmethod
+	def from_composition(cls, composition:avb.trackgroups.Composition) -> "TimelineSummary":
+
+		try:
+			start_tc = avbutils.get_timecode_range_for_composition(composition).start.frame_number
+		except ValueError:
+			start_tc = None
+
+		try:
+			reel_number = composition.attributes["_USER"][REEL_NUMBER_BIN_COLUMN_NAME]
+		except (KeyError, TypeError):
+			reel_number = None
+
+		return cls(
+			name          = composition.name,
+			mob_id        = str(composition.mob_id),
+			length        = composition.length,
+			edit_rate     = float(composition.edit_rate),
+			start_tc      = start_tc,
+			reel_number   = reel_number,
+			date_created  = composition.creation_time,
+			date_modified = composition.last_modified,
+		)
+
+def index_bin(bin_path:pathlib.Path) -> tuple[list[TimelineSummary], list[avbutils.ClipUsage], list[avbutils.IndexedMarker]]:
+	"""Parse a bin once for everything the server indexes"""
+
+	timelines, usages, markers = [], [], []
+	cache:avbutils.NestedEventCache = {}
+
+	with avb.open(bin_path) as bin_handle:
+		for composition in avbutils.get_timelines_from_bin(bin_handle.content):
+			timelines.append(TimelineSummary.from_composition(composition))
+			usages.extend(avbutils.get_clip_usage_from_timeline(composition, cache=cache))
+			markers.extend(avbutils.IndexedMarker.from_marker_info(composition, marker_info) for marker_info in avbutils.get_markers_from_timeline(composition))
+
+	return timelines, usages, markers
+
+def store_bin_index(project_catalog:avbutils.ProjectCatalog, bin_key:str, indexed:tuple[list[TimelineSummary], list[avbutils.ClipUsage], list[avbutils.IndexedMarker]]):
+	"""Write everything parsed from a bin to the catalog"""
+
+	timelines, usages, markers = indexed
+
+	project_catalog.connection.executemany(
+		"INSERT INTO bin_timelines (bin_path, name, mob_id, length, edit_rate, start_tc, reel_number, date_created, date_modified) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+		((bin_key, t.name, t.mob_id, t.length, t.edit_rate, t.start_tc, t.reel_number, t.date_created.timestamp(), t.date_modified.timestamp()) for t in timelines)
+	)
+	avbutils.store_clip_usage(project_catalog, bin_key, usages)
+	avbutils.store_markers(project_catalog, bin_key, markers)
+
+def open_catalog(db_path:pathlib.Path) -> avbutils.ProjectCatalog:
+	"""Open the catalog so the refresher can write while queries read"""
+
+	project_catalog = avbutils.ProjectCatalog(db_path)
+	project_catalog.connection.execute("PRAGMA journal_mode=WAL")
+	project_catalog.ensure_schema(_TIMELINE_SCHEMA)
+	project_catalog.ensure_schema(avbutils.USAGE_SCHEMA)
+	project_catalog.ensure_schema(avbutils.MARKER_SCHEMA)
+	return project_catalog
+
+class CatalogRefresher(threading.Thread):
+	"""Keeps the catalog up to date with the project in the background"""
+
+	def __init__(self, project_path:pathlib.Path, db_path:pathlib.Path, interval:float=REFRESH_INTERVAL):
+
+		super().__init__(daemon=True)
+
+		self._project_path = project_path
+		self._db_path = db_path
+		self._interval = interval
+		self._wake = threading.Event()
+
+		self.last_refresh:datetime.datetime|None = None
+		self.last_update:avbutils.CatalogUpdate|None = None
+		self.last_error:Exception|None = None
+
+	def refresh_now(self):
+		"""Check for changed bins without waiting for the next interval"""
+		self._wake.set()
+
+	def run(self):
+
+		# SQLite connections belong to the thread that made them
+		with open_catalog(self._db_path) as project_catalog:
+
+			while True:
+
+				# Keep refreshing through a bad scan (a bin renamed mid-scan, a locked database...), rather than
+				# quietly serving a stale catalog forever
+				try:
+					update = project_catalog.update_index(
+						index_name = INDEX_NAME,
+						bin_paths  = avbutils.get_bins_from_project(self._project_path),
+						extract    = index_bin,
+						store      = store_bin_index,
+						tables     = ["bin_timelines", "clip_usage", "marker_index"]
+					)
+
+				except Exception as e:
+					self.last_error = e
+					print(f"Refresh failed: {e}")
+
+				else:
+					self.last_update = update
+					self.last_error = None
+
+					for bin_path in update.updated:
+						print(f"Indexed {bin_path.name}")
+					for bin_path, e in update.failed.items():
+						print(f"Skipping {bin_path.name}: {e}")
+
+				self.last_refresh = datetime.datetime.now()
+
+				self._wake.wait(self._interval)
+				self._wake.clear()
+
+class CatalogRequestHandler(http.server.BaseHTTPRequestHandler):
+	"""Answers JSON queries from the catalog"""
+
+	server:"CatalogServer"
+
+	def do_GET(self):
+
+		url = urllib.parse.urlsplit(self.path)
+		params = {key: values[-1] for key, values in urllib.parse.parse_qs(url.query).items()}
+
+		handlers = {
+			"/":           lambda params: {"endpoints": ENDPOINTS},
+			"/status":     self.server.get_status,
+			"/bins":       self.server.get_bins,
+			"/reels":      self.server.get_reels,
+			"/markers":    self.server.search_markers,
+			"/where-used": self.server.where_used,
+			"/locks":      self.server.get_locks,
+			"/refresh":    self.server.refresh,
+		}
+
+		handler = handlers.get(url.path.rstrip("/") or "/")
+		if handler is None:
+			return self.send_json({"error": f"Unknown endpoint: {url.path}", "endpoints": ENDPOINTS}, 404)
+
+		try:
+			self.send_json(handler(params))
+		except (KeyError, ValueError, sqlite3.OperationalError) as e:
+			self.send_json({"error": f"Bad request: {e}"}, 400)
+
+	def send_json(self, data, status:int=200):
+
+		body = json.dumps(data, default=str).encode("utf-8")
+
+		self.send_response(status)
+		self.send_header("Content-Type", "application/json")
+		self.send_header("Content-Length", str(len(body)))
+		self.end_headers()
+		self.wfile.write(body)
+
+class CatalogServer(http.server.HTTPServer):
+	"""Serves queries from the catalog while a `CatalogRefresher` keeps it current"""
+
+	def __init__(self, address:tuple[str,int], project_path:pathlib.Path, db_path:pathlib.Path):
+
+		super().__init__(address, CatalogRequestHandler)
+
+		self.project_path = project_path
+		self.catalog = open_catalog(db_path)
+		self.refresher = CatalogRefresher(project_path, db_path)
+
+	def serve_forever(self, *args, **kwargs):
+		self.refresher.start()
+		super().serve_forever(*args, **kwargs)
+
+	def server_close(self):
+		super().server_close()
+		self.catalog.close()
+
+	def get_status(self, params:dict) -> dict:
+
+		update = self.refresher.last_update
+		return {
+			"project":      str(self.project_path),
+			"bins_indexed": len(self.catalog.indexed_bins(INDEX_NAME)),
+			"last_refresh": self.refresher.last_refresh,
+			"last_error":   None if self.refresher.last_error is None else str(self.refresher.last_error),
+			"last_update":  None if update is None else {
+				"updated": [str(p) for p in update.updated],
+				"removed": [str(p) for p in update.removed],
+				"failed":  {str(p): str(e) for p, e in update.failed.items()},
+			},
+		}
+
+	def _timelines_by_bin(self) -> dict[str, list[dict]]:
+
+		timelines = {}
+		for bin_path, name, mob_id, length, edit_rate, start_tc, reel_number, date_created, date_modified in self.catalog.connection.execute(
+			"SELECT bin_path, name, mob_id, length, edit_rate, start_tc, reel_number, date_created, date_modified FROM bin_timelines"
+		):
+			timelines.setdefault(bin_path, []).append({
+				"name":          name,
+				"mob_id":        mob_id,
+				"length":        length,
+				"edit_rate":     edit_rate,
+				"start_tc":      None if start_tc is None else str(Timecode(start_tc, rate=round(edit_rate))),
+				"reel_number":   reel_number,
+				"date_created":  datetime.datetime.fromtimestamp(date_created),
+				"date_modified": datetime.datetime.fromtimestamp(date_modified),
+			})
+		return timelines
+
+	def get_bins(self, params:dict) -> list[dict]:
+
+		timelines = self._timelines_by_bin()
+		return [
+			{
+				"path":      str(bin_path),
+				"lock":      avbutils.get_lockfile_for_bin(bin_path),
+				"timelines": sorted(timelines.get(str(bin_path), []), key=lambda t: avbutils.human_sort(t["name"] or "")),
+			}
+			for bin_path in sorted(self.catalog.indexed_bins(INDEX_NAME), key=lambda p: avbutils.human_sort(p.name))
+		]
+
+	def get_reels(self, params:dict) -> dict:
+
+		sort_key = {"date_modified": "date_modified", "date_created": "date_created", "name": "name"}[params.get("sort", "date_modified")]
+		head = params.get("head", "0:00")
+		tail = params.get("tail", "0:00")
+
+		reels = []
+		total = None
+
+		for bin_path, timelines in self._timelines_by_bin().items():
+
+			latest = max(timelines, key=lambda t: avbutils.human_sort(t["name"] or "") if sort_key == "name" else t[sort_key])
+			rate = round(latest["edit_rate"])
+			duration_adjusted = max(Timecode(latest["length"], rate=rate) - Timecode(head, rate=rate) - Timecode(tail, rate=rate), 0)
+
+			reels.append({
+				**latest,
+				"bin_path":          bin_path,
+				"lock":              avbutils.get_lockfile_for_bin(bin_path),
+				"duration_total":    str(Timecode(latest["length"], rate=rate)),
+				"duration_adjusted": str(duration_adjusted),
+			})
+
+			total = duration_adjusted if total is None else total + duration_adjusted
+
+		return {
+			"reels": sorted(reels, key=lambda r: avbutils.human_sort(r["name"] or "")),
+			"total_runtime": None if total is None else str(total),
+		}
+
+	def search_markers(self, params:dict) -> list[dict]:
+
+		return [
+			dataclasses.asdict(marker)
+			for marker in avbutils.search_markers(self.catalog, params["q"], limit=int(params.get("limit", 100)), raw=params.get("raw") == "1")
+		]
+
+	def where_used(self, params:dict) -> list[dict]:
+
+		return [dataclasses.asdict(usage) for usage in avbutils.where_used(self.catalog, params["mob_id"])]
+
+	def refresh(self, params:dict) -> dict:
+
+		self.refresher.refresh_now()
+		return {"refreshing": True}
+
+	def get_locks(self, params:dict) -> list[dict]:
+
+		return [
+			{"path": str(bin_path), "lock": lock}
+			for bin_path in self.catalog.indexed_bins(INDEX_NAME)
+			if (lock := avbutils.get_lockfile_for_bin(bin_path))
+		]
+
+def process_args():
+	"""Look for --db and --port options"""
+
+	global CATALOG_PATH
+	global PORT
+
+	while "--db" in sys.argv:
+		db_index = sys.argv.index("--db")
+
+		CATALOG_PATH = pathlib.Path(sys.argv[db_index+1])
+
+		del sys.argv[db_index+1]
+		del sys.argv[db_index]
+
+	while "--port" in sys.argv:
+		port_index = sys.argv.index("--port")
+
+		PORT = int(sys.argv[port_index+1])
+
+		del sys.argv[port_index+1]
+		del sys.argv[port_index]
+
+def main():
+
+	if not len(sys.argv) > 1:
+		sys.exit(USAGE)
+
+	try:
+		process_args()
+	except:
+		sys.exit(USAGE)
+
+	project_path = pathlib.Path(sys.argv[1])
+	if not project_path.is_dir():
+		sys.exit(f"Project folder not found at {project_path}")
+
+	server = CatalogServer((HOST, PORT), project_path, CATALOG_PATH)
+	print(f"Serving {project_path} on http://{HOST}:{PORT}/")
+
+	try:
+		server.serve_forever()
+	except KeyboardInterrupt:
+		pass
+	finally:
+		server.server_close()
+
+if __name__ == "__main__":
+
+	main()
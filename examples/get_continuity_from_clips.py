@@ -1,133 +1,82 @@
-import sys, pathlib, dataclasses, re, warnings
-import avb, avbutils, numbers_parser
-from timecode import Timecode, TimecodeRange
+import sys, pathlib, re, warnings
+import avbutils
 
-USAGE = f"Usage: {__file__} path/to/bins"
+USAGE = f"Usage: {__file__} path/to/bins [--pretty] [--csv|--xlsx]"
 
 pat_reelname = re.compile(r"FH REEL (?P<reel_number>\d+) v(?P<reel_version>[\d\.]+)", re.I)
 pat_sequential = re.compile(r"(?P<base>.*)(?P<digits>\d+)")
 
-@dataclasses.dataclass
-class ContinuitySceneInfo:
-	"""Continuity info for an individual scene"""
+def reel_name_short(reel_name:str) -> str:
+	"""Short reel label for the report.  Ex: `FH REEL 6 v15.3.2 - Continuity` -> `R6 v15.3.2`"""
 
-	scene_number:str
-	"""The scene numbeer (eg `Sc 032`)"""
-
-	duration:Timecode
-	"""Duration of the scene"""
-
-	description:str
-	"""Description of the scene"""
-
-	location:str
-	"""Location in which the scene takes place"""
-
-	time_of_day:str
-
-@dataclasses.dataclass
-class ReelInfo:
-	"""Continuity info per reel"""
-
-	reel_name:str
-	"""Source timeline name.  Ex: FH REEL 6 v15.3.2 - Continuity"""
-
-	reel_number:int
-	"""Example: 6"""
-
-	reel_version:str
-	"""No 'v'.  Example: 15.3.2"""
-
-	reel_timecode_range:TimecodeRange
-	"""The start/end Timecode range of this timeline"""
-
-	scenes:list[ContinuitySceneInfo]
-	"""The continuity info per scene in this reel"""
-
-	@property
-	def reel_trt(self) -> Timecode:
-		"""The TRT of this reel, based on total scene durations"""
-
-		return sum(scene.duration for scene in self.scenes)
-	
-	@property
-	def reel_name_short(self) -> str:
-		return f"R{self.reel_number} v{self.reel_version}"
+	reelname_match = pat_reelname.match(reel_name)
+	if not reelname_match:
+		print(f"Timeline name does not match the usual format: {reel_name}")
+		return reel_name
 
+	return f"R{reelname_match.group('reel_number')} v{reelname_match.group('reel_version')}"
 
-def timecode_as_duration(timecode:Timecode) -> str:
-	"""Format the timecode as a string without leading zeroes"""
+def reel_trt_label(reel_name:str) -> str:
+	"""Label for the reel TRT.  Ex: `R6 TRT:`"""
 
-	return "-" if timecode.is_negative else "" + str(timecode).lstrip("0:")
+	reelname_match = pat_reelname.match(reel_name)
+	return f"R{reelname_match.group('reel_number')} TRT:" if reelname_match else "Reel TRT:"
 
-def is_continuity_sequence(comp:avb.trackgroups.Composition) -> bool:
-	"""Determine if we're interested in this or not"""
+def print_timeline_pretty(scene_table:avbutils.SceneTable):
+	""""Pretty-print" the continuity"""
 
-	return comp.name.lower().endswith("continuity")
+	reel_durations = scene_table.reel_durations.tolist()
 
-def is_intended_for_continuity(comp:avb.components.Component) -> bool:
-	"""Determine if this continuity clip is meant to be included or not (so we can exclude things like head/tail leaders)"""
+	for reel, scene_rows in enumerate(scene_table.reel_rows()):
 
-	# Look for text in bin column "Ignore In List"
-	return not bool(comp.attributes.get("_USER").get("Ignore In List", "").strip())
+		print(f"{scene_table.reel_names[reel]}:")
 
-def get_continuity_tracks_from_timeline(sequence:avb.trackgroups.Composition) -> list[avb.trackgroups.Track]:
-	"""Choose the appropriate track in which the continuity clips reside"""
+		for idx in scene_rows:
+			print(f" - {scene_table.scene_numbers[idx].ljust(20)}{avbutils.format_duration(scene_table.durations[idx], scene_table.rate).rjust(11)}      {scene_table.descriptions[idx].ljust(48)}      {' - '.join([scene_table.locations[idx], scene_table.times_of_day[idx]])}")
 
-	# Looking for a video track (media_kind="picture") with the custom name "Continuity" (track.attributes.get("_COMMENT") == "Continuity")
-	return [t for t in sequence.tracks if t.media_kind == "picture" and hasattr(t,"attributes") and t.attributes.get("_COMMENT","").lower() == "continuity"]
+		print(f"Reel TRT: {avbutils.format_duration(reel_durations[reel], scene_table.rate)}")
 
-	# ALT: Return top-most video track
-	return sorted([t for t in sequence.tracks if t.media_kind == "picture"], key=lambda t: t.index)[-1]
+def print_timeline_tsv(scene_table:avbutils.SceneTable):
+	"""Output the continuity as tab-separated values"""
 
-def get_continuity_subclips_from_sequence(sequence:avb.components.Sequence) -> list[avb.components.Component]:
-	"""Return a list of subclips (assumed to be Continuity Clips) in the given sequence"""
+	reel_durations = scene_table.reel_durations.tolist()
 
-	# A sequence begins and ends with a zero-length `avb.components.Filler`, so trim those babies off
-	# TODO: Additional validation/filtering?
-	# NOTE: sequence.components[1:-1]  ...uhhh... doesn't work
-	return list(sequence.components)[1:-1]
+	for reel, scene_rows in enumerate(scene_table.reel_rows()):
 
+		print(f"{scene_table.reel_names[reel]}:")
 
-def print_timeline_pretty(timeline:avb.trackgroups.Composition, continuity_scenes:list[ContinuitySceneInfo]):
-	""""Pretty-print" the continuity"""
+		for idx in scene_rows:
+			print('\t'.join([
+				scene_table.scene_numbers[idx],
+				avbutils.format_duration(scene_table.durations[idx], scene_table.rate),
+				scene_table.descriptions[idx],
+				' - '.join([scene_table.locations[idx], scene_table.times_of_day[idx]])
+			]))
 
-	print(f"{timeline.name}:")
-	
-	timeline_trt = Timecode(0, rate=round(timeline.edit_rate))
+		print(f"Reel TRT: {avbutils.format_duration(reel_durations[reel], scene_table.rate)}")
 
-	for continuity_scene in continuity_scenes:
-		print(f" - {continuity_scene.scene_number.ljust(20)}{timecode_as_duration(continuity_scene.duration).rjust(11)}      {continuity_scene.description.ljust(48)}      {' - '.join([continuity_scene.location, continuity_scene.time_of_day])}")
-		timeline_trt += continuity_scene.duration
-	
-	print(f"Reel TRT: {timecode_as_duration(timeline_trt)}")
+def get_output_path(output_path:str|pathlib.Path) -> pathlib.Path:
+	"""Number the output file so an existing report isn't overwritten"""
 
-def print_timeline_tsv(timeline:avb.trackgroups.Composition, continuity_scenes:list[ContinuitySceneInfo]):
-	"""Output the continuity as tab-separated values"""
+	output_path_final = pathlib.Path(output_path)
 
-	print(f"{timeline.name}:")
-	
-	timeline_trt = Timecode(0, rate=round(timeline.edit_rate))
-
-	for continuity_scene in continuity_scenes:
-		print('\t'.join([
-			continuity_scene.scene_number,
-			timecode_as_duration(continuity_scene.duration),
-			continuity_scene.description,
-			' - '.join([continuity_scene.location, continuity_scene.time_of_day])
-		]))
-		timeline_trt += continuity_scene.duration
-	
-	print(f"Reel TRT: {timecode_as_duration(timeline_trt)}")
+	while output_path_final.exists():
+		sequential_filename = pat_sequential.match(output_path_final.stem)
+		if sequential_filename:
+			name_base = sequential_filename.group("base")
+			name_digits = str(int(sequential_filename.group("digits"))+1).zfill(len(sequential_filename.group("digits")))
+		else:
+			name_base = output_path_final.stem
+			name_digits = "_001"
+		output_path_final = output_path_final.with_stem(name_base + name_digits)
 
-def print_numbers_doc(reels_info:list[ReelInfo], output_path:str="out.numbers", template_path:str|None=None):
-	"""Create a Numbers document for the given"""
+	return output_path_final
 
-	def _num_columns(table:numbers_parser.document.Table) -> int:
-		"""Return the number of columns in a table"""
-		# TODO: Probably really slow
+def print_numbers_doc(layout:avbutils.ContinuityReportLayout, output_path:str="out.numbers", template_path:str|None=None) -> pathlib.Path:
+	"""Create a Numbers document from the report layout"""
 
-		return max(len(row) for row in table.rows())
+	# Only needed for Numbers output
+	import numbers_parser
 
 	def _doc_style_from_existing(doc:numbers_parser.Document, existing:numbers_parser.Style, **kwargs) -> numbers_parser.Style:
 		"""Add a document style based on an existing"""
@@ -162,8 +111,10 @@ def print_numbers_doc(reels_info:list[ReelInfo], output_path:str="out.numbers",
 			[table.set_cell_border(x, col_start, ["left"], border_style) for x in range(row_start, row_end+1)]
 			[table.set_cell_border(x, col_end,  ["right"], border_style) for x in range(row_start, row_end+1)]
 
-	def _draw_blank_row(table:numbers_parser.document.Table):
-		[table.set_cell_border(row_num, x, ["left","right"], numbers_parser.Border(0.0, numbers_parser.RGB(0, 0, 0), "none")) for x in range(5)]
+	def _draw_blank_row(table:numbers_parser.document.Table, row_num:int):
+		[table.set_cell_border(row_num, x, ["left","right"], numbers_parser.Border(0.0, numbers_parser.RGB(0, 0, 0), "none")) for x in range(num_columns)]
+
+	num_columns = layout.num_columns
 
 	doc = numbers_parser.Document(template_path) or numbers_parser.Document()
 	
@@ -232,203 +183,147 @@ def print_numbers_doc(reels_info:list[ReelInfo], output_path:str="out.numbers",
 	#sheet.add_table("Continuity Per Reel")
 	table = sheet.tables[0]
 
+	border_none  = numbers_parser.Border(2.0, numbers_parser.RGB(0,0,0), "none")
+	border_solid = numbers_parser.Border(2.0, numbers_parser.RGB(0,0,0), "solid")
 
-	row_num = 0
+	# Header row, then a blank row
+	for col, header in enumerate(layout.rows[0][1:], start=1):
+		table.write(0, col, header, style=style_header_column)
 
-	table.write(row_num, 1, "Scene", style=style_header_column)
-	table.write(row_num, 2, "Duration", style=style_header_column)
-	table.write(row_num, 3, "Scene Description", style=style_header_column)
-	table.write(row_num, 4, "Location", style=style_header_column)
+	table.set_cell_style(0, 0, style_blank_row)
+	_draw_borders(table, 0, 0, 1, num_columns-1)
+	table.set_cell_border(0, 0, ["left","top","bottom"], border_none)
 
-	table.set_cell_style(row_num, 0, style_blank_row)
-	_draw_borders(table, row_num, row_num, 1, _num_columns(table)-1)
-	table.set_cell_border(row_num, 0, ["left","top","bottom"], numbers_parser.Border(2.0, numbers_parser.RGB(0,0,0), "none"))
-	
-	row_num += 1
-	_draw_blank_row(table)
-	#table.write(row_num, 1, "")
-	
 	table.num_header_cols = 0
 	table.num_header_rows = 1
 
-	_draw_blank_row(table)
-	[table.set_cell_style(row_num, x, style_blank_row) for x in range(_num_columns(table))]
+	_draw_blank_row(table, 1)
+	[table.set_cell_style(1, x, style_blank_row) for x in range(num_columns)]
 
-	row_num += 1
+	# Scene rows, one style per column
+	scene_styles = [style_reel_column, default_style, style_scene_duration, default_style, style_scene_location]
 
-	for reel_info in reels_info:
+	for reel_block in layout.reel_blocks:
 
-		row_start = row_num
+		for row_num in reel_block:
+			for col, (value, style) in enumerate(zip(layout.rows[row_num], scene_styles)):
+				if col or value:
+					table.write(row_num, col, value, style=style)
+				else:
+					table.set_cell_style(row_num, col, style)
 
-		for scene_info in reel_info.scenes:
+		row_start, row_end = reel_block[0], reel_block[-1]
 
-			table.write(row_num, 1, scene_info.scene_number, style=default_style)
-			
-			table.write(row_num, 2, str(scene_info.duration).lstrip("0:"), style=style_scene_duration)
-			table.write(row_num, 3, scene_info.description, style=default_style)
-			table.write(row_num, 4, ' - '.join([scene_info.location, scene_info.time_of_day]), style=style_scene_location)
-
-			row_num += 1
-		
-		row_end = row_num-1
-
-		# Write Reel Info Column
-		# TODO: Handle reels with scenes < reel info rows
-		table.write(row_start, 0, f"R{reel_info.reel_number} v{reel_info.reel_version}")
-		table.write(row_end-1, 0, f"R{reel_info.reel_number} TRT:")
-		table.write(row_end, 0, str(reel_info.reel_trt).lstrip("0:"))
-		
-		
+		table.set_cell_style(row_end, 0, style_reel_trt)
 		table.merge_cells(numbers_parser.xl_rowcol_to_cell(row_start,0)+":"+numbers_parser.xl_rowcol_to_cell(row_end-2,0))
 
 		# BORDERS AHOY
 
-		# Clear out reel column header
-		[table.set_cell_border(x, 0, ["top", "bottom"], numbers_parser.Border(2.0, numbers_parser.RGB(0,0,0), "none")) for x in range(row_start, row_end+1)]
+		# Clear out reel column header, with a side border against the scenes
+		[table.set_cell_border(x, 0, ["top", "bottom"], border_none) for x in reel_block]
+		[table.set_cell_border(x, 1, ["left"], border_solid) for x in reel_block]
 
-		# Add side border to reel column header
-		[table.set_cell_border(x, 1, ["left"], numbers_parser.Border(2.0, numbers_parser.RGB(0,0,0), "solid")) for x in range(row_start, row_end+1)]
-
-		# Reel column backround color
-		[table.set_cell_style(x, 0, style_reel_column) for x in range(row_start, row_end+1)]
-		table.set_cell_style(row_end, 0, style_reel_trt)
-
-		# Draw a border around dat reel
-		_draw_borders(table, row_start, row_end, 0, _num_columns(table)-1)
-		
-		# Blank row
-		_draw_blank_row(table)
-		row_num += 1
+		# Draw a border around dat reel, then the blank row after it
+		_draw_borders(table, row_start, row_end, 0, num_columns-1)
+		_draw_blank_row(table, row_end+1)
 
 	# Write LP TRT
-	table.write(row_num-1, 0, "LP TRT:", style=style_lp_label)
-	table.set_cell_border(row_num-1, 0, ["left","right"], numbers_parser.Border(2.0, numbers_parser.RGB(0,0,0), "solid"))
-
-	table.write(row_num, 0, str(sum(reel.reel_trt for reel in reels_info)).lstrip("0:"), style=style_lp_trt)
-	table.set_cell_border(row_num, 0, ["left","right","bottom"], numbers_parser.Border(2.0, numbers_parser.RGB(0,0,0), "solid"))
+	label_row, trt_row = layout.total_rows
 
-	[table.set_cell_border(row_num-1, x, ["right","bottom"], numbers_parser.Border(2.0, numbers_parser.RGB(0,0,0), "none")) for x in range(1,_num_columns(table))]
-	[table.set_cell_border(row_num,   x, ["right","bottom"], numbers_parser.Border(2.0, numbers_parser.RGB(0,0,0), "none")) for x in range(1,_num_columns(table))]
+	table.write(label_row, 0, layout.rows[label_row][0], style=style_lp_label)
+	table.set_cell_border(label_row, 0, ["left","right"], border_solid)
 
+	table.write(trt_row, 0, layout.rows[trt_row][0], style=style_lp_trt)
+	table.set_cell_border(trt_row, 0, ["left","right","bottom"], border_solid)
 
-	output_path_final = pathlib.Path(output_path)
-
-	while output_path_final.exists():
-		sequential_filename = pat_sequential.match(output_path_final.stem)
-		if sequential_filename:
-			name_base = sequential_filename.group("base")
-			name_digits = str(int(sequential_filename.group("digits"))+1).zfill(len(sequential_filename.group("digits")))
-		else:
-			name_base = output_path_final.stem
-			name_digits = "_001"
-		output_path_final = output_path_final.with_stem(name_base + name_digits)
+	[table.set_cell_border(label_row, x, ["right","bottom"], border_none) for x in range(1, num_columns)]
+	[table.set_cell_border(trt_row,   x, ["right","bottom"], border_none) for x in range(1, num_columns)]
 
-	
 	# Cleanup formatting
 	DEFAULT_HEIGHT = 14
 	DEFAULT_WIDTHS = [62, 90, 60, 305, 200]
-	for idx, row in enumerate(table.rows()):
-		[table.col_width(x, DEFAULT_WIDTHS[x]) for x in range(_num_columns(table))]
-		table.row_height(idx, DEFAULT_HEIGHT)
-	
+
+	[table.col_width(x, DEFAULT_WIDTHS[x]) for x in range(num_columns)]
+	[table.row_height(x, DEFAULT_HEIGHT) for x in range(len(layout.rows))]
+
 	# Too much cleanup
 	table.row_height(0, 18)
-			
-	
+
+	output_path_final = get_output_path(output_path)
 	doc.save(output_path_final)
 
 	return output_path_final
 
+def print_xlsx_doc(layout:avbutils.ContinuityReportLayout, output_path:str="out.xlsx") -> pathlib.Path:
+	"""Create an Excel document from the report layout"""
 
-def get_continuity_list_for_timeline(timeline:avb.trackgroups.Composition) -> list[ContinuitySceneInfo]:
-	"""Get the continuity info for a given timeline/reel"""
-
-	continuity_tracks = get_continuity_tracks_from_timeline(timeline)
-	if len(continuity_tracks) != 1:
-		raise ValueError(f"Found {len(continuity_tracks)} continuity tracks")
-	continuity_track = continuity_tracks[0]
+	# Only needed for Excel output
+	import openpyxl
 
-	continuity_sequence = continuity_track.component
-	continuity_subclips = get_continuity_subclips_from_sequence(continuity_sequence)
+	DEFAULT_WIDTHS = [10, 14, 10, 50, 32]
 
-	timeline_continuity:list[ContinuitySceneInfo] = list()
+	workbook = openpyxl.Workbook(write_only=True)
+	sheet = workbook.create_sheet("Continuity")
 
-	for continuity_subclip in continuity_subclips:
+	for col, width in enumerate(DEFAULT_WIDTHS[:layout.num_columns]):
+		sheet.column_dimensions[openpyxl.utils.get_column_letter(col+1)].width = width
 
-		continuity_masterclip = avbutils.matchback_sourceclip(continuity_subclip)
-		
-		# Need to do a recursive matchback thing, but for now we know there won't be a big heirarchy
-		if not avbutils.composition_is_masterclip(continuity_masterclip):
-			print(f"** Skipping {continuity_masterclip}")
-			continue
+	for row in layout.rows:
+		sheet.append(row)
 
-		if not is_intended_for_continuity(continuity_masterclip):
-			continue
-
-		timeline_continuity.append(ContinuitySceneInfo(
-			scene_number=continuity_masterclip.name or "Sc ???",
-			duration=Timecode(continuity_subclip.length, rate=round(continuity_subclip.edit_rate)),
-			description=continuity_masterclip.attributes.get("_USER").get("Comments","-"),
-			location=continuity_masterclip.attributes.get("_USER").get("Location","-"),
-			time_of_day=continuity_masterclip.attributes.get("_USER").get("Time of Day","-")
-		))
-	
-	return timeline_continuity
+	output_path_final = get_output_path(output_path)
+	workbook.save(output_path_final)
 
-def get_continuity_for_reel(timeline:avb.trackgroups.Composition) -> ReelInfo:
-	"""Get the continuity of a given reel"""
-			
-	reelname_match = pat_reelname.match(timeline.name)
-	if not reelname_match:
-		print(f"Timeline name does not match the usual format: {timeline.name}")
-
-	continuity_scenes = get_continuity_list_for_timeline(timeline)
-
-	return ReelInfo(
-		reel_name=reelname_match.group(0),
-		reel_number=reelname_match.group("reel_number"),
-		reel_version=reelname_match.group("reel_version"),
-		reel_timecode_range=avbutils.get_timecode_range_for_composition(timeline),
-		scenes = continuity_scenes
-	)
+	return output_path_final
 
-def get_continuity_for_all_reels_in_bin(bin_path:str, print_function=print_timeline_tsv):
-	"""Generate the continuity report for all reels in a given bin"""
+def print_csv_doc(layout:avbutils.ContinuityReportLayout, output_path:str="out.csv") -> pathlib.Path:
+	"""Create a CSV from the report layout"""
 
-	print(f"Opening bin {pathlib.Path(bin_path).name}...")
+	output_path_final = get_output_path(output_path)
+	avbutils.write_continuity_csv(layout, output_path_final)
 
-	master_trt = Timecode(0, rate=24)
+	return output_path_final
 
-	with avb.open(bin_path) as bin_handle:
+def get_continuity_for_all_reels_in_bins(bin_paths:list[str], print_function=print_timeline_tsv, doc_function=print_numbers_doc, doc_suffix:str=".numbers"):
+	"""Generate the continuity report for all reels in the given bins"""
 
-		print("Finding continuity sequences...")
-		timelines = sorted([seq for seq in avbutils.get_timelines_from_bin(bin_handle.content) if is_continuity_sequence(seq)],key=lambda x: avbutils.human_sort(x.name))
+	print(f"Reading continuity from {len(bin_paths)} bin(s)...")
 
-		reels:list[ReelInfo] = list()
+	scene_table = avbutils.get_scene_table_from_bins(bin_paths)
+	print_function(scene_table)
 
-		for timeline in timelines:
-			reels.append(get_continuity_for_reel(timeline))
-			
-		master_trt = sum(reel.reel_trt for reel in reels)
+	layout = avbutils.ContinuityReportLayout.from_scene_table(scene_table, reel_label=reel_name_short, reel_trt_label=reel_trt_label)
 
-		numbers_filename = pathlib.Path(bin_path).with_suffix(".numbers").name
+	output_path = pathlib.Path(bin_paths[0]).with_suffix(doc_suffix).name
 
-		final_path = print_numbers_doc(reels, output_path=numbers_filename, template_path=pathlib.Path(__file__).parent / "templates/FHS_Continuity_template.numbers")
+	if doc_function is print_numbers_doc:
+		final_path = doc_function(layout, output_path=output_path, template_path=pathlib.Path(__file__).parent / "templates/FHS_Continuity_template.numbers")
+	else:
+		final_path = doc_function(layout, output_path=output_path)
 
-	print(f"Total Feature Runtime: {timecode_as_duration(master_trt)}")
+	print(f"Total Feature Runtime: {avbutils.format_duration(scene_table.total_duration, scene_table.rate)}")
 	print("")
 
-	print("Nubmers document output to", final_path)
+	print("Report output to", final_path)
 
 if __name__ == "__main__":
 	
 	print_style = print_timeline_tsv
+	doc_function, doc_suffix = print_numbers_doc, ".numbers"
 
 	if "--pretty" in sys.argv:
 		print_style = print_timeline_pretty
 		del sys.argv[sys.argv.index("--pretty")]
 
+	if "--csv" in sys.argv:
+		doc_function, doc_suffix = print_csv_doc, ".csv"
+		del sys.argv[sys.argv.index("--csv")]
+
+	if "--xlsx" in sys.argv:
+		doc_function, doc_suffix = print_xlsx_doc, ".xlsx"
+		del sys.argv[sys.argv.index("--xlsx")]
+
 	if not len(sys.argv) > 1:
 		sys.exit(USAGE)
 	
-	get_continuity_for_all_reels_in_bin(sys.argv[1], print_style)
\ No newline at end of file
+	get_continuity_for_all_reels_in_bins(sys.argv[1:], print_style, doc_function, doc_suffix)
@@ -39,7 +39,7 @@ USAGE = f"Usage: {__file__} path/to/avbs [--head {SLATE_HEAD_DURATION}] [--tail
 BinInfo = namedtuple("BinInfo","reel path lock")
 
 
-@dataclasses.dataclass(frozen=True)
+@dataclasses.dataclass(frozen=True, slots=True)
 class ReelInfo:
 	"""Representation of a Sequence from an Avid bin"""
 
@@ -70,7 +70,7 @@ class ReelInfo:
 	def lfoa(self) -> str:
 		"""Last frame of action at 35mm 4-perf"""
 		frame_number = max((self.duration_total - self.duration_tail_leader).frame_number - 1, 0)
-		return f"{frame_number//16}+{(frame_number%16):02}"
+		return avbutils.FILM_35MM_4PERF.format_footage(frame_number)
 
 def get_reel_number_from_timeline_attributes(attrs:avb.components.core.AVBPropertyData) -> str|None:
 	"""Extract the 'Reel #' bin column data from a sequence's attributes.  Returns None if not set."""
@@ -10,6 +10,9 @@ class MarkerViewer(QtWidgets.QWidget):
 		self.setLayout(QtWidgets.QVBoxLayout())
 
 		self.cmb_timelines   = QtWidgets.QComboBox()
+		self.txt_filter      = QtWidgets.QLineEdit()
+		self.txt_filter.setPlaceholderText("Filter markers...")
+		self.txt_filter.setClearButtonEnabled(True)
 		self.view_markerlist = QtWidgets.QTreeView()
 		self.view_markerlist.setSortingEnabled(True)
 		self.view_markerlist.setUniformRowHeights(True)
@@ -17,10 +20,11 @@ class MarkerViewer(QtWidgets.QWidget):
 		self.view_markerlist.setIndentation(0)
 
 		self.layout().addWidget(self.cmb_timelines)
+		self.layout().addWidget(self.txt_filter)
 		self.layout().addWidget(self.view_markerlist)
 
-class MarkerViewItem(QtCore.QObject):
-	"""Marker view object for view model"""
+class MarkerColumns:
+	"""Columnar store of marker display data, one list per header"""
 
 	HEADERS = [
 		"Timeline",
@@ -34,47 +38,72 @@ class MarkerViewItem(QtCore.QObject):
 		"Comment",
 	]
 
-	def __init__(self, data:dict):
-		super().__init__()
-		self._data = {}
-		for header in self.HEADERS:
-			self._data.update(
-				{header: data.get(header) or ""}
-			)
+	SEARCH_HEADERS = ["Track", "User", "Comment"]
+	"""Columns matched by the text filter"""
+
+	def __init__(self):
+
+		self.columns:list[list[str]] = [[] for _ in self.HEADERS]
+
+		# Lowercase keys are built once as markers come in, so filtering never has to go through the model
+		self.timeline_keys:list[str] = []
+		self.search_keys:list[str] = []
+	
+	def __len__(self) -> int:
+		return len(self.timeline_keys)
 	
-	def data(self, column:str, role:QtCore.Qt.ItemDataRole):
+	def append(self, data:dict):
+		"""Add a marker's display data"""
 
-		if column == "Color" and role == QtCore.Qt.ItemDataRole.DecorationRole:
-			return MarkerIcons.get_marker_icon(self._data.get("Color"))
+		for header, column in zip(self.HEADERS, self.columns):
+			column.append(data.get(header) or "")
+		
+		self.timeline_keys.append(str(data.get("Timeline") or "").lower())
+		self.search_keys.append("\n".join(str(data.get(header) or "") for header in self.SEARCH_HEADERS).lower())
+	
+	def extend(self, other:"MarkerColumns"):
+		"""Add all the markers from another store"""
 
-		if role == QtCore.Qt.ItemDataRole.DisplayRole:
-			return self._data.get(column,"?")
-		else:
-			return None
+		for column, other_column in zip(self.columns, other.columns):
+			column.extend(other_column)
+		
+		self.timeline_keys.extend(other.timeline_keys)
+		self.search_keys.extend(other.search_keys)
+	
+	def value(self, row:int, column:int) -> str:
+		return self.columns[column][row]
 
 class MarkerViewProxy(QtCore.QSortFilterProxyModel):
 
 	def __init__(self, *args, **kwargs):
 
 		super().__init__(*args, **kwargs)
-		self._filter:str = None
+		self._timeline_key:str = ""
+		self._search_key:str = ""
 		self._hidden_columns = []
 	
 	def filterAcceptsRow(self, source_row, parent:QtCore.QModelIndex):
-		if not self._filter:
-			return True
+
+		store = self.sourceModel().markers()
+
+		if self._timeline_key and store.timeline_keys[source_row] != self._timeline_key:
+			return False
 		
-		val = self.sourceModel().data(self.sourceModel().index(source_row, 0, parent), QtCore.Qt.ItemDataRole.DisplayRole)
-		return val == self._filter
+		return not self._search_key or self._search_key in store.search_keys[source_row]
 	
 	def filterAcceptsColumn(self, source_column, parent:QtCore.QModelIndex):
-		col = MarkerViewItem.HEADERS[source_column]
+		col = MarkerColumns.HEADERS[source_column]
 
 		return col not in self._hidden_columns
 	
 	@QtCore.Slot(str)
 	def setFilter(self, filter:str):
-		self._filter = filter
+		self._timeline_key = (filter or "").lower()
+		self.invalidateRowsFilter()
+	
+	@QtCore.Slot(str)
+	def setSearchFilter(self, search:str):
+		self._search_key = search.strip().lower()
 		self.invalidateRowsFilter()
 
 	def setHiddenColumns(self, columns:list[str]):
@@ -87,15 +116,20 @@ class MarkerViewModel(QtCore.QAbstractItemModel):
 	def __init__(self):
 		super().__init__()
 
-		self._marker_data:list[MarkerViewItem] = []
+		self._markers = MarkerColumns()
+		self._color_column = MarkerColumns.HEADERS.index("Color")
+	
+	def markers(self) -> MarkerColumns:
+		"""The underlying marker store"""
+		return self._markers
 
-	def columnCount(self, parent:QtCore.QModelIndex) -> int:
-		return len(MarkerViewItem.HEADERS)
+	def columnCount(self, parent:QtCore.QModelIndex=QtCore.QModelIndex()) -> int:
+		return len(MarkerColumns.HEADERS)
 	
-	def rowCount(self, parent:QtCore.QModelIndex) -> int:
+	def rowCount(self, parent:QtCore.QModelIndex=QtCore.QModelIndex()) -> int:
 		if parent.isValid():
 			return 0
-		return len(self._marker_data)
+		return len(self._markers)
 	
 	def parent(self, index:QtCore.QModelIndex) -> QtCore.QModelIndex:
 		return QtCore.QModelIndex()
@@ -105,67 +139,139 @@ class MarkerViewModel(QtCore.QAbstractItemModel):
 			return None
 		
 		if role == QtCore.Qt.ItemDataRole.DisplayRole:
-			return MarkerViewItem.HEADERS[section]
+			return MarkerColumns.HEADERS[section]
 		
-	def index(self, row:int, col:int, parent:QtCore.QModelIndex) -> QtCore.QModelIndex:
+	def index(self, row:int, col:int, parent:QtCore.QModelIndex=QtCore.QModelIndex()) -> QtCore.QModelIndex:
 		return self.createIndex(row, col, None)
 	
 	def data(self, index:QtCore.QModelIndex, role:QtCore.Qt.ItemDataRole):
-		"""TODO"""
 
 		if not index.isValid():
-			return None\
+			return None
 		
-		row = index.row()
-		col = MarkerViewItem.HEADERS[index.column()]
-
-		return self._marker_data[row].data(col, role)
+		if role == QtCore.Qt.ItemDataRole.DisplayRole:
+			return self._markers.value(index.row(), index.column())
+		
+		elif role == QtCore.Qt.ItemDataRole.DecorationRole and index.column() == self._color_column:
+			return MarkerIcons.get_marker_icon(self._markers.value(index.row(), index.column()))
+		
+		return None
 	
-	def addMarker(self, marker:MarkerViewItem):
-		"""Add a marker to the list"""
-		self.beginInsertRows(QtCore.QModelIndex(), 0,0)
-		self._marker_data.insert(0,marker)
+	def addMarkers(self, markers:MarkerColumns):
+		"""Add a batch of markers to the list"""
+
+		if not len(markers):
+			return
+		
+		first_row = len(self._markers)
+		self.beginInsertRows(QtCore.QModelIndex(), first_row, first_row + len(markers) - 1)
+		self._markers.extend(markers)
 		self.endInsertRows()
+	
+	def clear(self):
+		"""Remove all markers"""
 
-class TimelineProxyModel(QtCore.QSortFilterProxyModel):
+		self.beginResetModel()
+		self._markers = MarkerColumns()
+		self.endResetModel()
 
-	def __init__(self, *args, **kwargs):
-		super().__init__(*args, **kwargs)
+class MarkerLoader(QtCore.QObject):
+	"""Reads markers from a bin in a worker thread, delivering them in batches"""
 
-		self._shown = set()
+	BATCH_SIZE = 500
 
-	def filterAcceptsRow(self, source_row:int, parent:QtCore.QModelIndex):
-		if parent.isValid():
-			return False
-		
-		val = self.sourceModel().data(self.sourceModel().index(source_row, 0, parent), QtCore.Qt.ItemDataRole.DisplayRole)
-
-		if val not in self._shown:
-			self._shown.add(val)
-			return True
-		
-		return False
+	sig_timeline_found = QtCore.Signal(int, str)
+	sig_markers_loaded = QtCore.Signal(int, object)
+	sig_finished       = QtCore.Signal(int, bool)
+	sig_error          = QtCore.Signal(int, str)
 
+	def __init__(self):
+		super().__init__()
+		self._cancelled_load_id = -1
+	
+	def cancel(self, load_id:int):
+		"""Stop a load in progress (called from the UI thread)"""
+		self._cancelled_load_id = max(self._cancelled_load_id, load_id)
+	
+	def _is_cancelled(self, load_id:int) -> bool:
+		return load_id <= self._cancelled_load_id
+	
+	@QtCore.Slot(int, str)
+	def load(self, load_id:int, bin_path:str):
+		"""Load markers from all timelines in a bin"""
 
+		has_timelines:bool = False
+		batch = MarkerColumns()
+
+		try:
+			with avb.open(bin_path) as bin_handle:
+				for timeline in avbutils.get_timelines_from_bin(bin_handle.content):
+
+					if self._is_cancelled(load_id):
+						return
+					
+					has_timelines = True
+					timeline_name = timeline.name
+					timeline_tc_range = avbutils.get_timecode_range_for_composition(timeline)
+					self.sig_timeline_found.emit(load_id, timeline_name)
+
+					for marker_info in avbutils.get_markers_from_timeline(timeline):
+						batch.append({
+							"Timeline": timeline_name,
+							"Timeline Start": str(timeline_tc_range.start),
+							"Track": marker_info.track_label,
+							"Color": marker_info.color.value,
+							"Timecode": str(timeline_tc_range.start + marker_info.frm_offset),
+							"Date Created": str(marker_info.date_created),
+							"Date Modified": str(marker_info.date_modified),
+							"User": marker_info.user,
+							"Comment": marker_info.comment,
+						})
+
+						if len(batch) >= self.BATCH_SIZE:
+							if self._is_cancelled(load_id):
+								return
+							self.sig_markers_loaded.emit(load_id, batch)
+							batch = MarkerColumns()
+		
+		except Exception as e:
+			self.sig_error.emit(load_id, str(e))
+			return
+		
+		self.sig_markers_loaded.emit(load_id, batch)
+		self.sig_finished.emit(load_id, has_timelines)
 
 class AppController(QtCore.QObject):
 	"""Application controller"""
 
+	sig_load_requested = QtCore.Signal(int, str)
+
 	def __init__(self, initial_bin_path:str|None=None):
 		super().__init__()
 
 		self._viewmodel = MarkerViewModel()
 		self._bin_path:str = None
+		self._load_id:int = 0
+
+		self._loader_thread = QtCore.QThread()
+		self._loader = MarkerLoader()
+		self._loader.moveToThread(self._loader_thread)
+		self.sig_load_requested.connect(self._loader.load)
+		self._loader.sig_timeline_found.connect(self.timelineFound)
+		self._loader.sig_markers_loaded.connect(self.markersLoaded)
+		self._loader.sig_finished.connect(self.loadFinished)
+		self._loader.sig_error.connect(self.loadFailed)
+		self._loader_thread.start()
+		QtWidgets.QApplication.instance().aboutToQuit.connect(self.stopLoader)
 
 		self._wnd_main = MarkerViewer()
 		self._wnd_main.setMinimumWidth(500)
 
-		self._wnd_main.cmb_timelines.setModel(TimelineProxyModel())
-		self._wnd_main.cmb_timelines.model().setSourceModel(self._viewmodel)
 		self._wnd_main.view_markerlist.setModel(MarkerViewProxy())
 		self._wnd_main.view_markerlist.model().setSourceModel(self._viewmodel)
 
 		self._wnd_main.cmb_timelines.currentTextChanged.connect(self._wnd_main.view_markerlist.model().setFilter)
+		self._wnd_main.txt_filter.textChanged.connect(self._wnd_main.view_markerlist.model().setSearchFilter)
 		self._wnd_main.view_markerlist.model().setHiddenColumns(["Timeline", "Timeline Start"])
 
 		if not initial_bin_path or not QtCore.QFileInfo(initial_bin_path).isFile():
@@ -189,24 +295,35 @@ class AppController(QtCore.QObject):
 		self.loadBin()
 	
 	def loadBin(self):
-		has_timelines:bool = False
-		with avb.open(self._bin_path) as bin_handle:
-			for timeline in avbutils.get_timelines_from_bin(bin_handle.content):
-				has_timelines = True
-				timeline_name = timeline.name
-				timeline_tc_range = avbutils.get_timecode_range_for_composition(timeline)
-				for marker_info in avbutils.get_markers_from_timeline(timeline):
-					self._viewmodel.addMarker(MarkerViewItem(data={
-						"Timeline": timeline_name,
-						"Timeline Start": str(timeline_tc_range.start),
-						"Track": marker_info.track_label,
-						"Color": marker_info.color.value,
-						"Timecode": str(timeline_tc_range.start + marker_info.frm_offset),
-						"Date Created": str(marker_info.date_created),
-						"Date Modified": str(marker_info.date_modified),
-						"User": marker_info.user,
-						"Comment": marker_info.comment,
-					}))
+		"""Start loading markers from the current bin in the background"""
+
+		self._loader.cancel(self._load_id)
+		self._load_id += 1
+
+		self._viewmodel.clear()
+		self._wnd_main.cmb_timelines.clear()
+		self._wnd_main.setCursor(QtCore.Qt.CursorShape.BusyCursor)
+
+		self.sig_load_requested.emit(self._load_id, self._bin_path)
+	
+	@QtCore.Slot(int, str)
+	def timelineFound(self, load_id:int, timeline_name:str):
+		if load_id == self._load_id:
+			self._wnd_main.cmb_timelines.addItem(timeline_name)
+	
+	@QtCore.Slot(int, object)
+	def markersLoaded(self, load_id:int, markers:MarkerColumns):
+		if load_id == self._load_id:
+			self._viewmodel.addMarkers(markers)
+	
+	@QtCore.Slot(int, bool)
+	def loadFinished(self, load_id:int, has_timelines:bool):
+
+		if load_id != self._load_id:
+			return
+		
+		self._wnd_main.unsetCursor()
+
 		if not has_timelines:
 			QtWidgets.QMessageBox.critical(self._wnd_main, "No Timelines In Bin", "No timelines were found in this bin.\nThis marker list utility is currently designed for timelines only.")
 		
@@ -214,8 +331,23 @@ class AppController(QtCore.QObject):
 			self._wnd_main.setWindowFilePath(self._bin_path)
 			for col in range(self._wnd_main.view_markerlist.model().columnCount()):
 				self._wnd_main.view_markerlist.resizeColumnToContents(col)
+	
+	@QtCore.Slot(int, str)
+	def loadFailed(self, load_id:int, message:str):
 
+		if load_id != self._load_id:
+			return
+		
+		self._wnd_main.unsetCursor()
+		QtWidgets.QMessageBox.critical(self._wnd_main, "Error Reading Bin", f"The bin could not be read:\n{message}")
 	
+	@QtCore.Slot()
+	def stopLoader(self):
+		"""Cancel any load in progress and shut down the loader thread"""
+
+		self._loader.cancel(self._load_id)
+		self._loader_thread.quit()
+		self._loader_thread.wait()
 
 class MarkerIcons:
 
@@ -22,12 +22,15 @@ if __name__ == "__main__":
 	
 	with avb.open(sys.argv[1]) as bin_handle:
 
+		# Clips share most of their sources, so share the resolved hops between them
+		mobstack_cache:mobstack.MobStackCache = {}
+
 		for clip in bin_handle.content.mastermobs():
 			
 			try:
 				track = get_test_track_from_clip(clip)
 				print(clip, timeline.format_track_label(track))
-				stack = mobstack.MobStack.from_composition(clip, track, 0)
+				stack = mobstack.MobStack.from_composition(clip, track, 0, cache=mobstack_cache)
 
 				print(clip.name, stack.link_type, stack.source_name)
 			except Exception as e:
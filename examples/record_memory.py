@@ -0,0 +1,57 @@
+"""Measure memory per record for avbutils' record types, against the same records without `__slots__`"""
+
+import sys, dataclasses, datetime, tracemalloc
+import avbutils
+
+NUM_RECORDS = 100_000
+
+def unslotted(record_type:type) -> type:
+	"""The same dataclass without `__slots__`, as the record types used to be"""
+
+	params = record_type.__dataclass_params__
+	return dataclasses.make_dataclass(
+		f"Unslotted{record_type.__name__}",
+		[(field.name, field.type, field) for field in dataclasses.fields(record_type)],
+		frozen = params.frozen,
+	)
+
+def bytes_per_record(record_type:type, values:dict, num_records:int=NUM_RECORDS) -> float:
+	"""Bytes allocated per record when creating `num_records` records from the same field values"""
+
+	tracemalloc.start()
+	before, _ = tracemalloc.get_traced_memory()
+
+	records = [record_type(**values) for _ in range(num_records)]
+
+	after, _ = tracemalloc.get_traced_memory()
+	tracemalloc.stop()
+
+	del records
+	return (after - before) / num_records
+
+def sample_records() -> dict[type, dict]:
+	"""Field values for each record type; shared between records, so only the records themselves are measured"""
+
+	now = datetime.datetime.now()
+
+	return {
+		avbutils.MarkerInfo: dict(frm_offset=0, track_label="V1", user="editor", comment="Fix this", color=avbutils.MarkerColors.RED, date_created=now, date_modified=now),
+		avbutils.ClipColor: dict(r=65535, g=0, b=0),
+		avbutils.LockInfo: dict(name="AVID-01"),
+		avbutils.BinSiftOption: dict(sift_method=avbutils.BinSiftMethod.CONTAINS, sift_text="A001", sift_column="Name"),
+		avbutils.SourceEvent: dict(source_clip=None, record_offset=0, length=24, source_offset=0),
+		avbutils.TrackGap: dict(gap_type=avbutils.GapType.FILLER, sequence_name="Reel 1", track_label="V1", record_start=0, length=24, record_tc=None),
+	}
+
+if __name__ == "__main__":
+
+	num_records = int(sys.argv[1]) if len(sys.argv) > 1 else NUM_RECORDS
+
+	print(f"{'Record':<16}{'Slotted':>10}{'Unslotted':>12}{'Saved':>8}")
+
+	for record_type, values in sample_records().items():
+
+		slotted_size   = bytes_per_record(record_type, values, num_records)
+		unslotted_size = bytes_per_record(unslotted(record_type), values, num_records)
+
+		print(f"{record_type.__name__:<16}{slotted_size:>9.0f}B{unslotted_size:>11.0f}B{1 - slotted_size / unslotted_size:>8.0%}")